@@ -0,0 +1,60 @@
+"""
+Multi-worker Claim Check
+Simulates several worker processes racing to claim the same calls, as happens
+when Pixpoc redelivers a callback to a multi-worker webhook server
+
+Usage:
+    python -m benchmarks.claim_contention --workers 8 --calls 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def _claim_all(call_ids):
+    """Worker: try to claim every call, return the ones this process won"""
+    from database.db import claim_call_for_processing
+    return [call_id for call_id in call_ids if claim_call_for_processing(call_id)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race worker processes on call claims")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before database.db is imported in this or any worker
+        os.environ["DATABASE_PATH"] = str(Path(tmp) / "claims.db")
+        from database.db import init_db, save_call
+
+        init_db()
+        call_ids = [f"bench-call-{i}" for i in range(args.calls)]
+        for i, call_id in enumerate(call_ids):
+            save_call(f"+9190000{i:05d}", call_id, tracking_id=f"bench-sid-{i}")
+
+        started = time.perf_counter()
+        with Pool(args.workers) as pool:
+            results = pool.map(_claim_all, [call_ids] * args.workers)
+        elapsed = time.perf_counter() - started
+
+    claimed = [call_id for won in results for call_id in won]
+    duplicates = len(claimed) - len(set(claimed))
+    print(f"{args.workers} workers x {args.calls} calls in {elapsed:.2f}s")
+    print(f"  claimed: {len(set(claimed))}/{args.calls}  duplicates: {duplicates}")
+    print(f"  per worker: {[len(won) for won in results]}")
+
+    if duplicates or len(set(claimed)) != args.calls:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
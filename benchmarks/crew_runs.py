@@ -0,0 +1,153 @@
+"""
+Crew Run Benchmark
+Runs the planning crews on the crew runtime against the mock LLM server and
+reports per-run latency, per-task latency and tokens, agent pooling and
+task output cache hits
+
+Starts benchmarks.mock_llm in-process unless --base-url points at an
+OpenAI-compatible endpoint already running (the mock, or a local Ollama for
+real model timings). Crews use the `ollama` provider from
+finance_bot/config/models.yaml, so no API key is needed.
+
+Usage:
+    python -m benchmarks.crew_runs --runs 3
+    python -m benchmarks.crew_runs --crews tax --runs 5 --vary --latency-ms 500
+    python -m benchmarks.crew_runs --base-url http://localhost:11434/v1 --model mistral-nemo --runs 1
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def start_mock_server(config) -> str:
+    """Run the mock LLM API in a background thread, returning its base URL"""
+    import uvicorn
+    from benchmarks.mock_llm import create_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _sample_inputs() -> dict:
+    """Sample input per crew: the mock Pixpoc analysis and each crew's sample user data"""
+    from benchmarks.mock_pixpoc import SAMPLE_ANALYSIS
+
+    with open(project_root / "finance_bot" / "financial_planning" / "user_data.json") as f:
+        user_data = json.load(f)
+    with open(project_root / "finance_bot" / "tax_planning" / "user_tax_data.json") as f:
+        user_tax_data = json.load(f)
+    return {
+        "comprehensive": {"metadata": dict(SAMPLE_ANALYSIS), "rawResponse": None},
+        "financial": user_data,
+        "tax": user_tax_data,
+    }
+
+
+def _crew(name: str, data: dict):
+    if name == "comprehensive":
+        from finance_bot.comprehensive_planning.main import ComprehensivePlanningCrew
+        return ComprehensivePlanningCrew(data)
+    if name == "financial":
+        from finance_bot.financial_planning.main import FinancialPlanningCrew
+        return FinancialPlanningCrew(data)
+    from finance_bot.tax_planning.main import TaxPlanningCrew
+    return TaxPlanningCrew(data)
+
+
+def run_crew(name: str, data: dict, verbose: bool) -> dict:
+    """Run one crew and return its instrumentation report"""
+    crew = _crew(name, data)
+    started = time.perf_counter()
+    if verbose:
+        crew.run()
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            crew.run()
+    report = crew.report()
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the planning crews offline against a mock LLM")
+    parser.add_argument("--crews", nargs="+", choices=["comprehensive", "financial", "tax"],
+                        default=["comprehensive", "financial", "tax"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--vary", action="store_true",
+                        help="Change the input every run, so the task output cache never hits")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the task output cache")
+    parser.add_argument("--base-url", default=None, help="Use an already running OpenAI-compatible endpoint")
+    parser.add_argument("--model", default=None, help="Model to request from --base-url")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--ms-per-token", type=float, default=2.0)
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--verbose", action="store_true", help="Show crewai's agent output")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        from benchmarks.mock_llm import MockConfig
+        base_url = start_mock_server(MockConfig(
+            latency_ms=args.latency_ms,
+            ms_per_token=args.ms_per_token,
+            output_tokens=args.output_tokens
+        )) + "/v1"
+
+    # Must be set before finance_bot.crew_runtime is imported
+    os.environ["CREW_LLM_PROVIDER"] = "ollama"
+    os.environ["CREW_LLM_BASE_URL"] = base_url
+    if args.model:
+        os.environ["CREW_LLM_MODEL"] = args.model
+    if args.no_cache:
+        os.environ["CREW_OUTPUT_CACHE_SIZE"] = "0"
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+
+    samples = _sample_inputs()
+    for name in args.crews:
+        print(f"{name} crew, {args.runs} runs{' with varying input' if args.vary else ''}")
+        for run in range(args.runs):
+            data = copy.deepcopy(samples[name])
+            if args.vary:
+                (data.get("metadata") or data)["benchmark_run"] = run
+            report = run_crew(name, data, args.verbose)
+            tasks = report["tasks"]
+            ran = [task for task, counts in tasks.items() if counts["source"] == "run"]
+            print(f"  run {run + 1}: {report['elapsed']:.2f}s, {len(ran)}/{len(tasks)} tasks run, "
+                  f"agents {'built' if report['run']['agents_built'] else 'pooled'}, "
+                  f"attempts {report['run']['attempts']}")
+            for task, counts in tasks.items():
+                if counts["source"] == "run":
+                    print(f"    {task}: {counts['latency_seconds']:.2f}s prompt={counts['prompt_tokens']} "
+                          f"output={counts['output_tokens']} context={counts.get('context_tokens', '-')}")
+                else:
+                    print(f"    {task}: skipped ({counts['source']})")
+
+    print("tiers:")
+    for tier, stats in report["tiers"].items():
+        print(f"  {tier}: tasks={stats['tasks']} avg_latency={stats['avg_latency_seconds']:.2f}s "
+              f"input_tokens={stats['input_tokens']} output_tokens={stats['output_tokens']} models={stats['models']}")
+    print(f"output cache: {report['output_cache']}")
+
+
+if __name__ == "__main__":
+    main()
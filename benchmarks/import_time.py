@@ -0,0 +1,92 @@
+"""
+Import-time Profiling
+Measures cold-start import cost of the server entry points with -X importtime
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time webhook_server.main --top 30
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# Modules imported when each process starts serving
+DEFAULT_TARGETS = [
+    "webhook_server.main",
+    "streamlit_app.components.dashboard",
+    "finance_bot.comprehensive_planning.main",
+]
+
+
+def profile_import(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Dotted module path to import
+
+    Returns:
+        Dict with total microseconds, per-module rows and any import error
+    """
+    env = dict(os.environ, PYTHONPATH=str(project_root), WARMUP_IMPORTS="0")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+
+    return {
+        "module": module,
+        "total_us": sum(row["self_us"] for row in rows),
+        "rows": rows,
+        "error": error
+    }
+
+
+def print_report(result: dict, top: int):
+    """Print total import time and the slowest top-level imports"""
+    print(f"\n{result['module']}: {result['total_us'] / 1000:.1f} ms total")
+    if result["error"]:
+        print(f"  ⚠️  import failed: {result['error']}")
+
+    slowest = sorted(result["rows"], key=lambda row: row["cumulative_us"], reverse=True)
+    print(f"  {'cumulative ms':>14}  {'self ms':>8}  module")
+    for row in slowest[:top]:
+        print(f"  {row['cumulative_us'] / 1000:>14.1f}  {row['self_us'] / 1000:>8.1f}  {row['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of entry points")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to show")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        print_report(profile_import(module), args.top)
+
+
+if __name__ == "__main__":
+    main()
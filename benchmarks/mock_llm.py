@@ -0,0 +1,164 @@
+"""
+Mock LLM Server
+Offline stand-in for an OpenAI-compatible chat completions endpoint (the
+OpenAI API or a local Ollama) with configurable latency, generation speed
+and error injection
+
+Every completion is a final answer in the format crewai agents parse: a
+markdown section with figures and a table, sized by --output-tokens, so the
+crew runtime's condensing, caching and instrumentation see realistic
+outputs without a model.
+
+Usage:
+    python -m benchmarks.mock_llm --port 8200 --latency-ms 300 --ms-per-token 5
+
+    # then point the crews at it
+    CREW_LLM_PROVIDER=ollama CREW_LLM_BASE_URL=http://localhost:8200/v1 \\
+        python -m finance_bot.financial_planning.main
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockConfig:
+    """Runtime behaviour of the mock; adjustable via POST /mock/config"""
+    latency_ms: float = 200.0        # time to first token
+    latency_jitter_ms: float = 50.0
+    ms_per_token: float = 2.0        # generation time per output token
+    output_tokens: int = 400         # approximate length of each answer
+    error_rate: float = 0.0          # fraction of requests answered with HTTP 500
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def answer(prompt: str, output_tokens: int) -> str:
+    """A final answer of roughly `output_tokens` tokens, varied by the prompt"""
+    rng = random.Random(prompt)
+    lines = [
+        "Thought: I now know the final answer",
+        "Final Answer: ## Summary",
+        f"Monthly surplus of ₹{rng.randrange(5, 80) * 1000:,} supports a savings rate of {rng.randrange(10, 45)}%.",
+        "",
+        "| Item | Amount | Note |",
+        "|------|--------|------|",
+    ]
+    row = 0
+    while _estimate_tokens("\n".join(lines)) < output_tokens:
+        row += 1
+        lines.append(f"| Item {row} | ₹{rng.randrange(1, 500) * 1000:,} | {rng.choice(['keep', 'increase', 'review'])} |")
+        if row % 5 == 0:
+            lines.append(f"\n### Recommendation {row // 5}\nAllocate {rng.randrange(5, 40)}% of the surplus "
+                         f"over {rng.randrange(2, 20)} years at an assumed {rng.randrange(6, 13)}% return.\n")
+    return "\n".join(lines)
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """Build the mock chat completions API"""
+    app = FastAPI(title="Mock LLM API")
+    app.state.config = config or MockConfig()
+    app.state.stats = {"requests": 0, "errors_injected": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        config, stats = app.state.config, app.state.stats
+        stats["requests"] += 1
+
+        delay = random.gauss(config.latency_ms, config.latency_jitter_ms) if config.latency_jitter_ms else config.latency_ms
+        if random.random() < config.error_rate:
+            await asyncio.sleep(max(delay, 0) / 1000)
+            stats["errors_injected"] += 1
+            return JSONResponse({"error": {"message": "Injected server error", "type": "server_error"}}, status_code=500)
+
+        prompt = _prompt_text(body.get("messages") or [])
+        content = answer(prompt, config.output_tokens)
+        prompt_tokens, completion_tokens = _estimate_tokens(prompt), _estimate_tokens(content)
+        await asyncio.sleep(max(delay + completion_tokens * config.ms_per_token, 0) / 1000)
+
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/mock/stats")
+    async def get_stats():
+        return app.state.stats
+
+    @app.post("/mock/config")
+    async def update_config(request: Request):
+        """Change latency, speed or error rate without restarting"""
+        updates = await request.json()
+        known = {f.name for f in fields(MockConfig)}
+        for key, value in updates.items():
+            if key in known:
+                setattr(app.state.config, key, value)
+        return asdict(app.state.config)
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible LLM API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--ms-per-token", type=float, default=2.0)
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        ms_per_token=args.ms_per_token,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Mock Pixpoc Server
+Offline stand-in for the Pixpoc Call Manager API with configurable latency,
+error injection, rate limiting and analysis callbacks
+
+Implements the endpoints PixpocClient uses. Every initiated call gets an
+`analysis_completed` callback (the PixpocCallback payload) posted to
+--callback-url after --callback-delay-ms, so the webhook server can be
+driven end to end without the live service.
+
+Usage:
+    python -m benchmarks.mock_pixpoc --port 8100 --latency-ms 80 --error-rate 0.02 \\
+        --callback-url http://localhost:8000/webhook/pixpoc
+
+    # then point the backend at it
+    PIXPOC_API_BASE_URL=http://localhost:8100 ./run.sh
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockConfig:
+    """Runtime behaviour of the mock; adjustable via POST /mock/config"""
+    latency_ms: float = 50.0
+    latency_jitter_ms: float = 20.0
+    error_rate: float = 0.0          # fraction of API requests answered with HTTP 500
+    rate_limit_rps: float = 0.0      # 429 with Retry-After above this rate (0 = unlimited)
+    callback_url: Optional[str] = None
+    callback_delay_ms: float = 1000.0
+    callback_failure_rate: float = 0.0  # fraction of callbacks sent with status 'failed'
+    transcript_turns: int = 40
+
+
+SAMPLE_ANALYSIS = {
+    "name": "Test User",
+    "age": 32,
+    "monthly_income": 120000,
+    "monthly_expenses": 65000,
+    "current_savings": 450000,
+    "investments": {"mutual_funds": 300000, "fixed_deposits": 150000},
+    "loans": {"home_loan": 2500000},
+    "goals": [{"name": "Retirement", "target_amount": 30000000, "target_year": 2055}],
+    "risk_appetite": "moderate",
+    "tax_regime": "new",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ok(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"success": True, "data": data}
+
+
+class MockPixpoc:
+    """In-memory calls, contacts and metrics behind the mock API"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        self.contacts: Dict[str, Dict[str, Any]] = {}
+        self.contacts_by_phone: Dict[str, str] = {}
+        self.stats = {"requests": 0, "errors_injected": 0, "rate_limited": 0,
+                      "calls": 0, "callbacks_sent": 0, "callbacks_failed": 0}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._callback_client: Optional[httpx.AsyncClient] = None
+        self._callback_tasks = set()
+
+    def throttled(self) -> Optional[float]:
+        """Seconds until the next request is allowed, if over the rate limit"""
+        if self.config.rate_limit_rps <= 0:
+            return None
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        if self._window_count > self.config.rate_limit_rps:
+            return 1.0 - (now - self._window_start)
+        return None
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        if self.config.rate_limit_rps <= 0:
+            return {}
+        remaining = max(int(self.config.rate_limit_rps) - self._window_count, 0)
+        reset = max(1.0 - (time.monotonic() - self._window_start), 0.0)
+        return {
+            "x-ratelimit-limit": str(int(self.config.rate_limit_rps)),
+            "x-ratelimit-remaining": str(remaining),
+            "x-ratelimit-reset": f"{reset:.3f}",
+        }
+
+    def contact_for(self, phone: str, name: Optional[str], data: Optional[dict]) -> Dict[str, Any]:
+        contact_id = self.contacts_by_phone.get(phone)
+        if contact_id is None:
+            contact_id = str(uuid.uuid4())
+            self.contacts_by_phone[phone] = contact_id
+            self.contacts[contact_id] = {
+                "contactId": contact_id, "phoneNumber": phone, "name": name,
+                "metadata": dict(data or {}), "createdAt": _now(), "updatedAt": _now()
+            }
+        return self.contacts[contact_id]
+
+    def create_call(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        contact = self.contact_for(body["toNumber"], body.get("contactName"), body.get("contactData"))
+        call = {
+            "id": str(uuid.uuid4()),
+            "trackingId": f"mock-{uuid.uuid4().hex[:16]}",
+            "status": "queued",
+            "direction": "outbound",
+            "toNumber": body["toNumber"],
+            "agentId": body["agentId"],
+            "contactId": contact["contactId"],
+            "createdAt": _now(),
+        }
+        self.calls[call["id"]] = call
+        self.stats["calls"] += 1
+        if self.config.callback_url:
+            task = asyncio.create_task(self.complete_call(call["id"]))
+            self._callback_tasks.add(task)
+            task.add_done_callback(self._callback_tasks.discard)
+        return {"call": call, "contact": {"id": contact["contactId"]}, "campaign": {"id": "mock-campaign"}}
+
+    def call(self, call_id: str) -> Dict[str, Any]:
+        call = self.calls.get(call_id) or next(
+            (c for c in self.calls.values() if c["trackingId"] == call_id), None
+        )
+        if call is None:
+            raise HTTPException(status_code=404, detail="Call not found")
+        return call
+
+    def analysis(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        return {"status": "COMPLETED", "metadata": dict(SAMPLE_ANALYSIS), "rawResponse": None}
+
+    def transcript(self, call: Dict[str, Any]) -> str:
+        turns = []
+        for i in range(self.config.transcript_turns):
+            if i % 2:
+                turns.append(f"user: My monthly income is around ₹{SAMPLE_ANALYSIS['monthly_income']:,} and I save about {10 + i}%.")
+            else:
+                turns.append("agent: Could you tell me a little more about your monthly finances?")
+        return "\n".join(turns)
+
+    def callback_payload(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """PixpocCallback body for a completed call"""
+        failed = random.random() < self.config.callback_failure_rate
+        return {
+            "event": "analysis_completed",
+            "callSid": call["trackingId"],
+            "callId": call["id"],
+            "callType": call["direction"],
+            "status": "failed" if failed else "success",
+            "analysis": None if failed else self.analysis(call),
+            "error": "Injected analysis failure" if failed else None,
+            "timestamp": _now(),
+        }
+
+    async def complete_call(self, call_id: str):
+        """Finish a call after the configured delay and fire its callback"""
+        await asyncio.sleep(self.config.callback_delay_ms / 1000)
+        call = self.calls[call_id]
+        call.update(status="completed", duration=180, endedAt=_now())
+        await self.send_callback(call)
+
+    async def send_callback(self, call: Dict[str, Any]) -> bool:
+        if not self.config.callback_url:
+            return False
+        if self._callback_client is None:
+            self._callback_client = httpx.AsyncClient(timeout=30.0)
+        try:
+            response = await self._callback_client.post(self.config.callback_url, json=self.callback_payload(call))
+            response.raise_for_status()
+            self.stats["callbacks_sent"] += 1
+            return True
+        except httpx.HTTPError:
+            self.stats["callbacks_failed"] += 1
+            return False
+
+    async def aclose(self):
+        for task in list(self._callback_tasks):
+            task.cancel()
+        if self._callback_client is not None:
+            await self._callback_client.aclose()
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """Build the mock Pixpoc API"""
+    app = FastAPI(title="Mock Pixpoc API")
+    mock = MockPixpoc(config or MockConfig())
+    app.state.mock = mock
+
+    @app.middleware("http")
+    async def simulate_upstream(request: Request, call_next):
+        if not request.url.path.startswith("/api/"):
+            return await call_next(request)
+
+        mock.stats["requests"] += 1
+        config = mock.config
+        delay = random.gauss(config.latency_ms, config.latency_jitter_ms) if config.latency_jitter_ms else config.latency_ms
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+        retry_after = mock.throttled()
+        if retry_after is not None:
+            mock.stats["rate_limited"] += 1
+            return JSONResponse(
+                {"success": False, "error": "Rate limit exceeded"}, status_code=429,
+                headers={"Retry-After": f"{max(retry_after, 0.001):.3f}", **mock.rate_limit_headers()}
+            )
+        if random.random() < config.error_rate:
+            mock.stats["errors_injected"] += 1
+            return JSONResponse({"success": False, "error": "Injected server error"}, status_code=500)
+
+        response = await call_next(request)
+        response.headers.update(mock.rate_limit_headers())
+        return response
+
+    @app.on_event("shutdown")
+    async def close_mock():
+        await mock.aclose()
+
+    @app.post("/api/v1/calls")
+    async def create_call(request: Request):
+        body = await request.json()
+        if not body.get("toNumber") or not body.get("agentId"):
+            return JSONResponse({"success": False, "message": "toNumber and agentId are required"}, status_code=400)
+        return _ok(mock.create_call(body))
+
+    @app.get("/api/v1/calls/{call_id}")
+    async def get_call(call_id: str):
+        return _ok({"call": mock.call(call_id)})
+
+    @app.get("/api/v1/calls/{call_id}/analysis")
+    async def get_analysis(call_id: str):
+        return _ok(mock.analysis(mock.call(call_id)))
+
+    @app.get("/api/v1/calls/{call_id}/transcript")
+    async def get_transcript(call_id: str):
+        call = mock.call(call_id)
+        return _ok({"callId": call["id"], "transcript": mock.transcript(call)})
+
+    @app.get("/api/v1/inbound-calls/{call_id}")
+    async def get_inbound_call(call_id: str):
+        call = mock.call(call_id)
+        return _ok({"inboundCall": dict(call, analysis=mock.analysis(call))})
+
+    @app.get("/api/v1/account")
+    async def get_account():
+        return _ok({"account": {"id": "mock-account", "credits": 1_000_000, "callsPlaced": mock.stats["calls"]}})
+
+    @app.get("/api/v1/contacts/{contact_id}/metadata")
+    async def get_contact_metadata(contact_id: str):
+        contact = mock.contacts.get(contact_id)
+        if contact is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        return _ok(contact)
+
+    @app.put("/api/v1/contacts/{contact_id}/metadata")
+    async def update_contact_metadata(contact_id: str, request: Request):
+        body = await request.json()
+        contact = mock.contacts.setdefault(contact_id, {
+            "contactId": contact_id, "phoneNumber": None, "metadata": {}, "createdAt": _now()
+        })
+        contact["metadata"].update(body.get("metadata") or {})
+        contact["updatedAt"] = _now()
+        return _ok(contact)
+
+    @app.get("/mock/stats")
+    async def get_stats():
+        return mock.stats
+
+    @app.post("/mock/config")
+    async def update_config(request: Request):
+        """Change latency, error rates or callback target without restarting"""
+        updates = await request.json()
+        known = {f.name for f in fields(MockConfig)}
+        for key, value in updates.items():
+            if key in known:
+                setattr(mock.config, key, value)
+        return asdict(mock.config)
+
+    @app.post("/mock/calls/{call_id}/callback")
+    async def resend_callback(call_id: str):
+        """Fire (or re-fire, to test duplicate delivery) a call's callback now"""
+        return {"sent": await mock.send_callback(mock.call(call_id))}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a mock Pixpoc API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0)
+    parser.add_argument("--callback-url", default=None,
+                        help="Webhook to post analysis callbacks to, e.g. http://localhost:8000/webhook/pixpoc")
+    parser.add_argument("--callback-delay-ms", type=float, default=1000.0)
+    parser.add_argument("--callback-failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rps=args.rate_limit_rps,
+        callback_url=args.callback_url,
+        callback_delay_ms=args.callback_delay_ms,
+        callback_failure_rate=args.callback_failure_rate,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Pixpoc Client Throughput
+Drives PixpocClient against the mock Pixpoc server and reports call
+initiation throughput and latency
+
+Starts benchmarks.mock_pixpoc in-process unless --base-url points at one
+already running (e.g. with --callback-url set, for an end-to-end run
+through the webhook server).
+
+Usage:
+    python -m benchmarks.pixpoc_throughput --calls 500 --concurrency 50
+    python -m benchmarks.pixpoc_throughput --latency-ms 150 --error-rate 0.02 --fetch
+    python -m benchmarks.pixpoc_throughput --rate-limit --rate-limit-rps 20
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(config) -> str:
+    """Run the mock Pixpoc API in a background thread, returning its base URL"""
+    import uvicorn
+    from benchmarks.mock_pixpoc import create_app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_calls(base_url: str, calls: int, concurrency: int, fetch: bool) -> dict:
+    """Initiate `calls` calls (and optionally fetch each call's full data)"""
+    from services.pixpoc_client import PixpocClient
+
+    client = PixpocClient(base_url=base_url, api_key="bench")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await client.initiate_call(f"+9190{i:08d}", agent_id="bench-agent")
+                if fetch:
+                    await client.get_full_call_data(result["call"]["id"])
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    stats = await client._get_async_client().get(f"{base_url}/mock/stats")
+    await client.aclose()
+    return {"elapsed": elapsed, "latencies": latencies, "failures": failures, "mock": stats.json()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure PixpocClient throughput against the mock server")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--fetch", action="store_true",
+                        help="Also fetch details, analysis and transcript per call (the enrichment path)")
+    parser.add_argument("--base-url", default=None, help="Use an already running mock server")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-rate-limit-rps", type=float, default=0.0,
+                        help="Have the mock answer 429 above this rate")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="Keep the client-side rate limiter on (off by default to measure raw throughput)")
+    parser.add_argument("--rate-limit-rps", type=float, default=None, help="Client-side Pixpoc limit")
+    args = parser.parse_args()
+
+    # Must be set before services.rate_limiter is imported
+    os.environ["RATE_LIMIT_ENABLED"] = "1" if args.rate_limit else "0"
+    os.environ["RATE_LIMIT_STATE_PATH"] = str(Path(tempfile.mkdtemp()) / "ratelimits.db")
+    if args.rate_limit_rps:
+        os.environ["RATE_LIMIT_PIXPOC_RPS"] = str(args.rate_limit_rps)
+        os.environ["RATE_LIMIT_PIXPOC_BURST"] = str(args.rate_limit_rps)
+
+    base_url = args.base_url
+    if base_url is None:
+        from benchmarks.mock_pixpoc import MockConfig
+        base_url = start_mock_server(MockConfig(
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            rate_limit_rps=args.mock_rate_limit_rps
+        ))
+
+    result = asyncio.run(run_calls(base_url, args.calls, args.concurrency, args.fetch))
+    latencies = result["latencies"]
+    print(f"{args.calls} calls, concurrency {args.concurrency}{' + full data fetch' if args.fetch else ''}")
+    print(f"  throughput: {len(latencies) / result['elapsed']:.1f} calls/s over {result['elapsed']:.2f}s")
+    print(f"  latency ms: p50 {_percentile(latencies, 50) * 1000:.0f}  "
+          f"p95 {_percentile(latencies, 95) * 1000:.0f}  p99 {_percentile(latencies, 99) * 1000:.0f}")
+    print(f"  failures: {result['failures']}")
+    print(f"  mock: {result['mock']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import { NextRequest, NextResponse } from "next/server"
+
+// Streams for as long as the browser stays connected; never cache or prerender
+export const dynamic = "force-dynamic"
+
+export async function GET(request: NextRequest) {
+  const phone = request.nextUrl.searchParams.get("phone")
+
+  if (!phone) {
+    return NextResponse.json(
+      { error: "Phone number required" },
+      { status: 400 }
+    )
+  }
+
+  const backendUrl = process.env.BACKEND_URL || "http://localhost:8000"
+  const params = new URLSearchParams({ phone })
+  const since = request.nextUrl.searchParams.get("since")
+  if (since) params.set("since", since)
+
+  try {
+    // Pass the backend's server-sent events straight through; aborting with
+    // the browser request closes the upstream stream too
+    const response = await fetch(`${backendUrl}/api/events?${params}`, {
+      headers: { Accept: "text/event-stream" },
+      cache: "no-store",
+      signal: request.signal,
+    })
+
+    if (!response.ok || !response.body) {
+      return NextResponse.json(
+        { error: "Event stream unavailable" },
+        { status: 502 }
+      )
+    }
+
+    return new Response(response.body, {
+      headers: {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache, no-transform",
+        Connection: "keep-alive",
+      },
+    })
+  } catch (error) {
+    return NextResponse.json(
+      { error: "Event stream unavailable" },
+      { status: 502 }
+    )
+  }
+}
@@ -9,6 +9,7 @@ import { Calculator, FileText, User, Home, Download } from "lucide-react"
 import { Button } from "@/components/ui/button"
 import { getUser } from "@/lib/auth"
 import { useToast } from "@/hooks/use-toast"
+import { useReportEvents } from "@/hooks/use-report-events"
 
 interface Report {
   id: string
@@ -23,8 +24,31 @@ export default function ReportsPage() {
   const [reports, setReports] = useState<Report[]>([])
   const [loading, setLoading] = useState(true)
   const [downloading, setDownloading] = useState<string | null>(null)
+  // Newest report date at load time; reports saved after it arrive as events
+  const [loadedSince, setLoadedSince] = useState<string | undefined>(undefined)
   const { toast } = useToast()
 
+  useReportEvents({
+    enabled: !loading,
+    since: loadedSince,
+    onReportReady: (report) => {
+      setReports((current) =>
+        current.some((r) => r.id === report.id) ? current : [report, ...current]
+      )
+      toast({
+        title: "New report ready",
+        description: `${report.title} is available to download.`,
+      })
+    },
+    onReportFailed: () => {
+      toast({
+        title: "Report failed",
+        description: "We couldn't generate a report from your last call. Please try again.",
+        variant: "destructive",
+      })
+    },
+  })
+
   useEffect(() => {
     const fetchReports = async () => {
       const user = getUser()
@@ -39,6 +63,7 @@ export default function ReportsPage() {
           const data = await response.json()
           console.log("Reports fetched:", data)
           setReports(data)
+          setLoadedSince(data[0]?.date)
         } else {
           console.error("Failed to fetch reports:", response.status, response.statusText)
           toast({
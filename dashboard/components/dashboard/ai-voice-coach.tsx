@@ -4,6 +4,7 @@ import { useState, useEffect } from "react"
 import { Phone, Calendar, MessageSquare, Play, Loader2, GraduationCap } from "lucide-react"
 import { getUser } from "@/lib/auth"
 import { useToast } from "@/hooks/use-toast"
+import { useReportEvents } from "@/hooks/use-report-events"
 
 export function AIVoiceCoach() {
   const [user, setUser] = useState<{ phone: string; name: string } | null>(null)
@@ -17,6 +18,26 @@ export function AIVoiceCoach() {
     setUser(getUser())
   }, [])
 
+  // Listen for the report only while a planning call is in progress
+  useReportEvents({
+    enabled: callInitiated,
+    onReportReady: (report) => {
+      setCallInitiated(false)
+      toast({
+        title: "Your report is ready",
+        description: `${report.title} is available on the Reports page.`,
+      })
+    },
+    onReportFailed: () => {
+      setCallInitiated(false)
+      toast({
+        title: "Report failed",
+        description: "We couldn't generate a report from your call. Please try again.",
+        variant: "destructive",
+      })
+    },
+  })
+
   const handleStartCall = async (agentType: "planning" | "coaching" = "planning") => {
     if (!user) {
       toast({
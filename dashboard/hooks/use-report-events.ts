@@ -0,0 +1,56 @@
+import * as React from 'react'
+import { getUser } from '@/lib/auth'
+
+export interface ReportEvent {
+  id: string
+  type: string
+  filename: string
+  path: string
+  size?: number | null
+  date: string
+  title: string
+  callId?: string | null
+}
+
+interface ReportEventHandlers {
+  onReportReady?: (report: ReportEvent) => void
+  onReportFailed?: (callId: string | null) => void
+  // Newest report date already shown; newer ones saved before connecting are replayed
+  since?: string
+  // Hold off connecting, e.g. until the initial list has loaded
+  enabled?: boolean
+}
+
+/**
+ * Subscribe to the logged-in user's report events (server-sent, pushed by the
+ * backend when a call's report is saved or fails). EventSource reconnects on
+ * its own if the connection drops.
+ */
+export function useReportEvents({ onReportReady, onReportFailed, since, enabled = true }: ReportEventHandlers) {
+  // Keep the latest handlers without reconnecting when they change
+  const handlers = React.useRef({ onReportReady, onReportFailed })
+  handlers.current = { onReportReady, onReportFailed }
+
+  React.useEffect(() => {
+    const user = getUser()
+    if (!user || !enabled) return
+
+    const params = new URLSearchParams({ phone: user.phone })
+    if (since) params.set('since', since)
+    const source = new EventSource(`/api/events?${params}`)
+    const seen = new Set<string>()
+
+    source.addEventListener('report_ready', (event) => {
+      const report: ReportEvent = JSON.parse((event as MessageEvent).data)
+      if (seen.has(report.id)) return
+      seen.add(report.id)
+      handlers.current.onReportReady?.(report)
+    })
+    source.addEventListener('report_failed', (event) => {
+      const data = JSON.parse((event as MessageEvent).data)
+      handlers.current.onReportFailed?.(data.callId ?? null)
+    })
+
+    return () => source.close()
+  }, [since, enabled])
+}
@@ -0,0 +1,272 @@
+"""
+Async Database API
+Awaitable versions of the database/db.py functions for the webhook server
+
+Queries run on a native async driver (aiosqlite / asyncpg) when it is
+installed, otherwise on a small dedicated DB thread pool with a bounded
+queue. Either way a slow disk or a lock wait no longer blocks the event loop.
+
+DB_ASYNC_MODE selects the path: "auto" (default), "native" or "executor".
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from database import db
+from database.async_repository import create_async_repository
+
+DB_ASYNC_MODE = os.getenv("DB_ASYNC_MODE", "auto")
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+# Max queries queued or running on the executor; further callers wait their turn
+DB_EXECUTOR_QUEUE_SIZE = int(os.getenv("DB_EXECUTOR_QUEUE_SIZE", "64"))
+
+
+class DBExecutor:
+    """
+    Runs blocking database functions on dedicated threads.
+
+    Kept separate from the event loop's default executor so report
+    generation (crew runs, PDF rendering) can't starve queries, and bounded
+    so a stalled database applies backpressure instead of growing a backlog.
+    """
+
+    def __init__(self, max_workers=DB_EXECUTOR_WORKERS, queue_size=DB_EXECUTOR_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.queue_size = max(queue_size, max_workers)
+        self._executor = None
+        self._slots = None
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on a DB thread and await its result"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+            self._slots = asyncio.Semaphore(self.queue_size)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class ExecutorRepository:
+    """Async facade over the sync database/db.py functions via DBExecutor"""
+
+    def __init__(self, executor=None):
+        self.executor = executor or DBExecutor()
+
+    def __getattr__(self, name):
+        func = getattr(db, name)
+
+        async def call(*args, **kwargs):
+            return await self.executor.run(func, *args, **kwargs)
+
+        return call
+
+    async def close(self):
+        await self.executor.close()
+
+
+def _native_driver_available():
+    module = "asyncpg" if db.backend_name() == "postgres" else "aiosqlite"
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+_repository = None
+
+
+def get_async_repository():
+    """Get the process-wide async repository (native driver or DB executor)"""
+    global _repository
+    if _repository is None:
+        # Group commit batches on the sync writer thread, so it implies the executor
+        if DB_ASYNC_MODE == "native" or (
+            DB_ASYNC_MODE == "auto" and not db.DB_GROUP_COMMIT and _native_driver_available()
+        ):
+            _repository = create_async_repository(db.DATABASE_URL, db.DB_PATH)
+        else:
+            _repository = ExecutorRepository()
+    return _repository
+
+
+async def close():
+    """Close the async repository's connections or threads"""
+    global _repository
+    if _repository is not None:
+        await _repository.close()
+        _repository = None
+
+
+async def ensure_user_exists(phone_number, name=None):
+    """Ensure user exists in database"""
+    await get_async_repository().ensure_user_exists(phone_number, name)
+
+
+async def get_user_reports(phone_number, limit=None, offset=0, report_type=None):
+    """Get a user's reports, newest first (see db.get_user_reports)"""
+    return await get_async_repository().get_user_reports(phone_number, limit, offset, report_type)
+
+
+async def count_user_reports(phone_number):
+    """Get a user's report counts by type"""
+    return await get_async_repository().count_user_reports(phone_number)
+
+
+async def get_reports_since(since):
+    """Reports saved after an ISO timestamp for all users (see db.get_reports_since)"""
+    return await get_async_repository().get_reports_since(since)
+
+
+async def get_report_sections(phone_number):
+    """A user's latest report sections, keyed by section name"""
+    return await get_async_repository().get_report_sections(phone_number)
+
+
+async def get_contact_memory(phone_number):
+    """A user's stored contact memory (state and rendered text), or None"""
+    return await get_async_repository().get_contact_memory(phone_number)
+
+
+async def get_contact_metadata(contact_id):
+    """A Pixpoc contact's locally stored metadata (see db.get_contact_metadata)"""
+    return await get_async_repository().get_contact_metadata(contact_id)
+
+
+async def due_contact_metadata(queued_before, limit=100):
+    """Contacts with updates queued at or before an ISO timestamp and no live claim"""
+    return await get_async_repository().due_contact_metadata(queued_before, limit)
+
+
+async def get_user_financial_data(phone_number, fields=None):
+    """Get user's financial summary (see db.get_user_financial_data)"""
+    return await get_async_repository().get_user_financial_data(phone_number, fields)
+
+
+async def save_call(phone_number, call_id, contact_id=None, tracking_id=None, campaign_id=None):
+    """Save call record with full Pixpoc response data (see db.save_call)"""
+    await get_async_repository().save_call(phone_number, call_id, contact_id, tracking_id, campaign_id)
+
+
+async def save_calls(calls):
+    """Save many call records in one transaction (see db.save_calls)"""
+    await get_async_repository().save_calls(calls)
+
+
+async def recently_called_numbers(phone_numbers, since):
+    """Which of these numbers already have a call created at or after `since`"""
+    return await get_async_repository().recently_called_numbers(phone_numbers, since)
+
+
+async def update_call_status(call_id, status, contact_id=None):
+    """Update call status"""
+    await get_async_repository().update_call_status(call_id, status, contact_id)
+
+
+async def claim_call_for_processing(call_id):
+    """Atomically claim a call for report processing (see db.claim_call_for_processing)"""
+    return await get_async_repository().claim_call_for_processing(call_id)
+
+
+async def get_call_phone_number(call_id):
+    """Get phone number associated with a call"""
+    return await get_async_repository().get_call_phone_number(call_id)
+
+
+async def get_call_by_tracking_id(tracking_id):
+    """Get call details by tracking ID (callSid)"""
+    return await get_async_repository().get_call_by_tracking_id(tracking_id)
+
+
+async def get_call_by_id(call_id):
+    """Get call details by call ID"""
+    return await get_async_repository().get_call_by_id(call_id)
+
+
+async def record_report(call_id, status, phone_number, report_id, report_type, filename, file_path, file_size=None,
+                        financial_data=None, taken_at=None):
+    """Set call status, upsert user, save report and financial data in one transaction"""
+    await get_async_repository().record_report(
+        call_id, status, phone_number, report_id, report_type, filename, file_path, file_size,
+        financial_data, taken_at
+    )
+
+
+async def save_report(phone_number, report_id, call_id, report_type, filename, file_path, file_size=None):
+    """Save report record"""
+    await get_async_repository().save_report(
+        phone_number, report_id, call_id, report_type, filename, file_path, file_size
+    )
+
+
+async def save_report_sections(phone_number, call_id, sections):
+    """Store the sections a report was built from (see db.save_report_sections)"""
+    await get_async_repository().save_report_sections(phone_number, call_id, sections)
+
+
+async def save_contact_memory(phone_number, contact_id, state, memory):
+    """Store a user's contact memory (see db.save_contact_memory)"""
+    await get_async_repository().save_contact_memory(phone_number, contact_id, state, memory)
+
+
+async def save_contact_metadata(contact_id, metadata, phone_number=None):
+    """Store metadata read from Pixpoc as the contact's synced copy"""
+    await get_async_repository().save_contact_metadata(contact_id, metadata, phone_number)
+
+
+async def queue_contact_metadata(contact_id, updates, phone_number=None):
+    """Apply metadata updates locally and queue them for the Pixpoc sync"""
+    await get_async_repository().queue_contact_metadata(contact_id, updates, phone_number)
+
+
+async def claim_contact_metadata_sync(contact_id, claimed_until):
+    """Claim a contact's queued updates until an ISO timestamp; None if already claimed"""
+    return await get_async_repository().claim_contact_metadata_sync(contact_id, claimed_until)
+
+
+async def complete_contact_metadata_sync(contact_id, metadata, last_update_id):
+    """Record a successful sync of the updates up to last_update_id"""
+    await get_async_repository().complete_contact_metadata_sync(contact_id, metadata, last_update_id)
+
+
+async def fail_contact_metadata_sync(contact_id, retry_at):
+    """Record a failed sync; the contact is retried after an ISO timestamp"""
+    await get_async_repository().fail_contact_metadata_sync(contact_id, retry_at)
+
+
+async def update_financial_data(phone_number, income, savings, expenses, data_dict, taken_at=None):
+    """Update user's financial data"""
+    await get_async_repository().update_financial_data(phone_number, income, savings, expenses, data_dict, taken_at)
+
+
+async def get_financial_history(phone_number, start=None, end=None):
+    """Get a user's financial snapshots between two ISO dates, oldest first"""
+    return await get_async_repository().get_financial_history(phone_number, start, end)
+
+
+async def rollup_snapshots(retention_days=None):
+    """Downsample old snapshots to monthly rollups (see db.rollup_snapshots)"""
+    return await get_async_repository().rollup_snapshots(retention_days)
+
+
+async def cohort_summary(by='income_band'):
+    """Per-cohort user counts, savings rate and net worth, computed in SQL"""
+    return await get_async_repository().cohort_summary(by)
+
+
+async def asset_allocation():
+    """Total and average holdings per asset category across all users"""
+    return await get_async_repository().asset_allocation()
+
+
+async def goal_summary():
+    """Most common goals with their average target amount and timeline"""
+    return await get_async_repository().goal_summary()
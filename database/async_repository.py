@@ -0,0 +1,427 @@
+"""
+Async Storage Repositories
+Native async counterparts of database/repository.py for FastAPI handlers:
+aiosqlite for SQLite and asyncpg for Postgres
+
+Queries and row shaping are shared with the sync repositories.
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+from database import financial_model
+from database.repository import (
+    SQL_CLAIM_CALL,
+    SQL_CLAIM_CONTACT_METADATA_SYNC,
+    SQL_COMPLETE_CONTACT_METADATA_SYNC,
+    SQL_COUNT_USER_REPORTS,
+    SQL_DELETE_CONTACT_METADATA_UPDATES,
+    SQL_FAIL_CONTACT_METADATA_SYNC,
+    SQL_INSERT_CONTACT,
+    SQL_INSERT_CONTACT_METADATA_UPDATE,
+    SQL_INSERT_REPORT,
+    SQL_INSERT_USER,
+    SQL_SELECT_CALL_BY_ID,
+    SQL_SELECT_CALL_BY_TRACKING_ID,
+    SQL_SELECT_CALL_PHONE,
+    SQL_SELECT_CONTACT_MEMORY,
+    SQL_SELECT_CONTACT_METADATA,
+    SQL_SELECT_CONTACT_METADATA_UPDATES,
+    SQL_SELECT_DUE_CONTACT_METADATA,
+    SQL_SELECT_REPORT_SECTIONS,
+    SQL_SELECT_REPORTS_SINCE,
+    SQL_UPSERT_CALL,
+    SQL_UPSERT_CONTACT_MEMORY,
+    SQL_UPSERT_CONTACT_METADATA,
+    SQL_UPSERT_REPORT_SECTION,
+    KnownUsers,
+    SQLiteRepository,
+    bulk_call_rows,
+    call_status_update,
+    claim_cutoff,
+    contact_memory_from_row,
+    contact_memory_row,
+    contact_metadata_from_rows,
+    is_postgres_url,
+    recent_calls_queries,
+    report_from_row,
+    report_section_rows,
+    report_sections_from_rows,
+    user_reports_query,
+)
+
+
+class AsyncRepository:
+    """
+    Async repository; subclasses provide `_execute`, `_fetchall` and `close`.
+
+    Method names and return shapes match the sync Repository.
+    """
+
+    async def _execute(self, sql, params=()):
+        """Execute a statement and return the affected row count"""
+        raise NotImplementedError
+
+    async def _fetchall(self, sql, params=()):
+        """Run a query and return rows as dicts"""
+        raise NotImplementedError
+
+    async def _execute_batch(self, statements):
+        """Execute (sql, params) statements in one transaction, returning row counts"""
+        raise NotImplementedError
+
+    async def _fetchone(self, sql, params=()):
+        rows = await self._fetchall(sql, params)
+        return rows[0] if rows else None
+
+    async def close(self):
+        """Release connections"""
+
+    async def ensure_user_exists(self, phone_number, name=None):
+        """Ensure user exists in database (known users skip the round trip)"""
+        if phone_number in self.known_users:
+            return
+
+        now = datetime.now().isoformat()
+        await self._execute(SQL_INSERT_USER, (phone_number, name or phone_number, now, now))
+        self.known_users.add(phone_number)
+
+    async def get_user_reports(self, phone_number, limit=None, offset=0, report_type=None):
+        """Get a user's reports, newest first (optionally one page / one type)"""
+        await self.ensure_user_exists(phone_number)
+        rows = await self._fetchall(*user_reports_query(phone_number, limit, offset, report_type))
+        return [report_from_row(row) for row in rows]
+
+    async def count_user_reports(self, phone_number):
+        """Get a user's report counts by type"""
+        rows = await self._fetchall(SQL_COUNT_USER_REPORTS, (phone_number,))
+        return {row['type'] or 'financial_planning': row['count'] for row in rows}
+
+    async def get_reports_since(self, since):
+        """Reports saved after a timestamp for all users, as (phone_number, report) pairs"""
+        rows = await self._fetchall(SQL_SELECT_REPORTS_SINCE, (since,))
+        return [(row['phone_number'], report_from_row(row)) for row in rows]
+
+    async def save_report(self, phone_number, report_id, call_id, report_type, filename, file_path, file_size=None):
+        """Save report record"""
+        await self.ensure_user_exists(phone_number)
+        inserted = await self._execute(SQL_INSERT_REPORT, (
+            report_id, phone_number, call_id, report_type, filename, file_path, file_size,
+            datetime.now().isoformat()
+        ))
+        if inserted:
+            print(f"✅ Report saved: {filename}")
+        else:
+            print(f"⚠️  Report already exists: {report_id}")
+
+    async def get_report_sections(self, phone_number):
+        """A user's latest report sections, keyed by section name"""
+        return report_sections_from_rows(await self._fetchall(SQL_SELECT_REPORT_SECTIONS, (phone_number,)))
+
+    async def save_report_sections(self, phone_number, call_id, sections):
+        """Store the sections a report was built from, replacing older ones"""
+        await self.ensure_user_exists(phone_number)
+        await self._execute_batch(
+            [(SQL_UPSERT_REPORT_SECTION, row) for row in report_section_rows(phone_number, call_id, sections)]
+        )
+
+    async def get_contact_memory(self, phone_number):
+        """A user's stored contact memory (state and rendered text), or None"""
+        return contact_memory_from_row(await self._fetchone(SQL_SELECT_CONTACT_MEMORY, (phone_number,)))
+
+    async def save_contact_memory(self, phone_number, contact_id, state, memory):
+        """Store a user's contact memory state and its rendered text"""
+        await self.ensure_user_exists(phone_number)
+        await self._execute(SQL_UPSERT_CONTACT_MEMORY, contact_memory_row(phone_number, contact_id, state, memory))
+
+    async def get_contact_metadata(self, contact_id):
+        """A contact's metadata with queued updates applied, or None if never stored"""
+        row = await self._fetchone(SQL_SELECT_CONTACT_METADATA, (contact_id,))
+        update_rows = await self._fetchall(SQL_SELECT_CONTACT_METADATA_UPDATES, (contact_id,))
+        return contact_metadata_from_rows(row, update_rows)
+
+    async def save_contact_metadata(self, contact_id, metadata, phone_number=None):
+        """Store metadata read from Pixpoc as the contact's synced copy"""
+        await self._execute(SQL_UPSERT_CONTACT_METADATA, (
+            contact_id, phone_number, json.dumps(metadata, default=str), datetime.now().isoformat()
+        ))
+
+    async def queue_contact_metadata(self, contact_id, updates, phone_number=None):
+        """Apply metadata updates locally and queue them for Pixpoc"""
+        await self._execute_batch([
+            (SQL_INSERT_CONTACT, (contact_id, phone_number)),
+            (SQL_INSERT_CONTACT_METADATA_UPDATE, (
+                contact_id, json.dumps(updates, default=str), datetime.now().isoformat()
+            )),
+        ])
+
+    async def due_contact_metadata(self, queued_before, limit=100):
+        """Unclaimed contacts with updates queued at or before `queued_before`"""
+        rows = await self._fetchall(SQL_SELECT_DUE_CONTACT_METADATA, (
+            datetime.now().isoformat(), queued_before, limit
+        ))
+        return [row['contact_id'] for row in rows]
+
+    async def claim_contact_metadata_sync(self, contact_id, claimed_until):
+        """Claim a contact's queued updates for one sync attempt (see Repository)"""
+        claimed = await self._execute(SQL_CLAIM_CONTACT_METADATA_SYNC, (
+            claimed_until, contact_id, datetime.now().isoformat()
+        ))
+        return await self.get_contact_metadata(contact_id) if claimed else None
+
+    async def complete_contact_metadata_sync(self, contact_id, metadata, last_update_id):
+        """Record a successful sync: new synced copy, sent updates dequeued"""
+        await self._execute_batch([
+            (SQL_COMPLETE_CONTACT_METADATA_SYNC, (
+                json.dumps(metadata, default=str), datetime.now().isoformat(), contact_id
+            )),
+            (SQL_DELETE_CONTACT_METADATA_UPDATES, (contact_id, last_update_id)),
+        ])
+
+    async def fail_contact_metadata_sync(self, contact_id, retry_at):
+        """Record a failed sync; the contact is due again after `retry_at`"""
+        await self._execute(SQL_FAIL_CONTACT_METADATA_SYNC, (retry_at, contact_id))
+
+    async def get_user_financial_data(self, phone_number, fields=None):
+        """Get user's financial summary (only the requested fields are read)"""
+        fields = financial_model.resolve_fields(fields)
+        await self.ensure_user_exists(phone_number)
+        results = {
+            key: await self._fetchall(sql, params)
+            for key, sql, params in financial_model.financial_data_reads(phone_number, fields)
+        }
+        return financial_model.financial_data_from_results(fields, results)
+
+    async def update_financial_data(self, phone_number, income, savings, expenses, data_dict, taken_at=None):
+        """Update user's financial data, its assets/liabilities/goals rows and snapshot (see Repository)"""
+        await self.ensure_user_exists(phone_number)
+        await self._execute_batch(financial_model.financial_data_writes(
+            phone_number, income, savings, expenses, data_dict, financial_model.snapshot_time(taken_at)
+        ))
+        print(f"✅ Financial data updated for {phone_number}")
+
+    async def get_financial_history(self, phone_number, start=None, end=None):
+        """Snapshot history for trend charts, oldest first (see Repository)"""
+        return await self._fetchall(*financial_model.history_query(phone_number, start, end))
+
+    async def rollup_snapshots(self, retention_days=None):
+        """Downsample old raw snapshots into monthly rollups (see Repository)"""
+        if retention_days is None:
+            retention_days = financial_model.SNAPSHOT_RAW_RETENTION_DAYS
+        cutoff = financial_model.rollup_cutoff(retention_days=retention_days)
+        counts = await self._execute_batch(financial_model.rollup_statements(cutoff))
+        return counts[-1]
+
+    async def cohort_summary(self, by='income_band'):
+        """User counts, average savings rate and net worth per cohort"""
+        return await self._fetchall(financial_model.cohort_query(by))
+
+    async def asset_allocation(self):
+        """Total and average holdings per asset category across users"""
+        return await self._fetchall(financial_model.SQL_ASSET_ALLOCATION)
+
+    async def goal_summary(self):
+        """How many users share each goal and its average target"""
+        return await self._fetchall(financial_model.SQL_GOAL_SUMMARY)
+
+    async def save_call(self, phone_number, call_id, contact_id=None, tracking_id=None, campaign_id=None):
+        """Save call record with full Pixpoc response data"""
+        await self.ensure_user_exists(phone_number)
+        await self._execute(SQL_UPSERT_CALL, (
+            phone_number, call_id, tracking_id, contact_id, campaign_id, 'initiated', datetime.now().isoformat()
+        ))
+        print(f"✅ Call saved: {call_id} (tracking: {tracking_id})")
+
+    async def save_calls(self, calls):
+        """Save many call records (and their users) in one transaction"""
+        user_rows, call_rows = bulk_call_rows(calls, self.known_users)
+        await self._execute_batch(
+            [(SQL_INSERT_USER, row) for row in user_rows] + [(SQL_UPSERT_CALL, row) for row in call_rows]
+        )
+        self.known_users.add(*(row[0] for row in user_rows))
+        print(f"✅ Saved {len(call_rows)} calls")
+
+    async def recently_called_numbers(self, phone_numbers, since):
+        """Subset of phone_numbers with a call created at or after `since`"""
+        recent = set()
+        for sql, params in recent_calls_queries(phone_numbers, since):
+            recent.update(row['phone_number'] for row in await self._fetchall(sql, params))
+        return recent
+
+    async def update_call_status(self, call_id, status, contact_id=None):
+        """Update call status"""
+        await self._execute(*call_status_update(call_id, status, contact_id))
+
+    async def record_report(self, call_id, status, phone_number, report_id, report_type, filename, file_path, file_size=None,
+                            financial_data=None, taken_at=None):
+        """Set call status, upsert user, insert report and store financial data in one transaction"""
+        now = datetime.now().isoformat()
+        statements = [
+            call_status_update(call_id, status),
+            (SQL_INSERT_USER, (phone_number, phone_number, now, now)),
+            (SQL_INSERT_REPORT, (report_id, phone_number, call_id, report_type, filename, file_path, file_size, now)),
+        ]
+        if financial_data:
+            statements += financial_model.financial_data_writes(
+                phone_number, *financial_data, financial_model.snapshot_time(taken_at)
+            )
+        counts = await self._execute_batch(statements)
+        self.known_users.add(phone_number)
+        if counts[2]:
+            print(f"✅ Report saved: {filename}")
+        else:
+            print(f"⚠️  Report already exists: {report_id}")
+
+    async def claim_call_for_processing(self, call_id):
+        """Atomically claim a call for report processing (see Repository)"""
+        now, stale_before = claim_cutoff()
+        return await self._execute(SQL_CLAIM_CALL, (now, call_id, stale_before)) == 1
+
+    async def get_call_phone_number(self, call_id):
+        """Get phone number associated with a call"""
+        row = await self._fetchone(SQL_SELECT_CALL_PHONE, (call_id,))
+        return row['phone_number'] if row else None
+
+    async def get_call_by_tracking_id(self, tracking_id):
+        """Get call details by tracking ID (callSid)"""
+        return await self._fetchone(SQL_SELECT_CALL_BY_TRACKING_ID, (tracking_id,))
+
+    async def get_call_by_id(self, call_id):
+        """Get call details by call ID"""
+        return await self._fetchone(SQL_SELECT_CALL_BY_ID, (call_id,))
+
+
+class AsyncSQLiteRepository(AsyncRepository):
+    """
+    aiosqlite repository.
+
+    One connection per event loop; a lock keeps each statement (and its
+    commit) from interleaving with another coroutine's.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.known_users = KnownUsers()
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def _connection(self):
+        async with self._lock:
+            if self._conn is None:
+                import aiosqlite
+
+                # Schema creation and WAL setup are shared with the sync backend
+                await asyncio.to_thread(SQLiteRepository(self.db_path)._ensure_ready)
+                self._conn = await aiosqlite.connect(str(self.db_path), timeout=10.0)
+                await self._conn.execute('PRAGMA busy_timeout = 10000')
+                await self._conn.execute('PRAGMA synchronous = NORMAL')
+            try:
+                yield self._conn
+                await self._conn.commit()
+            except Exception:
+                await self._conn.rollback()
+                raise
+
+    async def _execute(self, sql, params=()):
+        async with self._connection() as conn:
+            cursor = await conn.execute(sql, params)
+            rowcount = cursor.rowcount
+            await cursor.close()
+            return rowcount
+
+    async def _execute_batch(self, statements):
+        async with self._connection() as conn:
+            counts = []
+            for sql, params in statements:
+                cursor = await conn.execute(sql, params)
+                counts.append(cursor.rowcount)
+                await cursor.close()
+            return counts
+
+    async def _fetchall(self, sql, params=()):
+        async with self._connection() as conn:
+            cursor = await conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return [dict(zip(columns, row)) for row in rows]
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+class AsyncPostgresRepository(AsyncRepository):
+    """asyncpg repository over a connection pool"""
+
+    def __init__(self, dsn, min_size=1, max_size=10):
+        self.dsn = dsn
+        self.known_users = KnownUsers()
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    import asyncpg
+
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn, min_size=self.min_size, max_size=self.max_size
+                    )
+        return self._pool
+
+    @staticmethod
+    def _sql(sql):
+        """Translate `?` placeholders to asyncpg's $1, $2, ..."""
+        parts = sql.split('?')
+        return ''.join(f'{part}${i}' for i, part in enumerate(parts[:-1], 1)) + parts[-1]
+
+    async def _execute(self, sql, params=()):
+        pool = await self._get_pool()
+        status = await pool.execute(self._sql(sql), *params)
+        # asyncpg returns the command tag, e.g. "UPDATE 1" / "INSERT 0 1"
+        return int(status.rsplit(' ', 1)[-1])
+
+    async def _execute_batch(self, statements):
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            return [
+                int((await conn.execute(self._sql(sql), *params)).rsplit(' ', 1)[-1])
+                for sql, params in statements
+            ]
+
+    async def _fetchall(self, sql, params=()):
+        pool = await self._get_pool()
+        rows = await pool.fetch(self._sql(sql), *params)
+        return [dict(row) for row in rows]
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def create_async_repository(database_url=None, db_path=None):
+    """
+    Build the async repository selected by configuration.
+
+    Args:
+        database_url: postgres:// URL selects asyncpg (default: DATABASE_URL)
+        db_path: SQLite file used otherwise (default: DATABASE_PATH)
+    """
+    database_url = database_url if database_url is not None else os.getenv("DATABASE_URL", "")
+    if is_postgres_url(database_url):
+        return AsyncPostgresRepository(database_url, max_size=int(os.getenv("DATABASE_POOL_SIZE", "10")))
+
+    if db_path is None:
+        db_path = os.getenv("DATABASE_PATH") or Path(__file__).parent / "financebot.db"
+    return AsyncSQLiteRepository(db_path)
@@ -1,188 +1,168 @@
 """
-SQLite Database Management
+Database Management
 Simple database for storing users, calls, reports, and financial data
+
+The functions here are the public API used across the app. They delegate to a
+storage repository (see database/repository.py): SQLite by default, or
+Postgres when DATABASE_URL is a postgres:// URL.
 """
 
-import sqlite3
-import json
 import os
+import threading
 from pathlib import Path
-from datetime import datetime
 
-# Database path - use environment variable if set, otherwise default
+from database.repository import CALL_CLAIM_TIMEOUT_SECONDS, GroupCommitWriter, create_repository, is_postgres_url
+
+# Database path - use environment variable if set, otherwise default.
+# Nothing touches the filesystem until the first query.
 DB_PATH_ENV = os.getenv("DATABASE_PATH")
 if DB_PATH_ENV:
     DB_PATH = Path(DB_PATH_ENV)
-    # Ensure parent directory exists
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 else:
     DB_PATH = Path(__file__).parent / "financebot.db"
-    # Ensure directory exists
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+# Batch writes from concurrent jobs into shared commits (see GroupCommitWriter)
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "0") == "1"
+DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", "64"))
+DB_GROUP_COMMIT_DELAY_MS = float(os.getenv("DB_GROUP_COMMIT_DELAY_MS", "5"))
+
+_repository = None
+_repository_lock = threading.Lock()
+_writer = None
+_writer_pid = None
+
+
+def get_repository():
+    """Get the process-wide repository for the configured backend"""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = create_repository(DATABASE_URL, DB_PATH)
+    return _repository
+
+
+def get_writer():
+    """Get this process's group-commit writer, started on first use"""
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        repository = get_repository()
+        with _repository_lock:
+            if _writer is None or _writer_pid != os.getpid():
+                _writer = GroupCommitWriter(
+                    repository,
+                    max_batch=DB_GROUP_COMMIT_MAX_BATCH,
+                    max_delay=DB_GROUP_COMMIT_DELAY_MS / 1000
+                )
+                _writer_pid = os.getpid()
+    return _writer
+
+
+def _write(method, *args, **kwargs):
+    """Run a repository write method, through the group-commit writer if enabled"""
+    repository = get_repository()
+    if DB_GROUP_COMMIT and not repository.in_transaction():
+        job = lambda repository: getattr(repository, method)(*args, **kwargs)
+        return get_writer().submit(job).result()
+    return getattr(repository, method)(*args, **kwargs)
+
+
+def transaction():
+    """
+    Unit of work for the calling thread.
+
+    Usage:
+        with transaction():
+            update_call_status(call_id, "completed")
+            save_report(...)
+    """
+    return get_repository().transaction()
 
-def get_connection():
-    """Get database connection"""
-    # Ensure directory exists and is writable
-    try:
-        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        # Try to create parent directory with write permissions
-        import stat
-        os.chmod(DB_PATH.parent, stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)
-    except Exception:
-        pass  # Continue even if chmod fails
-    
-    return sqlite3.connect(str(DB_PATH), timeout=10.0)
+
+def backend_name():
+    """Name of the configured storage backend"""
+    return "postgres" if is_postgres_url(DATABASE_URL) else "sqlite"
 
 
 def init_db():
     """Initialize database with tables"""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    # Users table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            phone_number TEXT PRIMARY KEY,
-            name TEXT,
-            email TEXT,
-            created_at TEXT,
-            last_login TEXT
-        )
-    ''')
-    
-    # Calls table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS calls (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            phone_number TEXT,
-            call_id TEXT UNIQUE,
-            tracking_id TEXT UNIQUE,
-            contact_id TEXT,
-            campaign_id TEXT,
-            status TEXT DEFAULT 'initiated',
-            created_at TEXT,
-            completed_at TEXT,
-            FOREIGN KEY (phone_number) REFERENCES users (phone_number)
-        )
-    ''')
-    
-    # Reports table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS reports (
-            id TEXT PRIMARY KEY,
-            phone_number TEXT,
-            call_id TEXT,
-            type TEXT,
-            filename TEXT,
-            file_path TEXT,
-            created_at TEXT,
-            FOREIGN KEY (phone_number) REFERENCES users (phone_number),
-            FOREIGN KEY (call_id) REFERENCES calls (call_id)
-        )
-    ''')
-    
-    # Financial data table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS user_financial_data (
-            phone_number TEXT PRIMARY KEY,
-            income REAL DEFAULT 0,
-            savings REAL DEFAULT 0,
-            expenses REAL DEFAULT 0,
-            data_json TEXT,
-            updated_at TEXT,
-            FOREIGN KEY (phone_number) REFERENCES users (phone_number)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    get_repository().create_tables()
     print("✅ Database initialized successfully")
 
 
 def ensure_user_exists(phone_number, name=None):
     """Ensure user exists in database"""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('SELECT phone_number FROM users WHERE phone_number = ?', (phone_number,))
-    if not c.fetchone():
-        c.execute('''
-            INSERT INTO users (phone_number, name, created_at, last_login)
-            VALUES (?, ?, ?, ?)
-        ''', (phone_number, name or phone_number, datetime.now().isoformat(), datetime.now().isoformat()))
-        conn.commit()
-    
-    conn.close()
-
-
-def get_user_reports(phone_number):
-    """Get all reports for a user"""
-    ensure_user_exists(phone_number)
-    
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT id, type, filename, file_path, created_at 
-        FROM reports 
-        WHERE phone_number = ?
-        ORDER BY created_at DESC
-    ''', (phone_number,))
-    
-    reports = []
-    for row in c.fetchall():
-        report_type = row[1] or 'financial_planning'
-        reports.append({
-            'id': row[0],
-            'type': report_type,
-            'filename': row[2],
-            'path': row[3],
-            'date': row[4],
-            'title': f"{report_type.replace('_', ' ').title()} Report"
-        })
-    
-    conn.close()
-    return reports
-
-
-def get_user_financial_data(phone_number):
-    """Get user's financial summary"""
-    ensure_user_exists(phone_number)
-    
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT income, savings, expenses, data_json
-        FROM user_financial_data
-        WHERE phone_number = ?
-    ''', (phone_number,))
-    
-    row = c.fetchone()
-    conn.close()
-    
-    if row and row[0] is not None:
-        return {
-            'income': float(row[0]) if row[0] else 75000,
-            'savings': float(row[1]) if row[1] else 25000,
-            'expenses': float(row[2]) if row[2] else 50000,
-            'data': json.loads(row[3]) if row[3] else {}
-        }
-    
-    # Return default dummy data if no data exists
-    return {
-        'income': 75000,
-        'savings': 25000,
-        'expenses': 50000,
-        'data': {}
-    }
+    get_repository().ensure_user_exists(phone_number, name)
+
+
+def get_user_reports(phone_number, limit=None, offset=0, report_type=None):
+    """
+    Get a user's reports, newest first.
+
+    Args:
+        phone_number: User's phone number
+        limit: Page size (default: all reports)
+        offset: Reports to skip
+        report_type: Only reports of this type
+    """
+    return get_repository().get_user_reports(phone_number, limit, offset, report_type)
+
+
+def count_user_reports(phone_number):
+    """Get a user's report counts by type"""
+    return get_repository().count_user_reports(phone_number)
+
+
+def get_reports_since(since):
+    """Reports saved after an ISO timestamp for all users, as (phone_number, report) pairs"""
+    return get_repository().get_reports_since(since)
+
+
+def get_report_sections(phone_number):
+    """A user's latest report sections, keyed by section name"""
+    return get_repository().get_report_sections(phone_number)
+
+
+def get_contact_memory(phone_number):
+    """A user's stored contact memory (state and rendered text), or None"""
+    return get_repository().get_contact_memory(phone_number)
+
+
+def get_contact_metadata(contact_id):
+    """
+    A Pixpoc contact's metadata as stored locally, with updates not yet
+    synced applied, or None if the contact was never stored.
+
+    Returns:
+        Dict with metadata, updates (queued, not yet synced), pending count
+        and sync state (see repository.contact_metadata_from_rows)
+    """
+    return get_repository().get_contact_metadata(contact_id)
+
+
+def due_contact_metadata(queued_before, limit=100):
+    """Contacts with updates queued at or before an ISO timestamp and no live claim"""
+    return get_repository().due_contact_metadata(queued_before, limit)
+
+
+def get_user_financial_data(phone_number, fields=None):
+    """
+    Get user's financial summary.
+
+    Args:
+        phone_number: User's phone number
+        fields: Fields to load, e.g. ('income', 'net_worth', 'goals'); only
+            those are queried and parsed (default: income, savings, expenses, data)
+    """
+    return get_repository().get_user_financial_data(phone_number, fields)
 
 
 def save_call(phone_number, call_id, contact_id=None, tracking_id=None, campaign_id=None):
     """
     Save call record with full Pixpoc response data.
-    
+
     Args:
         phone_number: User's phone number
         call_id: Pixpoc call UUID
@@ -190,170 +170,170 @@ def save_call(phone_number, call_id, contact_id=None, tracking_id=None, campaign
         tracking_id: Pixpoc tracking ID (callSid) - used for callbacks
         campaign_id: Pixpoc campaign ID
     """
-    ensure_user_exists(phone_number)
-    
-    conn = get_connection()
-    c = conn.cursor()
-    
-    try:
-        c.execute('''
-            INSERT INTO calls (phone_number, call_id, tracking_id, contact_id, campaign_id, status, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (phone_number, call_id, tracking_id, contact_id, campaign_id, 'initiated', datetime.now().isoformat()))
-        conn.commit()
-        print(f"✅ Call saved: {call_id} (tracking: {tracking_id})")
-    except sqlite3.IntegrityError:
-        # Call already exists, update with new data
-        c.execute('''
-            UPDATE calls 
-            SET tracking_id = ?, contact_id = ?, campaign_id = ?
-            WHERE call_id = ?
-        ''', (tracking_id, contact_id, campaign_id, call_id))
-        conn.commit()
-        print(f"✅ Call updated: {call_id}")
-    
-    conn.close()
+    _write('save_call', phone_number, call_id, contact_id, tracking_id, campaign_id)
+
+
+def save_calls(calls):
+    """
+    Save many call records in one transaction (bulk campaigns).
+
+    Args:
+        calls: Dicts with phone_number, call_id and optional contact_id,
+            tracking_id, campaign_id
+    """
+    _write('save_calls', calls)
+
+
+def recently_called_numbers(phone_numbers, since):
+    """
+    Which of these numbers already have a call created at or after `since`.
+
+    Returns:
+        Set of phone numbers
+    """
+    return get_repository().recently_called_numbers(phone_numbers, since)
 
 
 def update_call_status(call_id, status, contact_id=None):
     """Update call status"""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    if contact_id:
-        c.execute('''
-            UPDATE calls 
-            SET status = ?, completed_at = ?, contact_id = ?
-            WHERE call_id = ?
-        ''', (status, datetime.now().isoformat(), contact_id, call_id))
-    else:
-        c.execute('''
-            UPDATE calls 
-            SET status = ?, completed_at = ?
-            WHERE call_id = ?
-        ''', (status, datetime.now().isoformat(), call_id))
-    
-    conn.commit()
-    conn.close()
+    _write('update_call_status', call_id, status, contact_id)
+
+
+def claim_call_for_processing(call_id):
+    """
+    Atomically claim a call for report processing.
+
+    Returns:
+        True if this caller now owns the call, False if another delivery or
+        worker already claimed it (see CALL_CLAIM_TIMEOUT_SECONDS)
+    """
+    return get_repository().claim_call_for_processing(call_id)
 
 
 def get_call_phone_number(call_id):
     """Get phone number associated with a call"""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('SELECT phone_number FROM calls WHERE call_id = ?', (call_id,))
-    row = c.fetchone()
-    conn.close()
-    
-    return row[0] if row else None
+    return get_repository().get_call_phone_number(call_id)
 
 
 def get_call_by_tracking_id(tracking_id):
     """
     Get call details by tracking ID (callSid).
     This is used when Pixpoc sends callbacks with tracking_id.
-    
+
     Returns:
         dict with call_id, phone_number, contact_id, etc. or None
     """
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT call_id, phone_number, contact_id, campaign_id, status, tracking_id
-        FROM calls 
-        WHERE tracking_id = ?
-    ''', (tracking_id,))
-    
-    row = c.fetchone()
-    conn.close()
-    
-    if row:
-        return {
-            'call_id': row[0],
-            'phone_number': row[1],
-            'contact_id': row[2],
-            'campaign_id': row[3],
-            'status': row[4],
-            'tracking_id': row[5]
-        }
-    return None
+    return get_repository().get_call_by_tracking_id(tracking_id)
 
 
 def get_call_by_id(call_id):
     """
     Get call details by call ID.
-    
+
     Returns:
         dict with call details or None
     """
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT call_id, phone_number, contact_id, campaign_id, status, tracking_id
-        FROM calls 
-        WHERE call_id = ?
-    ''', (call_id,))
-    
-    row = c.fetchone()
-    conn.close()
-    
-    if row:
-        return {
-            'call_id': row[0],
-            'phone_number': row[1],
-            'contact_id': row[2],
-            'campaign_id': row[3],
-            'status': row[4],
-            'tracking_id': row[5]
-        }
-    return None
-
-
-def save_report(phone_number, report_id, call_id, report_type, filename, file_path):
+    return get_repository().get_call_by_id(call_id)
+
+
+def record_report(call_id, status, phone_number, report_id, report_type, filename, file_path, file_size=None,
+                  financial_data=None, taken_at=None):
+    """
+    Set a call's final status, upsert its user, save its report row and
+    store its financial figures (update_financial_data arguments) in one
+    transaction.
+    """
+    _write('record_report', call_id, status, phone_number, report_id, report_type, filename, file_path, file_size,
+           financial_data, taken_at)
+
+
+def save_report(phone_number, report_id, call_id, report_type, filename, file_path, file_size=None):
     """Save report record"""
-    ensure_user_exists(phone_number)
-    
-    conn = get_connection()
-    c = conn.cursor()
-    
-    try:
-        c.execute('''
-            INSERT INTO reports (id, phone_number, call_id, type, filename, file_path, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (report_id, phone_number, call_id, report_type, filename, file_path, 
-              datetime.now().isoformat()))
-        conn.commit()
-        print(f"✅ Report saved: {filename}")
-    except sqlite3.IntegrityError as e:
-        print(f"⚠️  Report already exists: {report_id}")
-    
-    conn.close()
-
-
-def update_financial_data(phone_number, income, savings, expenses, data_dict):
+    _write('save_report', phone_number, report_id, call_id, report_type, filename, file_path, file_size)
+
+
+def save_report_sections(phone_number, call_id, sections):
+    """Store the sections a report was built from (see finance_bot/report_sections.py)"""
+    _write('save_report_sections', phone_number, call_id, sections)
+
+
+def save_contact_memory(phone_number, contact_id, state, memory):
+    """Store a user's contact memory (see services/contact_memory.py)"""
+    _write('save_contact_memory', phone_number, contact_id, state, memory)
+
+
+def save_contact_metadata(contact_id, metadata, phone_number=None):
+    """Store metadata read from Pixpoc as the contact's synced copy"""
+    _write('save_contact_metadata', contact_id, metadata, phone_number)
+
+
+def queue_contact_metadata(contact_id, updates, phone_number=None):
+    """Apply metadata updates locally and queue them for the Pixpoc sync"""
+    _write('queue_contact_metadata', contact_id, updates, phone_number)
+
+
+def claim_contact_metadata_sync(contact_id, claimed_until):
+    """Claim a contact's queued updates until an ISO timestamp; None if already claimed"""
+    return _write('claim_contact_metadata_sync', contact_id, claimed_until)
+
+
+def complete_contact_metadata_sync(contact_id, metadata, last_update_id):
+    """Record a successful sync of the updates up to last_update_id"""
+    _write('complete_contact_metadata_sync', contact_id, metadata, last_update_id)
+
+
+def fail_contact_metadata_sync(contact_id, retry_at):
+    """Record a failed sync; the contact is retried after an ISO timestamp"""
+    _write('fail_contact_metadata_sync', contact_id, retry_at)
+
+
+def update_financial_data(phone_number, income, savings, expenses, data_dict, taken_at=None):
     """Update user's financial data"""
-    ensure_user_exists(phone_number)
-    
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute('''
-        INSERT OR REPLACE INTO user_financial_data 
-        (phone_number, income, savings, expenses, data_json, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (phone_number, float(income), float(savings), float(expenses), 
-          json.dumps(data_dict), datetime.now().isoformat()))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ Financial data updated for {phone_number}")
-
-
-# Initialize database on import
-if not DB_PATH.exists():
-    print("📦 Creating database...")
-    init_db()
+    _write('update_financial_data', phone_number, income, savings, expenses, data_dict, taken_at)
+
+
+def get_financial_history(phone_number, start=None, end=None):
+    """
+    Get a user's financial snapshots between two ISO dates, oldest first.
+
+    Args:
+        phone_number: User's phone number
+        start: Inclusive start, e.g. '2024-01-01' (default: all history)
+        end: Exclusive end (default: up to now)
+
+    Returns:
+        List of dicts with taken_at, samples, income, savings, expenses,
+        total_assets, total_liabilities and net_worth
+    """
+    return get_repository().get_financial_history(phone_number, start, end)
+
+
+def rollup_snapshots(retention_days=None):
+    """
+    Downsample snapshots older than SNAPSHOT_RAW_RETENTION_DAYS to one row
+    per user per month.
+
+    Returns:
+        Number of raw snapshots rolled up
+    """
+    return _write('rollup_snapshots', retention_days)
+
+
+def cohort_summary(by='income_band'):
+    """
+    Per-cohort user counts, average savings rate and net worth, computed in SQL.
+
+    Args:
+        by: 'income_band' or 'risk_profile'
+    """
+    return get_repository().cohort_summary(by)
+
+
+def asset_allocation():
+    """Total and average holdings per asset category across all users"""
+    return get_repository().asset_allocation()
+
 
+def goal_summary():
+    """Most common goals with their average target amount and timeline"""
+    return get_repository().goal_summary()
@@ -0,0 +1,674 @@
+"""
+Structured Financial Model
+Assets, liabilities, goals and snapshots stored as queryable rows
+
+update_financial_data still keeps the raw data_json for the agents, but the
+parts dashboards and analytics need are split into typed columns and child
+tables so they can be filtered and aggregated in SQL. The loader only reads
+(and only parses) the fields a caller asks for.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+# Tables added on top of the core schema; {without_rowid} is SQLite-only
+TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS financial_assets (
+        phone_number TEXT NOT NULL,
+        category TEXT NOT NULL,
+        value REAL NOT NULL DEFAULT 0,
+        updated_at TEXT,
+        PRIMARY KEY (phone_number, category),
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS financial_liabilities (
+        phone_number TEXT NOT NULL,
+        category TEXT NOT NULL,
+        outstanding REAL NOT NULL DEFAULT 0,
+        updated_at TEXT,
+        PRIMARY KEY (phone_number, category),
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS financial_goals (
+        phone_number TEXT NOT NULL,
+        name TEXT NOT NULL,
+        target_amount REAL,
+        timeline_years REAL,
+        priority TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (phone_number, name),
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS financial_snapshots (
+        phone_number TEXT NOT NULL,
+        taken_at TEXT NOT NULL,
+        income REAL,
+        savings REAL,
+        expenses REAL,
+        total_assets REAL,
+        total_liabilities REAL,
+        net_worth REAL,
+        PRIMARY KEY (phone_number, taken_at)
+    ){without_rowid}
+    ''',
+    # Raw snapshots older than SNAPSHOT_RAW_RETENTION_DAYS, downsampled to one
+    # row per user per month; values are as of the month's last snapshot
+    '''
+    CREATE TABLE IF NOT EXISTS financial_snapshot_rollups (
+        phone_number TEXT NOT NULL,
+        month TEXT NOT NULL,
+        samples INTEGER NOT NULL,
+        taken_at TEXT NOT NULL,
+        income REAL,
+        savings REAL,
+        expenses REAL,
+        total_assets REAL,
+        total_liabilities REAL,
+        net_worth REAL,
+        min_net_worth REAL,
+        max_net_worth REAL,
+        PRIMARY KEY (phone_number, month)
+    ){without_rowid}
+    ''',
+]
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_financial_data_risk_profile ON user_financial_data (risk_profile)',
+    'CREATE INDEX IF NOT EXISTS idx_financial_data_income ON user_financial_data (income)',
+    'CREATE INDEX IF NOT EXISTS idx_financial_assets_category ON financial_assets (category)',
+    'CREATE INDEX IF NOT EXISTS idx_financial_liabilities_category ON financial_liabilities (category)',
+    'CREATE INDEX IF NOT EXISTS idx_financial_goals_name ON financial_goals (name)',
+]
+
+COLUMN_MIGRATIONS = {
+    'user_financial_data': {
+        'total_assets': 'REAL DEFAULT 0',
+        'total_liabilities': 'REAL DEFAULT 0',
+        'net_worth': 'REAL DEFAULT 0',
+        'risk_profile': 'TEXT',
+    },
+}
+
+# Raw snapshots are kept this long before rollup_snapshots downsamples them
+SNAPSHOT_RAW_RETENTION_DAYS = int(os.getenv("SNAPSHOT_RAW_RETENTION_DAYS", "90"))
+
+# Fields get_user_financial_data can return
+SUMMARY_FIELDS = ('income', 'savings', 'expenses', 'total_assets', 'total_liabilities', 'net_worth', 'risk_profile')
+DETAIL_FIELDS = ('assets', 'liabilities', 'goals')
+ALL_FIELDS = SUMMARY_FIELDS + DETAIL_FIELDS + ('data',)
+# What callers got before the structured model existed
+DEFAULT_FIELDS = ('income', 'savings', 'expenses', 'data')
+
+# Analysis metadata keys for each figure, first present wins (assets and
+# liabilities sum every key)
+ANALYSIS_KEYS = {
+    'income': ('monthly_income', 'income', 'monthly_salary'),
+    'expenses': ('monthly_expenses', 'expenses'),
+    'savings': ('monthly_savings',),
+    'cash': ('current_savings', 'savings_balance'),
+    'assets': ('assets', 'investments'),
+    'liabilities': ('liabilities', 'loans', 'debts'),
+    'risk_profile': ('risk_profile', 'risk_appetite', 'risk_tolerance'),
+}
+
+# Demo values shown until a user's first report
+DEFAULT_FINANCIAL_DATA = {
+    'income': 75000,
+    'savings': 25000,
+    'expenses': 50000,
+    'total_assets': 0.0,
+    'total_liabilities': 0.0,
+    'net_worth': 0.0,
+    'risk_profile': None,
+    'assets': [],
+    'liabilities': [],
+    'goals': [],
+    'data': {},
+}
+
+# Figures a call didn't give (NULL) keep their stored values; savings are
+# re-derived from the merged income and expenses unless given. A call older
+# than the stored row (late or retried callback) leaves it alone.
+SQL_UPSERT_FINANCIAL_DATA = '''
+    INSERT INTO user_financial_data
+    (phone_number, income, savings, expenses, risk_profile, data_json, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (phone_number) DO UPDATE SET
+        income = COALESCE(excluded.income, user_financial_data.income),
+        savings = COALESCE(
+            excluded.savings,
+            COALESCE(excluded.income, user_financial_data.income)
+                - COALESCE(excluded.expenses, user_financial_data.expenses),
+            user_financial_data.savings
+        ),
+        expenses = COALESCE(excluded.expenses, user_financial_data.expenses),
+        risk_profile = COALESCE(excluded.risk_profile, user_financial_data.risk_profile),
+        data_json = excluded.data_json,
+        updated_at = excluded.updated_at
+    WHERE user_financial_data.updated_at IS NULL
+       OR excluded.updated_at >= user_financial_data.updated_at
+'''
+
+# True when the upsert above took this write (params: phone_number, updated_at);
+# guards the statements that follow it
+SQL_IS_CURRENT = 'EXISTS (SELECT 1 FROM user_financial_data WHERE phone_number = ? AND updated_at = ?)'
+
+# Totals over the stored rows, so sections a call didn't give still count
+SQL_UPDATE_FINANCIAL_TOTALS = '''
+    UPDATE user_financial_data SET
+        total_assets = (SELECT COALESCE(SUM(value), 0) FROM financial_assets WHERE phone_number = ?),
+        total_liabilities = (SELECT COALESCE(SUM(outstanding), 0) FROM financial_liabilities WHERE phone_number = ?),
+        net_worth = (SELECT COALESCE(SUM(value), 0) FROM financial_assets WHERE phone_number = ?)
+                  - (SELECT COALESCE(SUM(outstanding), 0) FROM financial_liabilities WHERE phone_number = ?)
+    WHERE phone_number = ? AND updated_at = ?
+'''
+
+# Snapshot of the merged row, when this write is the current one
+SQL_INSERT_SNAPSHOT = '''
+    INSERT INTO financial_snapshots
+    (phone_number, taken_at, income, savings, expenses, total_assets, total_liabilities, net_worth)
+    SELECT phone_number, ?, income, savings, expenses, total_assets, total_liabilities, net_worth
+    FROM user_financial_data
+    WHERE phone_number = ? AND updated_at = ?
+    ON CONFLICT (phone_number, taken_at) DO NOTHING
+'''
+
+# Snapshot of an older call's own figures; the current row is left alone
+SQL_INSERT_STALE_SNAPSHOT = f'''
+    INSERT INTO financial_snapshots
+    (phone_number, taken_at, income, savings, expenses, total_assets, total_liabilities, net_worth)
+    SELECT ?, ?, CAST(? AS REAL), CAST(? AS REAL), CAST(? AS REAL),
+           CAST(? AS REAL), CAST(? AS REAL), CAST(? AS REAL)
+    WHERE NOT {SQL_IS_CURRENT}
+    ON CONFLICT (phone_number, taken_at) DO NOTHING
+'''
+
+# Child table per section: (table, value column)
+SECTION_TABLES = {
+    'assets': ('financial_assets', 'value'),
+    'liabilities': ('financial_liabilities', 'outstanding'),
+}
+
+SQL_SELECT_DETAILS = {
+    'assets': 'SELECT category, value FROM financial_assets WHERE phone_number = ? ORDER BY value DESC',
+    'liabilities': 'SELECT category, outstanding FROM financial_liabilities WHERE phone_number = ? ORDER BY outstanding DESC',
+    'goals': '''
+        SELECT name, target_amount, timeline_years, priority
+        FROM financial_goals
+        WHERE phone_number = ?
+        ORDER BY timeline_years
+    ''',
+}
+
+# Cohort keys for cohort_summary(); expressions over user_financial_data
+COHORT_KEYS = {
+    'risk_profile': "COALESCE(risk_profile, 'unknown')",
+    'income_band': '''
+        CASE
+            WHEN income < 50000 THEN 'under_50k'
+            WHEN income < 100000 THEN '50k_to_100k'
+            WHEN income < 200000 THEN '100k_to_200k'
+            ELSE '200k_plus'
+        END
+    ''',
+}
+
+SQL_COHORT_SUMMARY = '''
+    SELECT {key} AS cohort,
+           COUNT(*) AS users,
+           AVG(income) AS avg_income,
+           AVG(savings) AS avg_savings,
+           AVG(CASE WHEN income > 0 THEN savings * 100.0 / income END) AS avg_savings_rate,
+           AVG(net_worth) AS avg_net_worth,
+           SUM(net_worth) AS total_net_worth
+    FROM user_financial_data
+    GROUP BY 1
+    ORDER BY 1
+'''
+
+SQL_ASSET_ALLOCATION = '''
+    SELECT category,
+           COUNT(*) AS users,
+           SUM(value) AS total_value,
+           AVG(value) AS avg_value
+    FROM financial_assets
+    GROUP BY category
+    ORDER BY total_value DESC
+'''
+
+SQL_GOAL_SUMMARY = '''
+    SELECT name,
+           COUNT(*) AS users,
+           SUM(target_amount) AS total_target,
+           AVG(target_amount) AS avg_target,
+           AVG(timeline_years) AS avg_timeline_years
+    FROM financial_goals
+    GROUP BY name
+    ORDER BY users DESC, name
+'''
+
+SNAPSHOT_VALUES = 'income, savings, expenses, total_assets, total_liabilities, net_worth'
+
+# When a month is rolled up again (late backfill), the row with the newest
+# taken_at supplies the values
+_ROLLUP_MERGE_LATEST = ',\n'.join(
+    f'        {column} = CASE WHEN excluded.taken_at > financial_snapshot_rollups.taken_at '
+    f'THEN excluded.{column} ELSE financial_snapshot_rollups.{column} END'
+    for column in ['taken_at'] + SNAPSHOT_VALUES.split(', ')
+)
+
+# Fold whole months of raw snapshots before the cutoff into monthly rows
+SQL_ROLLUP_SNAPSHOTS = f'''
+    INSERT INTO financial_snapshot_rollups
+    (phone_number, month, samples, taken_at, {SNAPSHOT_VALUES}, min_net_worth, max_net_worth)
+    SELECT s.phone_number, m.month, m.samples, s.taken_at,
+           s.income, s.savings, s.expenses, s.total_assets, s.total_liabilities, s.net_worth,
+           m.min_net_worth, m.max_net_worth
+    FROM financial_snapshots s
+    JOIN (
+        SELECT phone_number, substr(taken_at, 1, 7) AS month, COUNT(*) AS samples,
+               MAX(taken_at) AS last_taken_at,
+               MIN(net_worth) AS min_net_worth, MAX(net_worth) AS max_net_worth
+        FROM financial_snapshots
+        WHERE taken_at < ?
+        GROUP BY phone_number, substr(taken_at, 1, 7)
+    ) m ON s.phone_number = m.phone_number AND s.taken_at = m.last_taken_at
+    WHERE s.taken_at < ?
+    ON CONFLICT (phone_number, month) DO UPDATE SET
+        samples = financial_snapshot_rollups.samples + excluded.samples,
+{_ROLLUP_MERGE_LATEST},
+        min_net_worth = CASE WHEN excluded.min_net_worth < financial_snapshot_rollups.min_net_worth
+                             THEN excluded.min_net_worth ELSE financial_snapshot_rollups.min_net_worth END,
+        max_net_worth = CASE WHEN excluded.max_net_worth > financial_snapshot_rollups.max_net_worth
+                             THEN excluded.max_net_worth ELSE financial_snapshot_rollups.max_net_worth END
+'''
+
+SQL_DELETE_ROLLED_UP_SNAPSHOTS = 'DELETE FROM financial_snapshots WHERE taken_at < ?'
+
+# Monthly rollups followed by raw snapshots: one primary-key range scan each
+SQL_SELECT_HISTORY = f'''
+    SELECT taken_at, samples, {SNAPSHOT_VALUES}
+    FROM (
+        SELECT taken_at, samples, {SNAPSHOT_VALUES}
+        FROM financial_snapshot_rollups
+        WHERE phone_number = ? AND month >= ? AND month <= ? AND taken_at < ?
+        UNION ALL
+        SELECT taken_at, 1 AS samples, {SNAPSHOT_VALUES}
+        FROM financial_snapshots
+        WHERE phone_number = ? AND taken_at >= ? AND taken_at < ?
+    ) history
+    ORDER BY taken_at
+'''
+
+
+def _number(value):
+    """Parse a numeric-ish value ("1,20,000", "₹50,000") to float, None if it isn't one"""
+    if isinstance(value, str):
+        value = value.replace(',', '').replace('₹', '').strip()
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _amount(value):
+    """Coerce a numeric-ish value to float, treating junk as 0"""
+    return _number(value) or 0.0
+
+
+def _categories(items):
+    """
+    Normalize {category: value} or [{category|name|type, value|amount}] to
+    a list of (category, value) with duplicate categories summed; None when
+    the section is absent.
+    """
+    if items is None:
+        return None
+    if isinstance(items, dict):
+        pairs = items.items()
+    elif isinstance(items, list):
+        pairs = [
+            (item.get('category') or item.get('name') or item.get('type'),
+             item.get('value', item.get('amount', item.get('outstanding'))))
+            for item in items if isinstance(item, dict)
+        ]
+    else:
+        return []
+
+    totals = {}
+    for category, value in pairs:
+        if category:
+            key = str(category).strip().lower().replace(' ', '_')
+            totals[key] = totals.get(key, 0.0) + _amount(value)
+    return list(totals.items())
+
+
+def _goals(items):
+    """Normalize goals (dicts or plain names) to (name, target, years, priority); None when absent"""
+    if items is None:
+        return None
+    goals = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, str):
+            item = {'name': item}
+        if not isinstance(item, dict) or not item.get('name'):
+            continue
+        goals[str(item['name']).strip()] = (
+            _amount(item.get('target_amount')) or None,
+            _amount(item.get('timeline_years')) or None,
+            item.get('priority')
+        )
+    return [(name, *values) for name, values in goals.items()]
+
+
+def structure_financial_data(data_dict):
+    """
+    Pull the structured parts out of a user's financial data dict.
+
+    Accepts the crew input shape (`financials.assets`, `financials.liabilities`,
+    top-level `goals` and `risk_profile`) as well as flat `assets` /
+    `liabilities` keys.
+
+    Returns:
+        Dict with assets, liabilities, goals and risk_profile; a section the
+        data doesn't include is None, so its stored rows are kept
+    """
+    data_dict = data_dict or {}
+    financials = data_dict.get('financials') or {}
+    return {
+        'assets': _categories(financials.get('assets', data_dict.get('assets'))),
+        'liabilities': _categories(financials.get('liabilities', data_dict.get('liabilities'))),
+        'goals': _goals(data_dict.get('goals')),
+        'risk_profile': data_dict.get('risk_profile'),
+    }
+
+
+def _first(metadata, keys):
+    """Value of the first of `keys` present in the metadata"""
+    for key in keys:
+        if metadata.get(key) is not None:
+            return metadata[key]
+    return None
+
+
+def _figure(value):
+    """A monthly figure, summing its parts when the call broke it down; None if not given"""
+    if isinstance(value, dict):
+        parts = [part for part in map(_number, value.values()) if part is not None]
+        return sum(parts) if parts else None
+    return _number(value)
+
+
+def _section(metadata, keys):
+    """{category: value} summed over every key present, None when none is"""
+    section = None
+    for key in keys:
+        categories = _categories(metadata.get(key))
+        if categories is None:
+            continue
+        section = section or {}
+        for category, value in categories:
+            section[category] = section.get(category, 0.0) + value
+    return section
+
+
+def financial_data_from_analysis(analysis_data, year=None):
+    """
+    Map a call's analysis metadata to update_financial_data arguments.
+
+    Pixpoc's extraction is free-form, so the common spellings are accepted
+    (`monthly_income` / `income`, `investments` / `assets`, `loans` /
+    `liabilities`, `risk_appetite` / `risk_profile`). `current_savings` is
+    a balance and is stored as a `savings` asset; monthly savings default
+    to income minus expenses when the call gave both.
+
+    Figures and sections the call didn't give are None / left out, so the
+    stored ones are kept (see financial_data_writes).
+
+    Returns:
+        (income, savings, expenses, data_dict), or None when the call
+        established no financial figures
+    """
+    metadata = (analysis_data or {}).get('metadata')
+    if not isinstance(metadata, dict):
+        return None
+
+    income = _figure(_first(metadata, ANALYSIS_KEYS['income']))
+    expenses = _figure(_first(metadata, ANALYSIS_KEYS['expenses']))
+    savings = _figure(_first(metadata, ANALYSIS_KEYS['savings']))
+    if savings is None and income is not None and expenses is not None:
+        savings = income - expenses
+
+    assets = _section(metadata, ANALYSIS_KEYS['assets'])
+    cash = _number(_first(metadata, ANALYSIS_KEYS['cash']))
+    if cash is not None:
+        assets = assets or {}
+        assets['savings'] = assets.get('savings', 0.0) + cash
+    liabilities = _section(metadata, ANALYSIS_KEYS['liabilities'])
+    risk_profile = _first(metadata, ANALYSIS_KEYS['risk_profile'])
+
+    goals = None
+    if isinstance(metadata.get('goals'), list):
+        year = year or datetime.now().year
+        goals = []
+        for goal in metadata['goals']:
+            if isinstance(goal, str):
+                goal = {'name': goal}
+            if not isinstance(goal, dict):
+                continue
+            goal = dict(goal)
+            # Calls usually give a target year rather than a timeline
+            if not goal.get('timeline_years') and _amount(goal.get('target_year')) > year:
+                goal['timeline_years'] = _amount(goal['target_year']) - year
+            goals.append(goal)
+
+    figures = (income, expenses, savings, assets, liabilities, goals, risk_profile)
+    if all(figure is None for figure in figures):
+        return None
+
+    financials = {'income': income, 'expenses': expenses}
+    if assets is not None:
+        financials['assets'] = assets
+    if liabilities is not None:
+        financials['liabilities'] = liabilities
+    data_dict = dict(metadata, financials=financials, risk_profile=risk_profile)
+    data_dict.pop('goals', None)
+    if goals is not None:
+        data_dict['goals'] = goals
+    return income, savings, expenses, data_dict
+
+
+def snapshot_time(timestamp=None):
+    """
+    Local naive ISO time for a snapshot, like datetime.now().isoformat().
+
+    Callback timestamps (often UTC with a `Z` suffix) are converted so they
+    sort and roll up alongside the rest; unparseable ones fall back to now.
+    """
+    if timestamp:
+        try:
+            taken_at = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+            if taken_at.tzinfo:
+                taken_at = taken_at.astimezone().replace(tzinfo=None)
+            return taken_at.isoformat()
+        except ValueError:
+            pass
+    return datetime.now().isoformat()
+
+
+def _section_total(rows):
+    """Sum of a section's values, None when the section is absent"""
+    return sum(value for _, value in rows) if rows is not None else None
+
+
+def financial_data_writes(phone_number, income, savings, expenses, data_dict, now):
+    """
+    Statements that store a user's financial data, to run in one transaction.
+
+    Merges with what is stored: None figures keep their stored values and
+    a section (assets, liabilities, goals) is replaced only when data_dict
+    includes it. Totals and the snapshot are taken from the merged rows.
+    Data older than the stored row (`now` before its updated_at) only adds
+    its own snapshot.
+
+    Returns:
+        List of (sql, params)
+    """
+    structured = structure_financial_data(data_dict)
+    income, savings, expenses = _number(income), _number(savings), _number(expenses)
+    current = (phone_number, now)
+
+    statements = [
+        (SQL_UPSERT_FINANCIAL_DATA, (
+            phone_number, income, savings, expenses,
+            structured['risk_profile'], json.dumps(data_dict), now
+        )),
+    ]
+    for section, (table, column) in SECTION_TABLES.items():
+        if structured[section] is None:
+            continue
+        statements.append((f'DELETE FROM {table} WHERE phone_number = ? AND {SQL_IS_CURRENT}',
+                           (phone_number, *current)))
+        statements += [
+            (f'''INSERT INTO {table} (phone_number, category, {column}, updated_at)
+                SELECT ?, ?, CAST(? AS REAL), ? WHERE {SQL_IS_CURRENT}''',
+             (phone_number, category, value, now, *current))
+            for category, value in structured[section]
+        ]
+    if structured['goals'] is not None:
+        statements.append((f'DELETE FROM financial_goals WHERE phone_number = ? AND {SQL_IS_CURRENT}',
+                           (phone_number, *current)))
+        statements += [
+            (f'''INSERT INTO financial_goals (phone_number, name, target_amount, timeline_years, priority, updated_at)
+                SELECT ?, ?, CAST(? AS REAL), CAST(? AS REAL), ?, ? WHERE {SQL_IS_CURRENT}''',
+             (phone_number, *goal, now, *current))
+            for goal in structured['goals']
+        ]
+
+    total_assets = _section_total(structured['assets'])
+    total_liabilities = _section_total(structured['liabilities'])
+    net_worth = total_assets - total_liabilities if None not in (total_assets, total_liabilities) else None
+    statements += [
+        (SQL_UPDATE_FINANCIAL_TOTALS, (phone_number,) * 4 + current),
+        (SQL_INSERT_SNAPSHOT, (now, *current)),
+        (SQL_INSERT_STALE_SNAPSHOT, (
+            phone_number, now, income, savings, expenses, total_assets, total_liabilities, net_worth, *current
+        )),
+    ]
+    return statements
+
+
+def resolve_fields(fields=None):
+    """Validate requested fields, defaulting to DEFAULT_FIELDS"""
+    if fields is None:
+        return DEFAULT_FIELDS
+    unknown = set(fields) - set(ALL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown financial data fields: {sorted(unknown)}")
+    return tuple(fields)
+
+
+def financial_data_reads(phone_number, fields):
+    """
+    Queries needed for the requested fields - nothing else is read.
+
+    Returns:
+        List of (key, sql, params); key is 'summary' or a detail field
+    """
+    reads = []
+    columns = [field for field in SUMMARY_FIELDS if field in fields]
+    if 'data' in fields:
+        columns.append('data_json')
+    if columns:
+        # income is always read: a missing row means "no data yet"
+        if 'income' not in columns:
+            columns.insert(0, 'income')
+        reads.append((
+            'summary',
+            f"SELECT {', '.join(columns)} FROM user_financial_data WHERE phone_number = ?",
+            (phone_number,)
+        ))
+    reads += [(field, SQL_SELECT_DETAILS[field], (phone_number,)) for field in DETAIL_FIELDS if field in fields]
+    return reads
+
+
+def financial_data_from_results(fields, results):
+    """
+    Shape query results for the requested fields, falling back to demo
+    defaults when the user has no data yet.
+
+    Args:
+        fields: Fields requested (see resolve_fields)
+        results: {key: rows} for the reads from financial_data_reads
+    """
+    summary_rows = results.get('summary') or []
+    row = summary_rows[0] if summary_rows else None
+    has_data = row is not None
+
+    data = {}
+    for field in fields:
+        if field in ('income', 'savings', 'expenses'):
+            # Demo values only until the first call; a figure no call gave is 0
+            if has_data:
+                data[field] = float(row[field]) if row[field] is not None else 0.0
+            else:
+                data[field] = DEFAULT_FINANCIAL_DATA[field]
+        elif field in SUMMARY_FIELDS:
+            data[field] = row[field] if has_data and row[field] is not None else DEFAULT_FINANCIAL_DATA[field]
+        elif field == 'data':
+            data[field] = json.loads(row['data_json']) if has_data and row['data_json'] else {}
+        elif field == 'assets':
+            data[field] = [{'category': r['category'], 'value': r['value']} for r in results.get(field, [])]
+        elif field == 'liabilities':
+            data[field] = [{'category': r['category'], 'outstanding': r['outstanding']} for r in results.get(field, [])]
+        elif field == 'goals':
+            data[field] = [dict(r) for r in results.get(field, [])]
+    return data
+
+
+def cohort_query(by):
+    """SQL for cohort_summary grouped by one of COHORT_KEYS"""
+    if by not in COHORT_KEYS:
+        raise ValueError(f"Unknown cohort '{by}', expected one of {sorted(COHORT_KEYS)}")
+    return SQL_COHORT_SUMMARY.format(key=COHORT_KEYS[by])
+
+
+def rollup_cutoff(now=None, retention_days=SNAPSHOT_RAW_RETENTION_DAYS):
+    """
+    First day of the month containing `now - retention_days`; snapshots
+    before it cover whole months and can be rolled up.
+    """
+    boundary = (now or datetime.now()) - timedelta(days=retention_days)
+    return boundary.strftime('%Y-%m-01')
+
+
+def rollup_statements(cutoff):
+    """Statements that downsample snapshots older than cutoff, to run in one transaction"""
+    return [
+        (SQL_ROLLUP_SNAPSHOTS, (cutoff, cutoff)),
+        (SQL_DELETE_ROLLED_UP_SNAPSHOTS, (cutoff,)),
+    ]
+
+
+def history_query(phone_number, start=None, end=None):
+    """
+    (sql, params) for a user's snapshot history.
+
+    Args:
+        phone_number: User's phone number
+        start: Inclusive ISO date/time (default: all history)
+        end: Exclusive ISO date/time (default: up to now)
+    """
+    start = start or '0000'
+    end = end or '9999'
+    return SQL_SELECT_HISTORY, (phone_number, start[:7], end[:7], end, phone_number, start, end)
@@ -0,0 +1,1139 @@
+"""
+Storage Repositories
+Backend-neutral persistence layer with SQLite and Postgres implementations
+
+All SQL is written once with `?` placeholders and portable types; each
+backend translates placeholders and the few dialect tokens in the schema.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from database import financial_model
+
+# A 'processing' claim older than this is treated as abandoned (worker died)
+CALL_CLAIM_TIMEOUT_SECONDS = int(os.getenv("CALL_CLAIM_TIMEOUT_SECONDS", "1800"))
+
+# Max phone numbers remembered by KnownUsers before it starts over
+KNOWN_USERS_CACHE_SIZE = int(os.getenv("KNOWN_USERS_CACHE_SIZE", "100000"))
+
+# Schema - {autoincrement_pk} and {without_rowid} are the dialect-specific tokens
+TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        phone_number TEXT PRIMARY KEY,
+        name TEXT,
+        email TEXT,
+        created_at TEXT,
+        last_login TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS calls (
+        id {autoincrement_pk},
+        phone_number TEXT,
+        call_id TEXT UNIQUE,
+        tracking_id TEXT UNIQUE,
+        contact_id TEXT,
+        campaign_id TEXT,
+        status TEXT DEFAULT 'initiated',
+        created_at TEXT,
+        completed_at TEXT,
+        claimed_at TEXT,
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS reports (
+        id TEXT PRIMARY KEY,
+        phone_number TEXT,
+        call_id TEXT,
+        type TEXT,
+        filename TEXT,
+        file_path TEXT,
+        file_size INTEGER,
+        created_at TEXT,
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number),
+        FOREIGN KEY (call_id) REFERENCES calls (call_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_financial_data (
+        phone_number TEXT PRIMARY KEY,
+        income REAL DEFAULT 0,
+        savings REAL DEFAULT 0,
+        expenses REAL DEFAULT 0,
+        data_json TEXT,
+        updated_at TEXT,
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    # Latest output of each report crew task per user, keyed by the hash of
+    # its inputs (see finance_bot/report_sections.py)
+    '''
+    CREATE TABLE IF NOT EXISTS report_sections (
+        phone_number TEXT,
+        section TEXT,
+        input_hash TEXT,
+        inputs_json TEXT,
+        content_hash TEXT,
+        content TEXT,
+        call_id TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (phone_number, section),
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    # Contact memory state and its rendered text (see services/contact_memory.py)
+    '''
+    CREATE TABLE IF NOT EXISTS contact_memory (
+        phone_number TEXT PRIMARY KEY,
+        contact_id TEXT,
+        state_json TEXT,
+        memory TEXT,
+        updated_at TEXT,
+        FOREIGN KEY (phone_number) REFERENCES users (phone_number)
+    )
+    ''',
+    # Local copy of each Pixpoc contact's metadata as last synced, plus the
+    # write-behind sync state (see services/contact_metadata.py)
+    '''
+    CREATE TABLE IF NOT EXISTS contact_metadata (
+        contact_id TEXT PRIMARY KEY,
+        phone_number TEXT,
+        metadata_json TEXT,
+        synced_at TEXT,
+        claimed_until TEXT,
+        attempts INTEGER DEFAULT 0
+    )
+    ''',
+    # Metadata updates not yet sent to Pixpoc, merged in id order
+    '''
+    CREATE TABLE IF NOT EXISTS contact_metadata_updates (
+        id {autoincrement_pk},
+        contact_id TEXT,
+        metadata_json TEXT,
+        created_at TEXT
+    )
+    ''',
+]
+
+TABLES += financial_model.TABLES
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_calls_phone_number ON calls (phone_number)',
+    'CREATE INDEX IF NOT EXISTS idx_reports_phone_created ON reports (phone_number, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_reports_created ON reports (created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_contact_metadata_updates ON contact_metadata_updates (contact_id, id)',
+] + financial_model.INDEXES
+
+# Columns added after the first release, applied to existing databases
+COLUMN_MIGRATIONS = {
+    'calls': {'claimed_at': 'TEXT'},
+    'reports': {'file_size': 'INTEGER'},
+    **financial_model.COLUMN_MIGRATIONS,
+}
+
+# Queries shared by the sync and async repositories
+CALL_COLUMNS = 'call_id, phone_number, contact_id, campaign_id, status, tracking_id'
+
+SQL_INSERT_USER = '''
+    INSERT INTO users (phone_number, name, created_at, last_login)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (phone_number) DO NOTHING
+'''
+
+SQL_SELECT_USER_REPORTS = '''
+    SELECT id, type, filename, file_path, file_size, created_at
+    FROM reports
+    WHERE phone_number = ?
+    ORDER BY created_at DESC
+'''
+
+SQL_COUNT_USER_REPORTS = '''
+    SELECT type, COUNT(*) AS count
+    FROM reports
+    WHERE phone_number = ?
+    GROUP BY type
+'''
+
+# Reports saved after a timestamp, for every user (the report event watcher)
+SQL_SELECT_REPORTS_SINCE = '''
+    SELECT id, phone_number, type, filename, file_path, file_size, created_at
+    FROM reports
+    WHERE created_at > ?
+    ORDER BY created_at
+    LIMIT 500
+'''
+
+SQL_INSERT_REPORT = '''
+    INSERT INTO reports (id, phone_number, call_id, type, filename, file_path, file_size, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO NOTHING
+'''
+
+SQL_SELECT_REPORT_SECTIONS = '''
+    SELECT section, input_hash, inputs_json, content_hash, content, call_id, updated_at
+    FROM report_sections
+    WHERE phone_number = ?
+'''
+
+SQL_UPSERT_REPORT_SECTION = '''
+    INSERT INTO report_sections (phone_number, section, input_hash, inputs_json, content_hash, content, call_id, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (phone_number, section) DO UPDATE SET
+        input_hash = excluded.input_hash,
+        inputs_json = excluded.inputs_json,
+        content_hash = excluded.content_hash,
+        content = excluded.content,
+        call_id = excluded.call_id,
+        updated_at = excluded.updated_at
+'''
+
+SQL_SELECT_CONTACT_MEMORY = '''
+    SELECT contact_id, state_json, memory, updated_at
+    FROM contact_memory
+    WHERE phone_number = ?
+'''
+
+SQL_UPSERT_CONTACT_MEMORY = '''
+    INSERT INTO contact_memory (phone_number, contact_id, state_json, memory, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (phone_number) DO UPDATE SET
+        contact_id = COALESCE(excluded.contact_id, contact_memory.contact_id),
+        state_json = excluded.state_json,
+        memory = excluded.memory,
+        updated_at = excluded.updated_at
+'''
+
+SQL_SELECT_CONTACT_METADATA = '''
+    SELECT contact_id, phone_number, metadata_json, synced_at, attempts
+    FROM contact_metadata
+    WHERE contact_id = ?
+'''
+
+SQL_SELECT_CONTACT_METADATA_UPDATES = '''
+    SELECT id, metadata_json
+    FROM contact_metadata_updates
+    WHERE contact_id = ?
+    ORDER BY id
+'''
+
+# Metadata read from Pixpoc becomes the synced base; queued updates stay queued
+SQL_UPSERT_CONTACT_METADATA = '''
+    INSERT INTO contact_metadata (contact_id, phone_number, metadata_json, synced_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (contact_id) DO UPDATE SET
+        phone_number = COALESCE(excluded.phone_number, contact_metadata.phone_number),
+        metadata_json = excluded.metadata_json,
+        synced_at = excluded.synced_at
+'''
+
+SQL_INSERT_CONTACT = '''
+    INSERT INTO contact_metadata (contact_id, phone_number, metadata_json)
+    VALUES (?, ?, '{}')
+    ON CONFLICT (contact_id) DO NOTHING
+'''
+
+SQL_INSERT_CONTACT_METADATA_UPDATE = '''
+    INSERT INTO contact_metadata_updates (contact_id, metadata_json, created_at)
+    VALUES (?, ?, ?)
+'''
+
+# Contacts whose oldest queued update has waited out the coalescing window
+SQL_SELECT_DUE_CONTACT_METADATA = '''
+    SELECT u.contact_id, MIN(u.created_at) AS queued_at
+    FROM contact_metadata_updates u
+    JOIN contact_metadata c ON c.contact_id = u.contact_id
+    WHERE c.claimed_until IS NULL OR c.claimed_until < ?
+    GROUP BY u.contact_id
+    HAVING MIN(u.created_at) <= ?
+    ORDER BY queued_at
+    LIMIT ?
+'''
+
+SQL_CLAIM_CONTACT_METADATA_SYNC = '''
+    UPDATE contact_metadata
+    SET claimed_until = ?
+    WHERE contact_id = ? AND (claimed_until IS NULL OR claimed_until < ?)
+'''
+
+SQL_COMPLETE_CONTACT_METADATA_SYNC = '''
+    UPDATE contact_metadata
+    SET metadata_json = ?, synced_at = ?, claimed_until = NULL, attempts = 0
+    WHERE contact_id = ?
+'''
+
+SQL_DELETE_CONTACT_METADATA_UPDATES = 'DELETE FROM contact_metadata_updates WHERE contact_id = ? AND id <= ?'
+
+SQL_FAIL_CONTACT_METADATA_SYNC = '''
+    UPDATE contact_metadata
+    SET claimed_until = ?, attempts = attempts + 1
+    WHERE contact_id = ?
+'''
+
+# An existing call keeps its status but takes the latest Pixpoc IDs
+SQL_UPSERT_CALL = '''
+    INSERT INTO calls (phone_number, call_id, tracking_id, contact_id, campaign_id, status, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (call_id) DO UPDATE SET
+        tracking_id = excluded.tracking_id,
+        contact_id = excluded.contact_id,
+        campaign_id = excluded.campaign_id
+'''
+
+SQL_CLAIM_CALL = '''
+    UPDATE calls
+    SET status = 'processing', claimed_at = ?
+    WHERE call_id = ?
+      AND (
+        status NOT IN ('processing', 'completed')
+        OR (status = 'processing' AND (claimed_at IS NULL OR claimed_at < ?))
+      )
+'''
+
+SQL_SELECT_CALL_PHONE = 'SELECT phone_number FROM calls WHERE call_id = ?'
+SQL_SELECT_CALL_BY_TRACKING_ID = f'SELECT {CALL_COLUMNS} FROM calls WHERE tracking_id = ?'
+SQL_SELECT_CALL_BY_ID = f'SELECT {CALL_COLUMNS} FROM calls WHERE call_id = ?'
+
+class KnownUsers:
+    """
+    Phone numbers known to exist in the users table, per process.
+
+    Users are never deleted, so a hit means ensure_user_exists can skip the
+    database entirely. The set is cleared once it reaches `max_size`.
+    """
+
+    def __init__(self, max_size=KNOWN_USERS_CACHE_SIZE):
+        self.max_size = max_size
+        self._phones = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, phone_number):
+        return phone_number in self._phones
+
+    def add(self, *phone_numbers):
+        with self._lock:
+            if len(self._phones) + len(phone_numbers) > self.max_size:
+                self._phones.clear()
+            self._phones.update(phone_numbers)
+
+
+def report_from_row(row):
+    """Shape a reports row the way the dashboards expect it"""
+    report_type = row['type'] or 'financial_planning'
+    return {
+        'id': row['id'],
+        'type': report_type,
+        'filename': row['filename'],
+        'path': row['file_path'],
+        'size': row['file_size'],
+        'date': row['created_at'],
+        'title': f"{report_type.replace('_', ' ').title()} Report"
+    }
+
+
+def report_sections_from_rows(rows):
+    """Stored report sections keyed by section name"""
+    return {
+        row['section']: {
+            'input_hash': row['input_hash'],
+            'inputs': json.loads(row['inputs_json'] or '{}'),
+            'content_hash': row['content_hash'],
+            'content': row['content'],
+            'call_id': row['call_id'],
+            'updated_at': row['updated_at'],
+        }
+        for row in rows
+    }
+
+
+def report_section_rows(phone_number, call_id, sections):
+    """Upsert parameter rows for {section: {input_hash, inputs, content_hash, content}}"""
+    now = datetime.now().isoformat()
+    return [
+        (phone_number, name, section['input_hash'], json.dumps(section['inputs'], default=str),
+         section['content_hash'], section['content'], call_id, now)
+        for name, section in sections.items()
+    ]
+
+
+def contact_memory_from_row(row):
+    """Shape a contact_memory row, or None if there is none"""
+    if row is None:
+        return None
+    return {
+        'contact_id': row['contact_id'],
+        'state': json.loads(row['state_json']),
+        'memory': row['memory'],
+        'updated_at': row['updated_at'],
+    }
+
+
+def contact_memory_row(phone_number, contact_id, state, memory):
+    """Upsert parameters for a contact's memory"""
+    return (phone_number, contact_id, json.dumps(state, default=str), memory, datetime.now().isoformat())
+
+
+def contact_metadata_from_rows(row, update_rows):
+    """
+    A contact's metadata with its queued updates applied, or None.
+
+    Returns:
+        Dict with contact_id, phone_number, metadata, updates (queued updates
+        merged, not yet synced), pending (their count), last_update_id,
+        synced_at and attempts
+    """
+    if row is None and not update_rows:
+        return None
+    updates = {}
+    for update in update_rows:
+        updates.update(json.loads(update['metadata_json']))
+    return {
+        'contact_id': row['contact_id'] if row else None,
+        'phone_number': row['phone_number'] if row else None,
+        'metadata': {**(json.loads(row['metadata_json'] or '{}') if row else {}), **updates},
+        'updates': updates,
+        'pending': len(update_rows),
+        'last_update_id': update_rows[-1]['id'] if update_rows else None,
+        'synced_at': row['synced_at'] if row else None,
+        'attempts': row['attempts'] if row else 0,
+    }
+
+
+def user_reports_query(phone_number, limit=None, offset=0, report_type=None):
+    """
+    Newest-first reports query for one user, optionally one type and one page.
+
+    Returns:
+        (sql, params)
+    """
+    sql = SQL_SELECT_USER_REPORTS
+    params = [phone_number]
+    if report_type:
+        sql = sql.replace('WHERE phone_number = ?', 'WHERE phone_number = ? AND type = ?')
+        params.append(report_type)
+    if limit is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    return sql, tuple(params)
+
+
+def call_status_update(call_id, status, contact_id=None):
+    """Build the (sql, params) that updates a call's status"""
+    now = datetime.now().isoformat()
+    if contact_id:
+        return '''
+            UPDATE calls
+            SET status = ?, completed_at = ?, contact_id = ?
+            WHERE call_id = ?
+        ''', (status, now, contact_id, call_id)
+    return '''
+        UPDATE calls
+        SET status = ?, completed_at = ?
+        WHERE call_id = ?
+    ''', (status, now, call_id)
+
+
+def bulk_call_rows(calls, known_users):
+    """
+    Parameter rows for a bulk save: (new user rows, call rows).
+
+    Users already in `known_users` are left out of the user upsert.
+    """
+    now = datetime.now().isoformat()
+    new_phones = {call['phone_number'] for call in calls if call['phone_number'] not in known_users}
+    user_rows = [(phone, phone, now, now) for phone in sorted(new_phones)]
+    call_rows = [
+        (call['phone_number'], call['call_id'], call.get('tracking_id'), call.get('contact_id'),
+         call.get('campaign_id'), 'initiated', now)
+        for call in calls
+    ]
+    return user_rows, call_rows
+
+
+def recent_calls_queries(phone_numbers, since, chunk_size=500):
+    """(sql, params) per chunk of numbers for recently_called_numbers"""
+    phone_numbers = list(phone_numbers)
+    for i in range(0, len(phone_numbers), chunk_size):
+        chunk = phone_numbers[i:i + chunk_size]
+        yield (
+            f"SELECT DISTINCT phone_number FROM calls "
+            f"WHERE phone_number IN ({', '.join('?' * len(chunk))}) AND created_at >= ?",
+            (*chunk, since)
+        )
+
+
+def claim_cutoff():
+    """Timestamps for a claim attempt: (now, claims older than this are stale)"""
+    now = datetime.now()
+    return now.isoformat(), (now - timedelta(seconds=CALL_CLAIM_TIMEOUT_SECONDS)).isoformat()
+
+
+class Repository:
+    """
+    Synchronous repository over a DB-API connection.
+
+    Subclasses provide `_connection()` (a live connection for the calling
+    thread) plus dialect settings; every query lives here.
+    """
+
+    placeholder = '?'
+    autoincrement_pk = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+    without_rowid = ''
+
+    def __init__(self):
+        self._local = threading.local()
+        self.known_users = KnownUsers()
+
+    # ------------------------------------------------------------------
+    # Connection plumbing
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        """Open a new connection"""
+        raise NotImplementedError
+
+    def _connection(self):
+        """
+        Get this thread's connection, reconnecting after a fork.
+
+        Connections are reused per thread instead of opened per call.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _sql(self, sql):
+        """Translate `?` placeholders to the driver's style"""
+        return sql if self.placeholder == '?' else sql.replace('?', self.placeholder)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: every query in the block commits together, or none do.
+
+        Transactions nest per thread; only the outermost block commits, so
+        repository methods called inside it join the caller's transaction
+        instead of each paying for its own commit (and fsync).
+        """
+        conn = self._connection()
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.new_users = []
+        self._local.depth = depth + 1
+        try:
+            yield self
+            if depth == 0:
+                conn.commit()
+                # Users inserted in this transaction exist only once it commits
+                self.known_users.add(*self._local.new_users)
+        except Exception:
+            if depth == 0:
+                conn.rollback()
+            raise
+        finally:
+            self._local.depth = depth
+
+    def in_transaction(self):
+        """Whether the calling thread is inside transaction()"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    @contextmanager
+    def _cursor(self):
+        """Cursor in a transaction that commits on success and rolls back on error"""
+        with self.transaction():
+            cursor = self._connection().cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _rows(cursor):
+        """Fetch all rows from a cursor as dicts"""
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _execute(self, sql, params=()):
+        """Execute a statement and return the affected row count"""
+        with self._cursor() as c:
+            c.execute(self._sql(sql), params)
+            return c.rowcount
+
+    def _executemany(self, sql, seq_of_params):
+        """Execute a statement once per parameter tuple in one round of the driver"""
+        with self._cursor() as c:
+            c.executemany(self._sql(sql), seq_of_params)
+
+    def _fetchall(self, sql, params=()):
+        with self._cursor() as c:
+            c.execute(self._sql(sql), params)
+            return self._rows(c)
+
+    def _fetchone(self, sql, params=()):
+        rows = self._fetchall(sql, params)
+        return rows[0] if rows else None
+
+    # ------------------------------------------------------------------
+    # Schema
+    # ------------------------------------------------------------------
+
+    def _existing_columns(self, cursor, table):
+        """Column names currently present on a table"""
+        raise NotImplementedError
+
+    def create_tables(self):
+        """Create all tables if they don't exist and apply column migrations"""
+        with self._cursor() as c:
+            for ddl in TABLES:
+                c.execute(ddl.format(autoincrement_pk=self.autoincrement_pk, without_rowid=self.without_rowid))
+            for table, columns in COLUMN_MIGRATIONS.items():
+                existing = self._existing_columns(c, table)
+                for column, definition in columns.items():
+                    if column not in existing:
+                        c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+            for ddl in INDEXES:
+                c.execute(ddl)
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+
+    def ensure_user_exists(self, phone_number, name=None):
+        """
+        Ensure user exists in database.
+
+        Known users cost nothing; anyone else costs a single upsert.
+        """
+        if phone_number in self.known_users:
+            return
+
+        now = datetime.now().isoformat()
+        with self.transaction():
+            self._execute(SQL_INSERT_USER, (phone_number, name or phone_number, now, now))
+            self._local.new_users.append(phone_number)
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def get_user_reports(self, phone_number, limit=None, offset=0, report_type=None):
+        """
+        Get a user's reports, newest first.
+
+        Args:
+            phone_number: User's phone number
+            limit: Page size (default: all reports)
+            offset: Reports to skip
+            report_type: Only reports of this type
+        """
+        self.ensure_user_exists(phone_number)
+
+        rows = self._fetchall(*user_reports_query(phone_number, limit, offset, report_type))
+        return [report_from_row(row) for row in rows]
+
+    def count_user_reports(self, phone_number):
+        """Get a user's report counts by type"""
+        rows = self._fetchall(SQL_COUNT_USER_REPORTS, (phone_number,))
+        return {row['type'] or 'financial_planning': row['count'] for row in rows}
+
+    def get_reports_since(self, since):
+        """
+        Reports saved after a timestamp, oldest first, for all users.
+
+        Returns:
+            List of (phone_number, report) pairs
+        """
+        rows = self._fetchall(SQL_SELECT_REPORTS_SINCE, (since,))
+        return [(row['phone_number'], report_from_row(row)) for row in rows]
+
+    def save_report(self, phone_number, report_id, call_id, report_type, filename, file_path, file_size=None):
+        """Save report record"""
+        self.ensure_user_exists(phone_number)
+
+        inserted = self._execute(SQL_INSERT_REPORT, (
+            report_id, phone_number, call_id, report_type, filename, file_path, file_size,
+            datetime.now().isoformat()
+        ))
+
+        if inserted:
+            print(f"✅ Report saved: {filename}")
+        else:
+            print(f"⚠️  Report already exists: {report_id}")
+
+    def get_report_sections(self, phone_number):
+        """A user's latest report sections, keyed by section name"""
+        return report_sections_from_rows(self._fetchall(SQL_SELECT_REPORT_SECTIONS, (phone_number,)))
+
+    def save_report_sections(self, phone_number, call_id, sections):
+        """
+        Store the sections a report was built from, replacing older ones.
+
+        Args:
+            phone_number: User's phone number
+            call_id: Call the report was generated for
+            sections: {section: {input_hash, inputs, content_hash, content}}
+        """
+        rows = report_section_rows(phone_number, call_id, sections)
+        with self.transaction():
+            self.ensure_user_exists(phone_number)
+            self._executemany(SQL_UPSERT_REPORT_SECTION, rows)
+
+    # ------------------------------------------------------------------
+    # Contact memory
+    # ------------------------------------------------------------------
+
+    def get_contact_memory(self, phone_number):
+        """A user's stored contact memory (state and rendered text), or None"""
+        return contact_memory_from_row(self._fetchone(SQL_SELECT_CONTACT_MEMORY, (phone_number,)))
+
+    def save_contact_memory(self, phone_number, contact_id, state, memory):
+        """Store a user's contact memory state and its rendered text"""
+        with self.transaction():
+            self.ensure_user_exists(phone_number)
+            self._execute(SQL_UPSERT_CONTACT_MEMORY, contact_memory_row(phone_number, contact_id, state, memory))
+
+    # ------------------------------------------------------------------
+    # Contact metadata (write-behind copy of Pixpoc's)
+    # ------------------------------------------------------------------
+
+    def get_contact_metadata(self, contact_id):
+        """A contact's metadata with queued updates applied, or None if never stored"""
+        with self.transaction():
+            row = self._fetchone(SQL_SELECT_CONTACT_METADATA, (contact_id,))
+            update_rows = self._fetchall(SQL_SELECT_CONTACT_METADATA_UPDATES, (contact_id,))
+        return contact_metadata_from_rows(row, update_rows)
+
+    def save_contact_metadata(self, contact_id, metadata, phone_number=None):
+        """Store metadata read from Pixpoc as the contact's synced copy"""
+        self._execute(SQL_UPSERT_CONTACT_METADATA, (
+            contact_id, phone_number, json.dumps(metadata, default=str), datetime.now().isoformat()
+        ))
+
+    def queue_contact_metadata(self, contact_id, updates, phone_number=None):
+        """Apply metadata updates locally and queue them for Pixpoc"""
+        with self.transaction():
+            self._execute(SQL_INSERT_CONTACT, (contact_id, phone_number))
+            self._execute(SQL_INSERT_CONTACT_METADATA_UPDATE, (
+                contact_id, json.dumps(updates, default=str), datetime.now().isoformat()
+            ))
+
+    def due_contact_metadata(self, queued_before, limit=100):
+        """Unclaimed contacts with updates queued at or before `queued_before`"""
+        rows = self._fetchall(SQL_SELECT_DUE_CONTACT_METADATA, (
+            datetime.now().isoformat(), queued_before, limit
+        ))
+        return [row['contact_id'] for row in rows]
+
+    def claim_contact_metadata_sync(self, contact_id, claimed_until):
+        """
+        Claim a contact's queued updates for one sync attempt.
+
+        Returns:
+            The contact (see contact_metadata_from_rows), or None if another
+            worker holds the claim
+        """
+        with self.transaction():
+            claimed = self._execute(SQL_CLAIM_CONTACT_METADATA_SYNC, (
+                claimed_until, contact_id, datetime.now().isoformat()
+            ))
+            if not claimed:
+                return None
+            return self.get_contact_metadata(contact_id)
+
+    def complete_contact_metadata_sync(self, contact_id, metadata, last_update_id):
+        """Record a successful sync: new synced copy, sent updates dequeued"""
+        with self.transaction():
+            self._execute(SQL_COMPLETE_CONTACT_METADATA_SYNC, (
+                json.dumps(metadata, default=str), datetime.now().isoformat(), contact_id
+            ))
+            self._execute(SQL_DELETE_CONTACT_METADATA_UPDATES, (contact_id, last_update_id))
+
+    def fail_contact_metadata_sync(self, contact_id, retry_at):
+        """Record a failed sync; the contact is due again after `retry_at`"""
+        self._execute(SQL_FAIL_CONTACT_METADATA_SYNC, (retry_at, contact_id))
+
+    # ------------------------------------------------------------------
+    # Financial data
+    # ------------------------------------------------------------------
+
+    def get_user_financial_data(self, phone_number, fields=None):
+        """
+        Get user's financial summary.
+
+        Args:
+            phone_number: User's phone number
+            fields: Fields to load (see financial_model.ALL_FIELDS); only their
+                columns and tables are read. Default: income, savings,
+                expenses and the raw data dict.
+        """
+        fields = financial_model.resolve_fields(fields)
+        self.ensure_user_exists(phone_number)
+
+        results = {
+            key: self._fetchall(sql, params)
+            for key, sql, params in financial_model.financial_data_reads(phone_number, fields)
+        }
+        return financial_model.financial_data_from_results(fields, results)
+
+    def update_financial_data(self, phone_number, income, savings, expenses, data_dict, taken_at=None):
+        """
+        Update user's financial data, its assets/liabilities/goals rows and
+        a snapshot taken at `taken_at` (ISO timestamp, default now)
+        """
+        now = financial_model.snapshot_time(taken_at)
+        with self.transaction():
+            self.ensure_user_exists(phone_number)
+            for sql, params in financial_model.financial_data_writes(
+                phone_number, income, savings, expenses, data_dict, now
+            ):
+                self._execute(sql, params)
+        print(f"✅ Financial data updated for {phone_number}")
+
+    def get_financial_history(self, phone_number, start=None, end=None):
+        """
+        Snapshot history for trend charts, oldest first.
+
+        Older months come back as one rolled-up row each (`samples` > 1),
+        recent history as raw snapshots.
+        """
+        return self._fetchall(*financial_model.history_query(phone_number, start, end))
+
+    def rollup_snapshots(self, retention_days=None):
+        """
+        Downsample raw snapshots older than the retention window into monthly
+        rollups and drop the raw rows.
+
+        Returns:
+            Number of raw snapshots rolled up
+        """
+        if retention_days is None:
+            retention_days = financial_model.SNAPSHOT_RAW_RETENTION_DAYS
+        cutoff = financial_model.rollup_cutoff(retention_days=retention_days)
+        with self.transaction():
+            counts = [self._execute(sql, params) for sql, params in financial_model.rollup_statements(cutoff)]
+        return counts[-1]
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+
+    def cohort_summary(self, by='income_band'):
+        """User counts, average savings rate and net worth per cohort"""
+        return self._fetchall(financial_model.cohort_query(by))
+
+    def asset_allocation(self):
+        """Total and average holdings per asset category across users"""
+        return self._fetchall(financial_model.SQL_ASSET_ALLOCATION)
+
+    def goal_summary(self):
+        """How many users share each goal and its average target"""
+        return self._fetchall(financial_model.SQL_GOAL_SUMMARY)
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    def save_call(self, phone_number, call_id, contact_id=None, tracking_id=None, campaign_id=None):
+        """
+        Save call record with full Pixpoc response data.
+
+        Args:
+            phone_number: User's phone number
+            call_id: Pixpoc call UUID
+            contact_id: Pixpoc contact ID
+            tracking_id: Pixpoc tracking ID (callSid) - used for callbacks
+            campaign_id: Pixpoc campaign ID
+        """
+        self.ensure_user_exists(phone_number)
+
+        self._execute(SQL_UPSERT_CALL, (
+            phone_number, call_id, tracking_id, contact_id, campaign_id, 'initiated', datetime.now().isoformat()
+        ))
+        print(f"✅ Call saved: {call_id} (tracking: {tracking_id})")
+
+    def save_calls(self, calls):
+        """
+        Save many call records (and their users) in one transaction.
+
+        Args:
+            calls: Dicts with phone_number, call_id and optional contact_id,
+                tracking_id, campaign_id
+        """
+        user_rows, call_rows = bulk_call_rows(calls, self.known_users)
+        with self.transaction():
+            if user_rows:
+                self._executemany(SQL_INSERT_USER, user_rows)
+                self._local.new_users.extend(row[0] for row in user_rows)
+            self._executemany(SQL_UPSERT_CALL, call_rows)
+        print(f"✅ Saved {len(call_rows)} calls")
+
+    def recently_called_numbers(self, phone_numbers, since):
+        """Subset of phone_numbers with a call created at or after `since`"""
+        return set().union(*(
+            {row['phone_number'] for row in self._fetchall(sql, params)}
+            for sql, params in recent_calls_queries(phone_numbers, since)
+        ))
+
+    def update_call_status(self, call_id, status, contact_id=None):
+        """Update call status"""
+        self._execute(*call_status_update(call_id, status, contact_id))
+
+    def record_report(self, call_id, status, phone_number, report_id, report_type, filename, file_path, file_size=None,
+                      financial_data=None, taken_at=None):
+        """
+        Finish a call: set its status, upsert its user, insert the report
+        row and store the call's financial figures (update_financial_data
+        arguments, if any) in a single transaction.
+        """
+        with self.transaction():
+            self.update_call_status(call_id, status)
+            self.save_report(phone_number, report_id, call_id, report_type, filename, file_path, file_size)
+            if financial_data:
+                self.update_financial_data(phone_number, *financial_data, taken_at=taken_at)
+
+    def claim_call_for_processing(self, call_id):
+        """
+        Atomically claim a call for report processing.
+
+        Only one worker process can move a call into 'processing', so duplicate
+        or concurrent webhook deliveries do not generate the report twice. A
+        claim older than CALL_CLAIM_TIMEOUT_SECONDS can be taken over, so a call
+        whose worker died is retried on the next delivery.
+
+        Returns:
+            True if this caller now owns the call, False otherwise
+        """
+        now, stale_before = claim_cutoff()
+        claimed = self._execute(SQL_CLAIM_CALL, (now, call_id, stale_before))
+        return claimed == 1
+
+    def get_call_phone_number(self, call_id):
+        """Get phone number associated with a call"""
+        row = self._fetchone(SQL_SELECT_CALL_PHONE, (call_id,))
+        return row['phone_number'] if row else None
+
+    def get_call_by_tracking_id(self, tracking_id):
+        """
+        Get call details by tracking ID (callSid).
+        This is used when Pixpoc sends callbacks with tracking_id.
+
+        Returns:
+            dict with call_id, phone_number, contact_id, etc. or None
+        """
+        return self._fetchone(SQL_SELECT_CALL_BY_TRACKING_ID, (tracking_id,))
+
+    def get_call_by_id(self, call_id):
+        """
+        Get call details by call ID.
+
+        Returns:
+            dict with call details or None
+        """
+        return self._fetchone(SQL_SELECT_CALL_BY_ID, (call_id,))
+
+
+class GroupCommitWriter:
+    """
+    Background writer that commits concurrent write jobs in batches.
+
+    Jobs submitted within `max_delay` seconds of each other (up to
+    `max_batch`) share one transaction, so a burst of callbacks costs one
+    commit instead of one per write. If a batch fails, its jobs are retried
+    one transaction each so a bad job can't take the others down with it.
+    """
+
+    def __init__(self, repository, max_batch=64, max_delay=0.005):
+        self.repository = repository
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue `func(repository, *args, **kwargs)` for the next batch.
+
+        Returns:
+            concurrent.futures.Future resolved once the batch has committed
+        """
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def close(self):
+        """Flush queued jobs and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _next_batch(self):
+        job = self._queue.get()
+        if job is None:
+            return None
+
+        batch = [job]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            try:
+                with self.repository.transaction():
+                    results = [func(self.repository, *args, **kwargs) for _, func, args, kwargs in batch]
+            except Exception:
+                for future, func, args, kwargs in batch:
+                    try:
+                        with self.repository.transaction():
+                            result = func(self.repository, *args, **kwargs)
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+                continue
+
+            for (future, *_), result in zip(batch, results):
+                future.set_result(result)
+
+
+class SQLiteRepository(Repository):
+    """Repository backed by a single SQLite file"""
+
+    without_rowid = ' WITHOUT ROWID'
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _prepare_directory(self):
+        """Ensure the database directory exists and is writable"""
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Try to create parent directory with write permissions
+            import stat
+            os.chmod(self.db_path.parent, stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)
+        except Exception:
+            pass  # Continue even if chmod fails
+
+    def _open(self):
+        """
+        Open a connection configured for concurrent use by several processes.
+
+        WAL lets readers proceed while one writer commits, and busy_timeout makes
+        writers wait for the lock instead of failing with 'database is locked'.
+        """
+        self._ensure_ready()
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0)
+        conn.execute('PRAGMA busy_timeout = 10000')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def _ensure_ready(self):
+        """Prepare the directory and create the database on first use"""
+        if self._ready:
+            return
+
+        with self._ready_lock:
+            if self._ready:
+                return
+            self._prepare_directory()
+            if not self.db_path.exists():
+                print("📦 Creating database...")
+            # Mark ready first: create_tables opens this thread's connection
+            self._ready = True
+            try:
+                self.create_tables()
+            except Exception:
+                self._ready = False
+                raise
+
+    def create_tables(self):
+        """Create tables, switching the file to WAL (persistent per file)"""
+        self._connection().execute('PRAGMA journal_mode = WAL')
+        super().create_tables()
+
+    def _existing_columns(self, cursor, table):
+        cursor.execute(f'PRAGMA table_info({table})')
+        return {row[1] for row in cursor.fetchall()}
+
+
+class PostgresRepository(Repository):
+    """Repository backed by Postgres via psycopg 3"""
+
+    placeholder = '%s'
+    autoincrement_pk = 'BIGSERIAL PRIMARY KEY'
+
+    def __init__(self, dsn):
+        super().__init__()
+        self.dsn = dsn
+
+    def _open(self):
+        try:
+            import psycopg
+        except ImportError as e:
+            raise RuntimeError("Postgres backend requires psycopg: pip install 'psycopg[binary]'") from e
+        return psycopg.connect(self.dsn)
+
+    def _existing_columns(self, cursor, table):
+        cursor.execute(
+            'SELECT column_name FROM information_schema.columns WHERE table_name = %s',
+            (table,)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def is_postgres_url(url):
+    """Whether a DATABASE_URL points at Postgres"""
+    return bool(url) and url.split('://', 1)[0] in ('postgres', 'postgresql')
+
+
+def create_repository(database_url=None, db_path=None):
+    """
+    Build the repository selected by configuration.
+
+    Args:
+        database_url: postgres:// URL selects Postgres (default: DATABASE_URL)
+        db_path: SQLite file used otherwise (default: DATABASE_PATH)
+    """
+    database_url = database_url if database_url is not None else os.getenv("DATABASE_URL", "")
+    if is_postgres_url(database_url):
+        return PostgresRepository(database_url)
+
+    if db_path is None:
+        db_path = os.getenv("DATABASE_PATH") or Path(__file__).parent / "financebot.db"
+    return SQLiteRepository(db_path)
@@ -0,0 +1,34 @@
+"""
+Snapshot Rollup Job
+Downsamples raw financial snapshots older than the retention window into
+one row per user per month
+
+Run daily from cron (or let the webhook server schedule it, see
+SNAPSHOT_ROLLUP_INTERVAL_HOURS):
+    python -m database.rollup_snapshots
+    python -m database.rollup_snapshots --retention-days 30
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from database.db import rollup_snapshots
+from database.financial_model import SNAPSHOT_RAW_RETENTION_DAYS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up old financial snapshots by month")
+    parser.add_argument("--retention-days", type=int, default=SNAPSHOT_RAW_RETENTION_DAYS,
+                        help="Keep raw snapshots this recent")
+    args = parser.parse_args()
+
+    rolled_up = rollup_snapshots(args.retention_days)
+    print(f"✅ Rolled up {rolled_up} snapshots older than {args.retention_days} days")
+
+
+if __name__ == "__main__":
+    main()
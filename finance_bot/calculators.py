@@ -0,0 +1,200 @@
+"""
+Scenario Calculators
+Vectorized SIP and loan (EMI) schedules for the calculators page and the crew
+
+Rates, amounts and tenures accept scalars or arrays and broadcast against
+each other, with a trailing month axis added for schedules. A 30-year
+return x tenure grid is then a handful of NumPy operations over one
+(scenarios, 360) array instead of a Python loop per scenario per month.
+
+Conventions match streamlit_app/utils/helpers.py: rates are annual
+percentages compounded monthly, SIP instalments are invested at the start of
+each month and loan payments are made at the end of each month.
+"""
+
+import numpy as np
+
+
+def _monthly_growth(annual_rate):
+    """1 + monthly rate for annual percentage rates"""
+    return 1 + np.asarray(annual_rate, dtype=float) / 100 / 12
+
+
+def _months(count):
+    """Month numbers 1..count"""
+    return np.arange(1, int(count) + 1)
+
+
+def sip_schedule(monthly_amount, annual_return, years, step_up=0.0):
+    """
+    Month-by-month SIP schedule for one or many scenarios.
+
+    Args:
+        monthly_amount: First-year monthly investment
+        annual_return: Expected annual return in %
+        years: Investment period; schedules run to the longest one
+        step_up: Yearly % increase of the monthly investment
+
+    Returns:
+        Dict of arrays with the month axis last:
+        month, contribution, invested (cumulative), value
+    """
+    monthly_amount, growth, step_up = np.broadcast_arrays(
+        np.asarray(monthly_amount, dtype=float),
+        _monthly_growth(annual_return),
+        np.asarray(step_up, dtype=float)
+    )
+    months = _months(np.max(years) * 12)
+
+    # Instalment in month m steps up once per completed year
+    contribution = monthly_amount[..., None] * (1 + step_up[..., None] / 100) ** ((months - 1) // 12)
+
+    # value_m = sum_k c_k g^(m-k+1) = g^m * cumsum(c_k g^(1-k))
+    growth = growth[..., None]
+    value = growth ** months * np.cumsum(contribution * growth ** (1 - months), axis=-1)
+
+    return {
+        'month': months,
+        'contribution': contribution,
+        'invested': np.cumsum(contribution, axis=-1),
+        'value': value,
+    }
+
+
+def sip_sensitivity(monthly_amount, annual_returns, years, step_up=0.0):
+    """
+    SIP maturity values over a return x tenure grid.
+
+    Args:
+        monthly_amount: First-year monthly investment
+        annual_returns: 1-D array of annual returns in %
+        years: 1-D array of investment periods in years
+        step_up: Yearly % increase of the monthly investment
+
+    Returns:
+        Dict with `value` and `invested` arrays of shape
+        (len(annual_returns), len(years))
+    """
+    years = np.asarray(years, dtype=int)
+    schedule = sip_schedule(monthly_amount, np.asarray(annual_returns, dtype=float), years.max(), step_up)
+    # Every tenure is a prefix of the longest schedule
+    value = schedule['value'][..., years * 12 - 1]
+    return {
+        'value': value,
+        'invested': np.broadcast_to(schedule['invested'][..., years * 12 - 1], value.shape),
+    }
+
+
+def emi(principal, annual_rate, tenure_months):
+    """Equated monthly instalment (broadcasts over all arguments)"""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / 100 / 12
+    tenure_months = np.asarray(tenure_months, dtype=float)
+
+    factor = (1 + rate) ** tenure_months
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amortizing = principal * rate * factor / (factor - 1)
+    return np.where(rate == 0, principal / tenure_months, amortizing)
+
+
+def loan_schedule(principal, annual_rate, tenure_months, extra_monthly=0.0, lump_sums=None):
+    """
+    Amortization schedule with optional prepayments, for one or many scenarios.
+
+    The EMI is fixed from the original tenure; prepayments shorten the loan.
+    Months after the loan closes have zero payment and balance.
+
+    Args:
+        principal: Loan amount
+        annual_rate: Interest rate in % per annum
+        tenure_months: Original tenure; schedules run to the longest one
+        extra_monthly: Extra principal paid every month on top of the EMI
+        lump_sums: Optional {month: amount} one-time prepayments
+
+    Returns:
+        Dict of arrays with the month axis last: month, payment, interest,
+        principal, balance; plus per-scenario emi, total_interest,
+        total_paid and months (to close)
+    """
+    principal, annual_rate, tenure_months, extra_monthly = np.broadcast_arrays(
+        np.asarray(principal, dtype=float),
+        np.asarray(annual_rate, dtype=float),
+        np.asarray(tenure_months, dtype=int),
+        np.asarray(extra_monthly, dtype=float)
+    )
+    instalment = emi(principal, annual_rate, tenure_months)
+    months = _months(tenure_months.max())
+
+    scheduled = np.broadcast_to((instalment + extra_monthly)[..., None], principal.shape + months.shape).copy()
+    for month, amount in (lump_sums or {}).items():
+        if 1 <= month <= months.size:
+            scheduled[..., month - 1] += amount
+
+    # Without clipping, balance_m = g^m * (P - cumsum(pay_k g^-k)); it keeps
+    # falling once it crosses zero, so clipping at zero closes the loan
+    g = _monthly_growth(annual_rate)[..., None]
+    open_balance = g ** months * (principal[..., None] - np.cumsum(scheduled * g ** -months, axis=-1))
+    balance = np.maximum(open_balance, 0.0)
+    # Float noise can leave a few paise after the final scheduled EMI
+    balance[balance < 0.005] = 0.0
+
+    previous = np.concatenate([principal[..., None], balance[..., :-1]], axis=-1)
+    interest = previous * (g - 1)
+    payment = previous + interest - balance
+    repaid = payment - interest
+
+    return {
+        'month': months,
+        'payment': payment,
+        'interest': interest,
+        'principal': repaid,
+        'balance': balance,
+        'emi': instalment,
+        'total_interest': interest.sum(axis=-1),
+        'total_paid': payment.sum(axis=-1),
+        'months': (payment > 0).sum(axis=-1),
+    }
+
+
+def emi_sensitivity(principal, annual_rates, tenure_years):
+    """
+    EMI and total interest over a rate x tenure grid.
+
+    Args:
+        principal: Loan amount
+        annual_rates: 1-D array of interest rates in %
+        tenure_years: 1-D array of tenures in years
+
+    Returns:
+        Dict with `emi` and `total_interest` arrays of shape
+        (len(annual_rates), len(tenure_years))
+    """
+    tenure_months = np.asarray(tenure_years, dtype=float)[None, :] * 12
+    instalments = emi(principal, np.asarray(annual_rates, dtype=float)[:, None], tenure_months)
+    return {
+        'emi': instalments,
+        'total_interest': instalments * tenure_months - principal,
+    }
+
+
+def yearly(schedule, key, how='last'):
+    """
+    Collapse a monthly schedule array to years.
+
+    Args:
+        schedule: Result of sip_schedule or loan_schedule
+        key: Array to collapse (e.g. 'value', 'balance', 'interest')
+        how: 'last' for balances/values, 'sum' for flows
+
+    Returns:
+        Array with a trailing year axis
+    """
+    values = schedule[key]
+    years = -(-values.shape[-1] // 12)
+    padded = np.zeros(values.shape[:-1] + (years * 12,))
+    padded[..., :values.shape[-1]] = values
+    if how == 'sum':
+        return padded.reshape(values.shape[:-1] + (years, 12)).sum(axis=-1)
+    if values.shape[-1] < years * 12:
+        padded[..., values.shape[-1]:] = values[..., -1:]
+    return padded.reshape(values.shape[:-1] + (years, 12))[..., -1]
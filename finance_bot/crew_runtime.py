@@ -0,0 +1,512 @@
+"""
+Crew Runtime
+Builds and runs any planning crew from its YAML config, so every report type
+gets the same model routing, caching and instrumentation
+
+A crew's config directory holds:
+
+- agents.yaml: role, goal and backstory per agent, plus its `model_tier`,
+  `tools` (names from TOOLS) and `allow_delegation`
+- tasks.yaml: tasks in run order, each with its `agent`, the upstream tasks
+  whose output it sees (`context`) and whether its output is condensed for
+  them (`condense_output`, default true)
+- crew.yaml: the input placeholder tasks embed, the process type and,
+  optionally, a models config other than the shared finance_bot/config/models.yaml
+
+Shared by all crews in a process:
+
+- one ModelRouter per models config, so tier stats accumulate across crews;
+  its provider can be the OpenAI API or a local Ollama stand-in
+- one AgentPool per crew, so agent sets are built once and leased per run
+- a task output cache keyed by a fingerprint of each task's prompt and its
+  upstream tasks' fingerprints, so identical work is not redone within
+  CREW_OUTPUT_CACHE_TTL_SECONDS and a fallback attempt only reruns the
+  tasks that had not finished
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+
+import yaml
+from crewai import Agent, Task, Crew, Process
+from loguru import logger
+
+from finance_bot.model_routing import ModelRouter
+from finance_bot.prompt_compaction import (
+    CONTEXT_TOKEN_BUDGET,
+    compact_json,
+    estimate_tokens,
+    summarize_to_budget,
+)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_CONFIG = os.path.join(PACKAGE_DIR, 'config', 'models.yaml')
+
+# Idle agent sets kept per crew and fallback attempt
+CREW_POOL_SIZE = int(os.getenv("CREW_POOL_SIZE", "2"))
+# Task outputs kept for reuse by identical tasks (0 disables the cache)
+CREW_OUTPUT_CACHE_SIZE = int(os.getenv("CREW_OUTPUT_CACHE_SIZE", "256"))
+CREW_OUTPUT_CACHE_TTL_SECONDS = float(os.getenv("CREW_OUTPUT_CACHE_TTL_SECONDS", "3600"))
+
+# Tools agents can name in agents.yaml, as "module:attribute" imported on first use
+TOOLS = {
+    'search': 'finance_bot.financial_planning.tools.custom_tool:search_tool',
+    'sip_projection': 'finance_bot.financial_planning.tools.calculator_tool:sip_projection_tool',
+    'loan_projection': 'finance_bot.financial_planning.tools.calculator_tool:loan_projection_tool',
+    'goal_projection': 'finance_bot.financial_planning.tools.calculator_tool:goal_projection_tool',
+    'tax_calculator': 'finance_bot.tax_planning.tools.tax_calculator:tax_calculator_tool',
+}
+
+PROCESSES = {
+    'sequential': Process.sequential,
+    'hierarchical': Process.hierarchical,
+}
+
+
+@lru_cache(maxsize=None)
+def load_config(file_path):
+    """Parse a YAML config once; callers must treat the result as read-only"""
+    with open(file_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+@lru_cache(maxsize=None)
+def get_tool(name: str):
+    """Import a tool from TOOLS by name"""
+    module_name, attribute = TOOLS[name].split(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """One task's wiring from tasks.yaml"""
+    name: str
+    agent: str
+    context: tuple
+    condense_output: bool
+
+
+@dataclass(frozen=True)
+class CrewSpec:
+    """A crew's parsed config directory"""
+    name: str
+    agents_config: dict
+    tasks_config: dict
+    tasks: tuple
+    input_name: str
+    process: str
+    manager_tier: Optional[str]
+    models_config: str
+
+
+@lru_cache(maxsize=None)
+def load_crew(config_dir: str) -> CrewSpec:
+    """
+    Parse a crew's agents.yaml, tasks.yaml and crew.yaml.
+
+    Args:
+        config_dir: The crew's config directory
+
+    Returns:
+        CrewSpec, cached per directory
+    """
+    crew_config = load_config(os.path.join(config_dir, 'crew.yaml'))
+    agents_config = load_config(os.path.join(config_dir, 'agents.yaml'))
+    tasks_config = load_config(os.path.join(config_dir, 'tasks.yaml'))
+
+    tasks = []
+    for task_name, task_config in tasks_config.items():
+        agent_name = task_config['agent']
+        if agent_name not in agents_config:
+            raise ValueError(f"Task {task_name} uses unknown agent {agent_name}")
+        context = tuple(task_config.get('context') or ())
+        for upstream in context:
+            if upstream not in tasks_config or upstream == task_name:
+                raise ValueError(f"Task {task_name} has invalid context task {upstream}")
+        tasks.append(TaskSpec(task_name, agent_name, context, task_config.get('condense_output', True)))
+
+    process = crew_config.get('process', 'sequential')
+    if process not in PROCESSES:
+        raise ValueError(f"Unknown crew process: {process}")
+
+    models_config = crew_config.get('models')
+    return CrewSpec(
+        name=crew_config.get('name') or os.path.basename(os.path.dirname(config_dir)),
+        agents_config=agents_config,
+        tasks_config=tasks_config,
+        tasks=tuple(tasks),
+        input_name=crew_config['input'],
+        process=process,
+        manager_tier=crew_config.get('manager_tier'),
+        models_config=os.path.normpath(os.path.join(config_dir, models_config)) if models_config else MODELS_CONFIG,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_router(models_config: str = MODELS_CONFIG) -> ModelRouter:
+    """ModelRouter for a models config, shared by every crew that uses it"""
+    return ModelRouter(load_config(models_config))
+
+
+class AgentPool:
+    """
+    Pool of reusable agent sets for one crew.
+
+    Building the Agents is the bulk of per-run setup, and agents carry no
+    per-run input (that lives on Tasks), so a set is leased exclusively for
+    one crew run and returned afterwards. One free list is kept per fallback
+    attempt since attempts bind different LLMs.
+    """
+
+    def __init__(self, spec: CrewSpec, router: ModelRouter, max_idle: int = CREW_POOL_SIZE):
+        self.spec = spec
+        self.router = router
+        self.max_idle = max_idle
+        self.builds = 0
+        self._idle = {}
+
+    def _build(self, attempt):
+        """Create one agent set on the LLMs each agent's model tier routes to"""
+        agents, agent_models = {}, {}
+        for agent_name, agent_config in self.spec.agents_config.items():
+            tier = self.router.tier_for(agent_config)
+            agent_models[agent_name] = (tier, self.router.model_for(tier, attempt))
+            agents[agent_name] = Agent(
+                role=agent_config['role'],
+                goal=agent_config['goal'],
+                backstory=agent_config['backstory'],
+                verbose=True,
+                allow_delegation=agent_config.get('allow_delegation', False),
+                tools=[get_tool(name) for name in agent_config.get('tools') or []],
+                llm=self.router.llm_for(tier, attempt)
+            )
+        self.builds += 1
+        return agents, agent_models
+
+    @contextmanager
+    def lease(self, attempt=0):
+        """
+        Lease an agent set for one crew run.
+
+        Yields:
+            (agents, agent_models) dicts keyed by agent name
+        """
+        idle = self._idle.setdefault(attempt, queue.LifoQueue(maxsize=self.max_idle))
+        try:
+            agent_set = idle.get_nowait()
+        except queue.Empty:
+            agent_set = self._build(attempt)
+
+        try:
+            yield agent_set
+        finally:
+            try:
+                idle.put_nowait(agent_set)
+            except queue.Full:
+                pass
+
+
+@lru_cache(maxsize=None)
+def get_agent_pool(config_dir: str) -> AgentPool:
+    """AgentPool for a crew, built once per process"""
+    spec = load_crew(config_dir)
+    return AgentPool(spec, get_router(spec.models_config))
+
+
+class TaskOutputCache:
+    """Task outputs by task fingerprint, bounded in size and age"""
+
+    def __init__(self, max_size: int = CREW_OUTPUT_CACHE_SIZE, ttl: float = CREW_OUTPUT_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached output, or None if absent or expired"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                self._items.pop(key, None)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: str, output: str):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic(), output)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by all crews in the process
+output_cache = TaskOutputCache()
+
+
+def _fingerprint(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CrewRuntime:
+    """
+    One run of a crew built from its config directory.
+
+    Subclasses set the input and may override render_input (how the input is
+    embedded in prompts) and reused_outputs (stored task outputs to use
+    instead of running those tasks).
+    """
+
+    def __init__(self, config_dir: str, inputs: dict):
+        """
+        Args:
+            config_dir: The crew's config directory
+            inputs: Data embedded in task prompts at the crew's input placeholder
+        """
+        self.config_dir = config_dir
+        self.spec = load_crew(config_dir)
+        self.inputs = inputs
+        self.router = get_router(self.spec.models_config)
+        self.pool = get_agent_pool(config_dir)
+        self.cache = output_cache
+        self.agents_config = self.spec.agents_config
+        self.tasks_config = self.spec.tasks_config
+        self.context_token_budget = CONTEXT_TOKEN_BUDGET
+        self.outputs = {}
+        self.token_report = {}
+        self.run_stats = {}
+
+        if self.router.requires_api_key() and not os.getenv("OPENAI_API_KEY"):
+            raise ValueError("OPENAI_API_KEY environment variable is required. Please set it in your environment or .env file.")
+
+    def render_input(self) -> str:
+        """The input as embedded in task prompts"""
+        return compact_json(self.inputs)
+
+    def reused_outputs(self) -> Dict[str, str]:
+        """Outputs to use instead of running tasks, by task name"""
+        return {}
+
+    def _description(self, task_name: str, input_json: str) -> str:
+        description = self.tasks_config[task_name]['description']
+        if '{' + self.spec.input_name + '}' in description:
+            description = description.format(**{self.spec.input_name: input_json})
+        return description
+
+    def _task_callback(self, task_name, agent_name, condense_output):
+        """
+        Build a task callback that records token counts and tier latency/cost,
+        optionally condenses the output before downstream tasks see it, and
+        caches it.
+        """
+        def callback(output):
+            now = time.perf_counter()
+            latency = now - self._task_started
+            self._task_started = now
+
+            counts = self.token_report[task_name]
+            counts["output_tokens"] = estimate_tokens(output.raw)
+            if condense_output:
+                output.raw = summarize_to_budget(output.raw, self.context_token_budget)
+                counts["context_tokens"] = estimate_tokens(output.raw)
+            # Stored as downstream tasks saw it, so a reused output reads the same
+            self.outputs[task_name] = output.raw
+            self.cache.put(self.fingerprints[task_name], output.raw)
+
+            input_tokens = counts["prompt_tokens"] + sum(
+                self.token_report[upstream].get("context_tokens", self.token_report[upstream].get("output_tokens", 0))
+                for upstream in counts["upstream"]
+            )
+            tier, model = self.agent_models[agent_name]
+            counts["tier"], counts["model"] = tier, model
+            counts["latency_seconds"] = latency
+            self.router.record(tier, model, latency, input_tokens, counts["output_tokens"])
+        return callback
+
+    def _build_task(self, task_spec: TaskSpec, description: str, context: list, reused_context: dict):
+        """
+        Create a Task and record its prompt token count.
+
+        Outputs of upstream tasks that are not run are appended to the
+        description, since they are not part of this crew's task context.
+        """
+        task_config = self.tasks_config[task_spec.name]
+        for upstream, content in reused_context.items():
+            description += f"\n\nOutput of {upstream} (unchanged since the previous report):\n{content}"
+
+        self.token_report[task_spec.name] = {
+            "source": "run",
+            "prompt_tokens": estimate_tokens(description) + estimate_tokens(task_config['expected_output']),
+            "upstream": [task.name for task in context]
+        }
+
+        return Task(
+            name=task_spec.name,
+            description=description,
+            expected_output=task_config['expected_output'],
+            agent=self.agents[task_spec.agent],
+            context=context,
+            callback=self._task_callback(task_spec.name, task_spec.agent, task_spec.condense_output)
+        )
+
+    def create_tasks(self):
+        """
+        Create the tasks that must run.
+
+        A task is skipped, and its output reused, when reused_outputs supplies
+        it, when this run already produced it on an earlier attempt, or when
+        the output cache holds a task with the same fingerprint.
+        """
+        input_json = self.render_input()
+        descriptions = {task.name: self._description(task.name, input_json) for task in self.spec.tasks}
+
+        self.fingerprints = {}
+        for task in self.spec.tasks:
+            self.fingerprints[task.name] = _fingerprint(
+                descriptions[task.name],
+                self.tasks_config[task.name]['expected_output'],
+                [self.fingerprints[name] for name in task.context]
+            )
+
+        reused = dict(self.reused_outputs())
+        for task in self.spec.tasks:
+            if task.name in reused:
+                source = "reused"
+            elif task.name in self.outputs:
+                reused[task.name], source = self.outputs[task.name], "previous attempt"
+            else:
+                cached = self.cache.get(self.fingerprints[task.name])
+                if cached is None:
+                    continue
+                reused[task.name], source = cached, "cached"
+            self.outputs[task.name] = reused[task.name]
+            self.token_report[task.name] = {"source": source}
+
+        self.tasks = {}
+        for task in self.spec.tasks:
+            if task.name in reused:
+                continue
+            self.tasks[task.name] = self._build_task(
+                task, descriptions[task.name],
+                context=[self.tasks[name] for name in task.context if name in self.tasks],
+                reused_context={name: reused[name] for name in task.context if name in reused}
+            )
+
+        if reused:
+            logger.info(
+                f"Crew [{self.spec.name}] skipping {len(reused)}/{len(self.spec.tasks)} tasks: "
+                + ", ".join(f"{name} ({self.token_report[name]['source']})" for name in reused)
+            )
+
+    def _log_token_report(self):
+        """Log prompt/output token counts per task and cumulative tier usage"""
+        for task_name, counts in self.token_report.items():
+            if counts["source"] != "run":
+                logger.info(f"Tokens [{task_name}]: skipped ({counts['source']})")
+                continue
+            logger.info(
+                f"Tokens [{task_name}] ({counts.get('model', '-')}): prompt={counts.get('prompt_tokens', 0)} "
+                f"output={counts.get('output_tokens', '-')} "
+                f"context={counts.get('context_tokens', '-')}"
+            )
+        for tier, stats in self.router.stats().items():
+            logger.info(
+                f"Tier [{tier}]: tasks={stats['tasks']} "
+                f"avg_latency={stats['avg_latency_seconds']:.1f}s "
+                f"est_cost=${stats['cost_usd']:.4f}"
+            )
+
+    def _run_crew(self, attempt):
+        """Run the crew over the leased agents and the tasks to run"""
+        manager_llm = None
+        if self.spec.process == 'hierarchical':
+            manager_llm = self.router.llm_for(self.spec.manager_tier or self.router.default_tier, attempt)
+        # Every agent stays on the crew so delegating agents can reach the others
+        crew = Crew(
+            agents=list(self.agents.values()),
+            tasks=list(self.tasks.values()),
+            verbose=True,
+            process=PROCESSES[self.spec.process],
+            manager_llm=manager_llm
+        )
+
+        self._task_started = time.perf_counter()
+        crew.kickoff()
+
+    def _kickoff(self, attempt):
+        """Lease agents for a fallback attempt, build the tasks to run and run them"""
+        builds = self.pool.builds
+        with self.pool.lease(attempt) as (agents, agent_models):
+            self.run_stats["agents_built"] = self.pool.builds > builds
+            self.agents, self.agent_models = agents, agent_models
+            self.create_tasks()
+            if self.tasks:
+                self._run_crew(attempt)
+            else:
+                logger.info(f"Crew [{self.spec.name}] has no tasks to run, reusing every output")
+
+    def run(self) -> str:
+        """
+        Execute the crew.
+
+        If a run fails, it is retried with each tier moved one step down its
+        fallback chain until the chains are exhausted; tasks that finished
+        on an earlier attempt are not rerun.
+
+        Returns:
+            Output of the last task (the report)
+        """
+        started = time.perf_counter()
+        attempts = self.router.max_attempts()
+        for attempt in range(attempts):
+            try:
+                self._kickoff(attempt)
+                break
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Crew run failed on attempt {attempt + 1}, falling back: {e}")
+
+        self.run_stats.update(attempts=attempt + 1, seconds=time.perf_counter() - started)
+        self._log_token_report()
+        return self.outputs[self.spec.tasks[-1].name]
+
+    def report(self) -> dict:
+        """
+        Instrumentation for the last run.
+
+        Returns:
+            Dict with the run's stats, per-task token counts and sources,
+            cumulative tier usage and output cache stats
+        """
+        return {
+            'crew': self.spec.name,
+            'run': dict(self.run_stats),
+            'tasks': {name: dict(counts) for name, counts in self.token_report.items()},
+            'tiers': self.router.stats(),
+            'output_cache': self.cache.stats(),
+        }
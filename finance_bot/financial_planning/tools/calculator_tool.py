@@ -0,0 +1,195 @@
+from crewai.tools import tool
+from typing import Optional
+import numpy as np
+
+from finance_bot.calculators import emi_sensitivity, loan_schedule, sip_sensitivity, sip_schedule, yearly
+
+
+def _table(row_label, rows, columns, values, fmt):
+    """Markdown table with one row per `rows` entry and one column per `columns` entry"""
+    lines = [
+        f"| {row_label} | " + " | ".join(columns) + " |",
+        "|---" * (len(columns) + 1) + "|",
+    ]
+    for row, row_values in zip(rows, values):
+        lines.append(f"| {row} | " + " | ".join(fmt(v) for v in row_values) + " |")
+    return "\n".join(lines)
+
+
+@tool("Project SIP growth")
+def sip_projection_tool(
+    monthly_amount: float,
+    annual_return: float,
+    years: int,
+    step_up: Optional[float] = None
+) -> str:
+    """
+    Projects a monthly SIP year by year and shows how the maturity value
+    changes with the expected return and the investment period.
+
+    Args:
+        monthly_amount: Monthly investment in INR
+        annual_return: Expected annual return in % (e.g. 12)
+        years: Investment period in years
+        step_up: Yearly % increase of the monthly investment (default: 0)
+
+    Returns:
+        Yearly projection and a return x period sensitivity table as a formatted string
+    """
+    step_up = step_up or 0
+    years = max(1, int(years))
+    schedule = sip_schedule(monthly_amount, annual_return, years, step_up)
+    invested, value = yearly(schedule, 'invested'), yearly(schedule, 'value')
+
+    milestones = sorted({y for y in (1, 3, 5, 10, 15, 20, 25, 30) if y < years} | {years})
+    projection = "\n".join(
+        f"Year {y}: invested ₹{invested[y - 1]:,.0f}, value ₹{value[y - 1]:,.0f}"
+        for y in milestones
+    )
+
+    returns = np.array([annual_return - 4, annual_return - 2, annual_return, annual_return + 2, annual_return + 4])
+    returns = returns[returns >= 0]
+    periods = np.array(sorted({max(1, years - 5), years, years + 5}))
+    grid = sip_sensitivity(monthly_amount, returns, periods, step_up)
+
+    return f"""SIP Projection (₹{monthly_amount:,.0f}/month at {annual_return}%, {step_up}% yearly step-up):
+{projection}
+Total Invested: ₹{invested[-1]:,.0f}
+Maturity Value: ₹{value[-1]:,.0f}
+Estimated Returns: ₹{value[-1] - invested[-1]:,.0f}
+
+Maturity value by return and period:
+{_table("Return", [f"{r:g}%" for r in returns], [f"{p} yrs" for p in periods], grid['value'], lambda v: f"₹{v:,.0f}")}
+"""
+
+
+@tool("Project loan EMI and prepayments")
+def loan_projection_tool(
+    principal: float,
+    annual_rate: float,
+    tenure_years: int,
+    extra_monthly: Optional[float] = None,
+    lump_sum: Optional[float] = None,
+    lump_sum_month: Optional[int] = None
+) -> str:
+    """
+    Calculates a loan's EMI and interest, the effect of prepayments, and how
+    the EMI changes with the interest rate and tenure.
+
+    Args:
+        principal: Loan amount in INR
+        annual_rate: Interest rate in % per annum
+        tenure_years: Loan tenure in years
+        extra_monthly: Extra principal paid every month (default: 0)
+        lump_sum: One-time prepayment in INR (default: none)
+        lump_sum_month: Month of the one-time prepayment (default: 12)
+
+    Returns:
+        EMI, interest, prepayment savings and a rate x tenure EMI table as a formatted string
+    """
+    tenure_months = max(1, int(tenure_years * 12))
+    lump_sums = {lump_sum_month or 12: lump_sum} if lump_sum else None
+
+    schedule = loan_schedule(principal, annual_rate, tenure_months)
+
+    output = f"""Loan Calculation (₹{principal:,.0f} at {annual_rate}% for {tenure_years} years):
+Monthly EMI: ₹{schedule['emi']:,.0f}
+Total Interest: ₹{schedule['total_interest']:,.0f}
+Total Amount Payable: ₹{schedule['total_paid']:,.0f}
+"""
+    if extra_monthly or lump_sums:
+        prepaid = loan_schedule(principal, annual_rate, tenure_months, extra_monthly or 0, lump_sums)
+        saved = schedule['total_interest'] - prepaid['total_interest']
+        output += f"""
+With prepayments (₹{extra_monthly or 0:,.0f}/month extra{f', ₹{lump_sum:,.0f} in month {lump_sum_month or 12}' if lump_sums else ''}):
+Total Interest: ₹{prepaid['total_interest']:,.0f}
+Interest Saved: ₹{saved:,.0f}
+Loan Closes In: {int(prepaid['months'])} months ({tenure_months - int(prepaid['months'])} months early)
+"""
+
+    rates = np.array([annual_rate - 1, annual_rate - 0.5, annual_rate, annual_rate + 0.5, annual_rate + 1])
+    rates = rates[rates >= 0]
+    tenures = np.array(sorted({max(1, tenure_years - 5), tenure_years, tenure_years + 5}))
+    grid = emi_sensitivity(principal, rates, tenures)
+    output += f"""
+EMI by rate and tenure:
+{_table("Rate", [f"{r:g}%" for r in rates], [f"{t} yrs" for t in tenures], grid['emi'], lambda v: f"₹{v:,.0f}")}
+"""
+    return output
+
+
+@tool("Simulate goal or retirement feasibility")
+def goal_projection_tool(
+    current_savings: float,
+    monthly_investment: float,
+    years_to_goal: int,
+    goal_amount: Optional[float] = None,
+    equity_percent: Optional[float] = None,
+    debt_percent: Optional[float] = None,
+    gold_percent: Optional[float] = None,
+    inflation: Optional[float] = None,
+    step_up: Optional[float] = None,
+    retirement_years: Optional[int] = None,
+    monthly_expense_in_retirement: Optional[float] = None
+) -> str:
+    """
+    Runs a Monte Carlo simulation (10,000 market scenarios) of the user's
+    portfolio to estimate the probability of reaching a goal, or of the
+    corpus lasting through retirement, with percentile ranges of outcomes.
+
+    Args:
+        current_savings: Money already invested toward the goal in INR
+        monthly_investment: Monthly investment in INR
+        years_to_goal: Years until the goal (or until retirement)
+        goal_amount: Target amount in today's INR (default: 0 when planning retirement withdrawals)
+        equity_percent: % of the portfolio in equity (default: 60)
+        debt_percent: % in debt (default: 30)
+        gold_percent: % in gold (default: 10)
+        inflation: Annual inflation % (default: 6)
+        step_up: Yearly % increase of the monthly investment (default: 0)
+        retirement_years: Years the corpus must last after the goal date (default: none)
+        monthly_expense_in_retirement: Monthly withdrawal in retirement in today's INR
+
+    Returns:
+        Success probability and outcome percentiles as a formatted string
+    """
+    from finance_bot.goal_projection import DEFAULT_ALLOCATION, simulate_goal
+
+    allocation = dict(DEFAULT_ALLOCATION)
+    if any(p is not None for p in (equity_percent, debt_percent, gold_percent)):
+        allocation = {'equity': equity_percent or 0, 'debt': debt_percent or 0, 'gold': gold_percent or 0}
+    inflation = 6.0 if inflation is None else inflation
+    years_to_goal = max(1, int(years_to_goal))
+    retirement_years = int(retirement_years or 0)
+
+    result = simulate_goal(
+        initial=current_savings,
+        monthly_contribution=monthly_investment,
+        years=years_to_goal + retirement_years,
+        goal_amount=goal_amount or 0,
+        allocation=allocation,
+        inflation=inflation,
+        step_up=step_up or 0,
+        withdrawal_start_year=years_to_goal if retirement_years else None,
+        monthly_withdrawal=monthly_expense_in_retirement or 0
+    )
+    at_goal = {p: result['bands'][p][years_to_goal - 1] for p in (5, 50, 95)}
+
+    output = f"""Goal Projection ({result['paths']:,} simulated markets, {inflation}% inflation):
+Portfolio: {', '.join(f"{name} {weight:g}%" for name, weight in allocation.items() if weight)} (expected return {result['expected_return']:.1f}%, volatility {result['volatility']:.1f}%)
+Corpus after {years_to_goal} years: ₹{at_goal[50]:,.0f} median (₹{at_goal[5]:,.0f} in a bad market, ₹{at_goal[95]:,.0f} in a good one)
+"""
+    if retirement_years:
+        output += f"""Retirement: ₹{monthly_expense_in_retirement or 0:,.0f}/month (today's money) for {retirement_years} years
+Probability the money lasts: {(1 - result['depletion_probability']) * 100:.0f}%
+"""
+        if result['median_depletion_year']:
+            output += f"When it runs out, typically {result['median_depletion_year']:.0f} years from now\n"
+    if goal_amount:
+        output += f"""Goal: ₹{goal_amount:,.0f} today = ₹{result['goal_nominal']:,.0f} at the end
+Probability of reaching the goal: {result['success_probability'] * 100:.0f}%
+"""
+    output += "Final value percentiles (today's money): " + ", ".join(
+        f"P{p} ₹{v:,.0f}" for p, v in result['real_percentiles'].items()
+    ) + "\n"
+    return output
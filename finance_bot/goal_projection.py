@@ -0,0 +1,210 @@
+"""
+Goal Projection
+Monte Carlo simulation of a portfolio toward a savings goal or through retirement
+
+Monthly returns are drawn per asset class (lognormal, optionally
+correlated) and combined at the target allocation, rebalanced monthly. All
+paths step forward together, so a month is a few NumPy operations over a
+(paths,) array. Large batches are split into fixed-size chunks with their
+own seeds and run on a process pool; because chunking does not depend on
+the worker count, a given seed gives the same answer serially or in
+parallel.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Annual expected return and volatility (%) per asset class
+ASSET_CLASS_ASSUMPTIONS = {
+    'equity': (12.0, 18.0),
+    'debt': (7.0, 3.0),
+    'gold': (8.0, 15.0),
+}
+# Portfolio weights in %; any scale works since weights are normalized
+DEFAULT_ALLOCATION = {'equity': 60, 'debt': 30, 'gold': 10}
+PERCENTILES = (5, 25, 50, 75, 95)
+
+MONTE_CARLO_CHUNK_PATHS = int(os.getenv("MONTE_CARLO_CHUNK_PATHS", "10000"))
+# Batches with more paths than this are spread over the process pool
+MONTE_CARLO_PARALLEL_PATHS = int(os.getenv("MONTE_CARLO_PARALLEL_PATHS", "40000"))
+MONTE_CARLO_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", "0")) or os.cpu_count() or 1
+
+
+@lru_cache(maxsize=1)
+def _process_pool():
+    """Worker processes shared by every large simulation in this process"""
+    return ProcessPoolExecutor(max_workers=MONTE_CARLO_WORKERS)
+
+
+def _asset_params(allocation, assumptions):
+    """Asset names, normalized weights and annual return/volatility (%) for an allocation"""
+    names = [name for name, weight in allocation.items() if weight > 0]
+    weights = np.array([allocation[name] for name in names], dtype=float)
+    annual_return = np.array([assumptions[name][0] for name in names], dtype=float)
+    annual_vol = np.array([assumptions[name][1] for name in names], dtype=float)
+    return names, weights / weights.sum(), annual_return, annual_vol
+
+
+def _simulate_chunk(
+    seed,
+    paths: int,
+    months: int,
+    initial: float,
+    contributions: np.ndarray,
+    withdrawals: np.ndarray,
+    weights: np.ndarray,
+    mean: np.ndarray,
+    sd: np.ndarray,
+    cholesky: Optional[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simulate one chunk of paths.
+
+    Returns:
+        (wealth at each year end (paths, years), depleted flags (paths,),
+        month each path ran out of money or -1)
+    """
+    rng = np.random.default_rng(seed)
+    wealth = np.full(paths, float(initial))
+    yearly = np.empty((paths, months // 12))
+    depleted_at = np.full(paths, -1)
+
+    for month in range(months):
+        shocks = rng.standard_normal((paths, weights.size))
+        if cholesky is not None:
+            shocks = shocks @ cholesky.T
+        growth = np.exp(mean + sd * shocks) @ weights
+
+        # Contribution at the start of the month, withdrawal at the end
+        wealth = (wealth + contributions[month]) * growth - withdrawals[month]
+        newly_depleted = (wealth <= 0) & (depleted_at < 0)
+        depleted_at[newly_depleted] = month + 1
+        wealth = np.maximum(wealth, 0.0)
+
+        if (month + 1) % 12 == 0:
+            yearly[:, month // 12] = wealth
+
+    return yearly, depleted_at >= 0, depleted_at
+
+
+def simulate_goal(
+    initial: float,
+    monthly_contribution: float,
+    years: int,
+    goal_amount: float = 0.0,
+    allocation: Optional[Dict[str, float]] = None,
+    assumptions: Optional[Dict[str, Tuple[float, float]]] = None,
+    correlation: Optional[Sequence[Sequence[float]]] = None,
+    inflation: float = 6.0,
+    step_up: float = 0.0,
+    withdrawal_start_year: Optional[int] = None,
+    monthly_withdrawal: float = 0.0,
+    paths: int = 10000,
+    seed: int = 42,
+    parallel: Optional[bool] = None
+) -> dict:
+    """
+    Project a portfolio over many simulated markets.
+
+    Amounts are in today's money: the goal and withdrawals grow with
+    inflation, contributions grow by `step_up` each year. Contributions stop
+    when withdrawals start.
+
+    Args:
+        initial: Current savings already invested
+        monthly_contribution: Monthly investment in the first year
+        years: Total horizon in years
+        goal_amount: Target corpus at the end, in today's money
+        allocation: Weights per asset class (default: DEFAULT_ALLOCATION)
+        assumptions: (annual return %, volatility %) per asset class
+        correlation: Correlation matrix between the allocation's asset classes
+            (in allocation order); independent if omitted
+        inflation: Annual inflation %
+        step_up: Yearly % increase of the monthly contribution
+        withdrawal_start_year: Year withdrawals begin (e.g. retirement)
+        monthly_withdrawal: Monthly withdrawal in today's money
+        paths: Number of simulated paths
+        seed: Random seed; the same inputs and seed give the same result
+        parallel: Force the process pool on/off (default: by batch size)
+
+    Returns:
+        Dict with success_probability, depletion_probability, goal (nominal),
+        terminal percentiles (nominal and in today's money), yearly
+        percentile bands and the portfolio's expected return/volatility
+    """
+    allocation = allocation or DEFAULT_ALLOCATION
+    assumptions = {**ASSET_CLASS_ASSUMPTIONS, **(assumptions or {})}
+    names, weights, annual_return, annual_vol = _asset_params(allocation, assumptions)
+    corr = np.eye(len(names))
+    if correlation is not None:
+        order = [list(allocation).index(name) for name in names]
+        corr = np.asarray(correlation, dtype=float)[np.ix_(order, order)]
+    cholesky = None if correlation is None else np.linalg.cholesky(corr)
+
+    # Monthly lognormal parameters whose mean matches the annual assumption
+    sd = annual_vol / 100 / np.sqrt(12)
+    mean = np.log1p(annual_return / 100) / 12 - sd ** 2 / 2
+
+    years = max(1, int(years))
+    months = years * 12
+    month_index = np.arange(months)
+    price_level = (1 + inflation / 100) ** (month_index / 12)
+
+    start = months if withdrawal_start_year is None else int(withdrawal_start_year) * 12
+    contributions = np.where(
+        month_index < start,
+        monthly_contribution * (1 + step_up / 100) ** (month_index // 12),
+        0.0
+    )
+    withdrawals = np.where(month_index >= start, monthly_withdrawal * price_level, 0.0)
+
+    # Fixed-size chunks with spawned seeds keep results independent of workers
+    chunk_sizes = [MONTE_CARLO_CHUNK_PATHS] * (paths // MONTE_CARLO_CHUNK_PATHS)
+    if paths % MONTE_CARLO_CHUNK_PATHS:
+        chunk_sizes.append(paths % MONTE_CARLO_CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    jobs = [
+        (chunk_seed, size, months, initial, contributions, withdrawals, weights, mean, sd, cholesky)
+        for chunk_seed, size in zip(seeds, chunk_sizes)
+    ]
+
+    if parallel is None:
+        parallel = paths > MONTE_CARLO_PARALLEL_PATHS and MONTE_CARLO_WORKERS > 1
+    if parallel and len(jobs) > 1:
+        results = list(_process_pool().map(_simulate_chunk, *zip(*jobs)))
+    else:
+        results = [_simulate_chunk(*job) for job in jobs]
+
+    yearly = np.concatenate([r[0] for r in results])
+    depleted = np.concatenate([r[1] for r in results])
+    depleted_at = np.concatenate([r[2] for r in results])
+
+    terminal = yearly[:, -1]
+    inflation_factor = (1 + inflation / 100) ** years
+    goal_nominal = goal_amount * inflation_factor
+    success = (terminal >= goal_nominal) & ~depleted
+
+    bands = np.percentile(yearly, PERCENTILES, axis=0)
+    terminal_percentiles = np.percentile(terminal, PERCENTILES)
+
+    return {
+        'paths': paths,
+        'years': years,
+        'success_probability': float(success.mean()),
+        'depletion_probability': float(depleted.mean()),
+        'median_depletion_year': float(np.median(depleted_at[depleted]) / 12) if depleted.any() else None,
+        'goal_nominal': goal_nominal,
+        'total_contributed': float(contributions.sum() + initial),
+        'percentiles': dict(zip(PERCENTILES, terminal_percentiles.tolist())),
+        'real_percentiles': dict(zip(PERCENTILES, (terminal_percentiles / inflation_factor).tolist())),
+        'bands': {
+            'year': list(range(1, years + 1)),
+            **{p: band.tolist() for p, band in zip(PERCENTILES, bands)},
+        },
+        'expected_return': float(weights @ annual_return),
+        'volatility': float(np.sqrt((weights * annual_vol) @ corr @ (weights * annual_vol))),
+    }
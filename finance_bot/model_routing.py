@@ -0,0 +1,164 @@
+"""
+Model Routing
+Maps crew agents to model tiers, walks fallback chains and tracks per-tier
+latency and cost
+
+Models are served by the configured provider: the OpenAI API, or any
+OpenAI-compatible endpoint (a local Ollama) that runs every tier on one model.
+"""
+
+import os
+import threading
+from loguru import logger
+
+
+class ModelRouter:
+    """
+    Routes agents to LLMs according to a tier configuration (models.yaml).
+
+    Tier usage stats are kept on the router so they accumulate across runs.
+    """
+
+    def __init__(self, models_config: dict):
+        """
+        Initialize router.
+
+        Args:
+            models_config: Parsed models.yaml with `tiers`, `default_tier`,
+                `provider`, `providers` and `prices`
+        """
+        self.tiers = models_config.get('tiers', {})
+        self.prices = models_config.get('prices') or {}
+        self.default_tier = models_config.get('default_tier') or next(iter(self.tiers))
+        self.provider = os.getenv("CREW_LLM_PROVIDER") or models_config.get('provider', 'openai')
+        self.provider_config = dict((models_config.get('providers') or {}).get(self.provider) or {})
+        if os.getenv("CREW_LLM_BASE_URL"):
+            self.provider_config['base_url'] = os.getenv("CREW_LLM_BASE_URL")
+        if os.getenv("CREW_LLM_MODEL"):
+            self.provider_config['model'] = os.getenv("CREW_LLM_MODEL")
+        self._llms = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def requires_api_key(self) -> bool:
+        """Whether the provider needs OPENAI_API_KEY (it configures no key of its own)"""
+        return not self.provider_config.get('api_key')
+
+    def tier_for(self, agent_config: dict) -> str:
+        """Get the tier configured for an agent, falling back to the default tier"""
+        tier = agent_config.get('model_tier', self.default_tier)
+        if tier not in self.tiers:
+            logger.warning(f"Unknown model tier '{tier}', using '{self.default_tier}'")
+            tier = self.default_tier
+        return tier
+
+    def model_chain(self, tier: str) -> list:
+        """
+        Get the ordered list of models to try for a tier.
+
+        The primary model can be overridden with CREW_MODEL_<TIER>. A provider
+        that serves a single model runs every tier on it, with no fallbacks.
+        """
+        tier_config = self.tiers[tier]
+        provider_model = self.provider_config.get('model')
+        primary = os.getenv(f"CREW_MODEL_{tier.upper()}", provider_model or tier_config['model'])
+        chain = [primary]
+        if provider_model:
+            return chain
+        for model in tier_config.get('fallbacks') or []:
+            if model not in chain:
+                chain.append(model)
+        return chain
+
+    def max_attempts(self) -> int:
+        """Number of distinct attempts the longest fallback chain allows"""
+        return max(len(self.model_chain(tier)) for tier in self.tiers)
+
+    def model_for(self, tier: str, attempt: int = 0) -> str:
+        """Get the model for a tier on a given attempt (0 = primary)"""
+        chain = self.model_chain(tier)
+        return chain[min(attempt, len(chain) - 1)]
+
+    def llm_for(self, tier: str, attempt: int = 0):
+        """
+        Get a crewai LLM for a tier on a given attempt.
+
+        LLM clients are cached per (model, temperature) and shared by agents.
+        OpenAI models send through the shared rate-limited HTTP client; a
+        provider with a base_url is called through crewai's native OpenAI
+        client pointed at that endpoint.
+        """
+        from crewai import LLM
+        from services.rate_limiter import openai_http_client
+
+        model = self.model_for(tier, attempt)
+        temperature = self.tiers[tier].get('temperature', 0.1)
+        key = (model, temperature)
+        with self._lock:
+            if key not in self._llms:
+                params = {}
+                base_url = self.provider_config.get('base_url')
+                if base_url:
+                    params.update(
+                        provider='openai',
+                        base_url=base_url,
+                        api_key=self.provider_config.get('api_key') or os.getenv("OPENAI_API_KEY")
+                    )
+                elif '/' not in model or model.startswith('openai/'):
+                    params['client_params'] = {'http_client': openai_http_client()}
+                self._llms[key] = LLM(model=model, temperature=temperature, **params)
+            return self._llms[key]
+
+    def price_for(self, model: str) -> dict:
+        """Per-1K-token prices for a model (`openai/` prefix optional); empty if unpriced"""
+        price = self.prices.get(model)
+        if price is None and model.startswith('openai/'):
+            price = self.prices.get(model[len('openai/'):])
+        return price or {}
+
+    def record(self, tier: str, model: str, latency: float, input_tokens: int, output_tokens: int):
+        """
+        Record one task execution against a tier.
+
+        Args:
+            tier: Tier the agent ran on
+            model: Model actually used
+            latency: Wall-clock seconds for the task
+            input_tokens: Prompt tokens (estimated)
+            output_tokens: Completion tokens (estimated)
+        """
+        price = self.price_for(model) if self.provider_config.get('track_cost', True) else {}
+        cost = (
+            input_tokens / 1000 * price.get('input_cost_per_1k', 0)
+            + output_tokens / 1000 * price.get('output_cost_per_1k', 0)
+        )
+        with self._lock:
+            stats = self._stats.setdefault(tier, {
+                'tasks': 0,
+                'latency_seconds': 0.0,
+                'input_tokens': 0,
+                'output_tokens': 0,
+                'cost_usd': 0.0,
+                'models': {}
+            })
+            stats['tasks'] += 1
+            stats['latency_seconds'] += latency
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['cost_usd'] += cost
+            stats['models'][model] = stats['models'].get(model, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Get cumulative per-tier usage.
+
+        Returns:
+            Dict of tier -> tasks, latency, tokens, estimated cost and
+            average latency per task
+        """
+        with self._lock:
+            snapshot = {}
+            for tier, stats in self._stats.items():
+                snapshot[tier] = dict(stats, models=dict(stats['models']))
+                snapshot[tier]['avg_latency_seconds'] = stats['latency_seconds'] / stats['tasks']
+            return snapshot
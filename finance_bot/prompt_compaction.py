@@ -0,0 +1,114 @@
+"""
+Prompt Compaction
+Shrinks crew task prompts and upstream task context to a token budget
+"""
+
+import json
+import os
+import re
+
+# Default per-task budget for upstream context handed to downstream tasks
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CREW_CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Lines worth keeping first when summarizing markdown output
+_PRIORITY_LINE = re.compile(r"^\s*(#|\|)|\d|₹|%")
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Count tokens in a prompt string.
+
+    Uses tiktoken when installed, otherwise the usual ~4 characters per token
+    approximation for English text.
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _strip_empty(value):
+    """Recursively drop None, empty strings and empty containers"""
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            item = _strip_empty(item)
+            if item is None or item == "" or item == {} or item == []:
+                continue
+            cleaned[key] = item
+        return cleaned
+    if isinstance(value, list):
+        cleaned = [_strip_empty(item) for item in value]
+        return [item for item in cleaned if item is not None and item != "" and item != {} and item != []]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_analysis_data(analysis_data: dict) -> dict:
+    """
+    Remove prompt noise from Pixpoc analysis data.
+
+    Strips nulls and empty values, and drops ``rawResponse`` when ``metadata``
+    already carries the structured version of the same answer.
+
+    Args:
+        analysis_data: Raw analysis data from Pixpoc callback
+
+    Returns:
+        Compacted copy of the analysis data
+    """
+    compacted = _strip_empty(analysis_data or {})
+    if compacted.get("metadata") and "rawResponse" in compacted:
+        del compacted["rawResponse"]
+    return compacted
+
+
+def compact_json(data) -> str:
+    """Serialize data as JSON without indentation or padding whitespace"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def summarize_to_budget(text: str, max_tokens: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Extractively summarize markdown text to fit a token budget.
+
+    Headings, table rows and lines carrying figures (numbers, ₹, %) are kept
+    first, then remaining lines in document order until the budget is spent.
+    Original line order is preserved in the result.
+
+    Args:
+        text: Upstream task output
+        max_tokens: Token budget for the returned text
+
+    Returns:
+        Text that fits within max_tokens
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    ranked = sorted(
+        range(len(lines)),
+        key=lambda i: (0 if _PRIORITY_LINE.search(lines[i]) else 1, i)
+    )
+
+    marker = "[…condensed to fit context budget]"
+    budget = max_tokens - estimate_tokens(marker)
+    keep = set()
+    for index in ranked:
+        cost = estimate_tokens(lines[index]) + 1
+        if cost > budget:
+            continue
+        keep.add(index)
+        budget -= cost
+
+    summary = "\n".join(lines[i] for i in sorted(keep))
+    return f"{summary}\n{marker}"
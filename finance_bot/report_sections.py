@@ -0,0 +1,120 @@
+"""
+Report Sections
+Section-level model of the comprehensive report for incremental regeneration
+
+Every crew task's output is one section. A section's fingerprint hashes
+what the task would see: the task's prompt config, the analysis facts it
+depends on (`depends_on` key patterns in tasks.yaml) and its upstream
+sections' fingerprints. When a follow-up call leaves a section's
+fingerprint unchanged, the stored section is reused instead of rerunning
+the task, and everything downstream of it sees identical input too.
+
+Facts are the call's structured `metadata`, flattened to dotted key paths;
+the transcript and other per-call extras never enter a fingerprint, so two
+calls that establish the same facts produce the same report sections.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+
+def _hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    """Hash of a section's content"""
+    return hashlib.sha256((text or "").encode()).hexdigest()
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, item in value.items():
+            items.update(_flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    return {prefix: value}
+
+
+def analysis_facts(analysis_data: dict) -> Dict[str, object]:
+    """
+    Facts a call established, as {dotted key path: value}.
+
+    Uses the structured metadata; calls that only carry a free-text answer
+    fall back to it as a single fact.
+    """
+    metadata = (analysis_data or {}).get("metadata")
+    if isinstance(metadata, dict) and metadata:
+        return _flatten(metadata)
+    return {"rawResponse": (analysis_data or {}).get("rawResponse")}
+
+
+def relevant_facts(facts: Dict[str, object], patterns: Optional[Sequence[str]]) -> Dict[str, object]:
+    """Facts whose key path contains any of the patterns (all facts if patterns is None)"""
+    if patterns is None:
+        return dict(facts)
+    patterns = [p.lower() for p in patterns]
+    return {key: value for key, value in facts.items() if any(p in key.lower() for p in patterns)}
+
+
+def diff_facts(previous: Dict[str, object], current: Dict[str, object]) -> List[str]:
+    """Key paths added, removed or changed between two fact sets"""
+    return sorted(key for key in previous.keys() | current.keys() if previous.get(key) != current.get(key))
+
+
+@dataclass
+class SectionPlan:
+    """Whether one task reruns, and why"""
+    name: str
+    fingerprint: str
+    inputs: Dict[str, object]
+    reuse: bool = False
+    content: Optional[str] = None
+    changed: List[str] = field(default_factory=list)
+
+
+def plan_sections(
+    task_graph: Sequence[tuple],
+    tasks_config: dict,
+    facts: Dict[str, object],
+    previous: Optional[Dict[str, dict]] = None
+) -> Dict[str, SectionPlan]:
+    """
+    Decide which tasks need rerunning against the user's previous sections.
+
+    Args:
+        task_graph: (task_name, upstream task names) in run order
+        tasks_config: Parsed tasks.yaml
+        facts: analysis_facts() of the current call
+        previous: Stored sections by task name, each with `input_hash`,
+            `inputs` and `content`
+
+    Returns:
+        SectionPlan per task name, in run order
+    """
+    previous = previous or {}
+    plans = {}
+    for task_name, upstream in task_graph:
+        task_config = tasks_config[task_name]
+        inputs = relevant_facts(facts, task_config.get('depends_on'))
+        fingerprint = _hash(
+            task_config['description'],
+            task_config['expected_output'],
+            inputs,
+            [plans[name].fingerprint for name in upstream]
+        )
+        stored = previous.get(task_name)
+        plan = SectionPlan(task_name, fingerprint, inputs)
+        if stored and stored.get('input_hash') == fingerprint:
+            plan.reuse, plan.content = True, stored['content']
+        elif stored:
+            plan.changed = diff_facts(stored.get('inputs') or {}, inputs)
+            plan.changed += [name for name in upstream if not plans[name].reuse]
+        plans[task_name] = plan
+    return plans
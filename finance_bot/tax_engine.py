@@ -0,0 +1,235 @@
+"""
+Tax Engine
+Indian income tax under the old and new regimes, shared by the calculators
+page and the crew's tax_calculator_tool
+
+Slab tables are turned into breakpoint arrays once at import (slab start,
+rate and the tax accumulated below each start), so a liability is a bisect
+and one multiply-add. Results are immutable and memoized on rupee-rounded
+inputs, so slider-driven recalculation is a cache hit.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+CESS_RATE = 0.04
+DEDUCTION_80C_LIMIT = 150000
+DEDUCTION_80D_LIMIT = 50000
+
+
+@dataclass(frozen=True)
+class RegimeRules:
+    """Slabs and allowances for one regime"""
+    name: str
+    # (upper limit of the slab, rate); the last slab is open-ended
+    slabs: Tuple[Tuple[float, float], ...]
+    standard_deduction: float
+    rebate_limit: float
+    rebate: float
+    # Whether Chapter VI-A deductions (80C, 80D, ...) are allowed
+    allows_deductions: bool
+
+
+REGIMES = {
+    'old': RegimeRules(
+        name='old',
+        slabs=((250000, 0.0), (500000, 0.05), (1000000, 0.20), (float('inf'), 0.30)),
+        standard_deduction=0,
+        rebate_limit=500000,
+        rebate=12500,
+        allows_deductions=True,
+    ),
+    # FY 2024-25
+    'new': RegimeRules(
+        name='new',
+        slabs=(
+            (300000, 0.0), (700000, 0.05), (1000000, 0.10),
+            (1200000, 0.15), (1500000, 0.20), (float('inf'), 0.30),
+        ),
+        standard_deduction=75000,
+        rebate_limit=700000,
+        rebate=25000,
+        allows_deductions=False,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Breakpoints:
+    """Precomputed slab starts, rates and tax due below each start"""
+    starts: Tuple[float, ...]
+    rates: Tuple[float, ...]
+    base_tax: Tuple[float, ...]
+
+
+def _breakpoints(rules: RegimeRules) -> Breakpoints:
+    starts, rates, base_tax = [0.0], [], [0.0]
+    for upper, rate in rules.slabs:
+        rates.append(rate)
+        if upper != float('inf'):
+            base_tax.append(base_tax[-1] + (upper - starts[-1]) * rate)
+            starts.append(float(upper))
+    return Breakpoints(tuple(starts), tuple(rates), tuple(base_tax))
+
+
+BREAKPOINTS = {name: _breakpoints(rules) for name, rules in REGIMES.items()}
+
+
+@dataclass(frozen=True)
+class SlabTax:
+    """Tax charged within one slab"""
+    lower: float
+    upper: Optional[float]
+    rate: float
+    tax: float
+
+
+@dataclass(frozen=True)
+class TaxResult:
+    """Liability under one regime"""
+    regime: str
+    gross_income: float
+    standard_deduction: float
+    deductions_80c: float
+    deductions_80d: float
+    deductions_other: float
+    total_deductions: float
+    taxable_income: float
+    tax_before_rebate: float
+    rebate: float
+    income_tax: float
+    cess: float
+    total_tax: float
+    marginal_rate: float
+    effective_rate: float
+    slabs: Tuple[SlabTax, ...]
+
+
+@dataclass(frozen=True)
+class RegimeComparison:
+    """Both regimes for the same inputs"""
+    old: TaxResult
+    new: TaxResult
+    better: str
+    savings: float
+
+
+def slab_tax(taxable_income: float, regime: str) -> Tuple[float, float]:
+    """
+    Tax before rebate and cess, and the marginal slab rate.
+
+    Returns:
+        (tax, marginal rate)
+    """
+    points = BREAKPOINTS[regime]
+    i = bisect_right(points.starts, taxable_income) - 1
+    return points.base_tax[i] + (taxable_income - points.starts[i]) * points.rates[i], points.rates[i]
+
+
+def tax_curve(incomes, regime: str, deductions: float = 0.0) -> np.ndarray:
+    """
+    Total tax (with rebate and cess) for an array of gross incomes, for charts.
+
+    Args:
+        incomes: Gross incomes
+        regime: 'old' or 'new'
+        deductions: Chapter VI-A deductions after limits, ignored under the new regime
+    """
+    rules, points = REGIMES[regime], BREAKPOINTS[regime]
+    allowed = deductions if rules.allows_deductions else 0.0
+    taxable = np.maximum(np.asarray(incomes, dtype=float) - rules.standard_deduction - allowed, 0.0)
+    i = np.searchsorted(points.starts, taxable, side='right') - 1
+    tax = np.asarray(points.base_tax)[i] + (taxable - np.asarray(points.starts)[i]) * np.asarray(points.rates)[i]
+    tax = np.where(taxable <= rules.rebate_limit, np.maximum(tax - rules.rebate, 0.0), tax)
+    return tax * (1 + CESS_RATE)
+
+
+@lru_cache(maxsize=4096)
+def _calculate(income: int, regime: str, deductions_80c: int, deductions_80d: int, deductions_other: int) -> TaxResult:
+    rules, points = REGIMES[regime], BREAKPOINTS[regime]
+
+    if rules.allows_deductions:
+        deductions_80c = min(deductions_80c, DEDUCTION_80C_LIMIT)
+        deductions_80d = min(deductions_80d, DEDUCTION_80D_LIMIT)
+    else:
+        deductions_80c = deductions_80d = deductions_other = 0
+    total_deductions = deductions_80c + deductions_80d + deductions_other
+    taxable_income = max(0, income - rules.standard_deduction - total_deductions)
+
+    tax, marginal_rate = slab_tax(taxable_income, regime)
+    rebate = min(tax, rules.rebate) if taxable_income <= rules.rebate_limit else 0.0
+    income_tax = tax - rebate
+    cess = income_tax * CESS_RATE
+    total_tax = income_tax + cess
+
+    slabs = []
+    uppers = points.starts[1:] + (None,)
+    for lower, upper, rate in zip(points.starts, uppers, points.rates):
+        if taxable_income <= lower:
+            break
+        top = taxable_income if upper is None else min(taxable_income, upper)
+        slabs.append(SlabTax(lower, upper, rate, (top - lower) * rate))
+
+    return TaxResult(
+        regime=regime,
+        gross_income=income,
+        standard_deduction=rules.standard_deduction,
+        deductions_80c=deductions_80c,
+        deductions_80d=deductions_80d,
+        deductions_other=deductions_other,
+        total_deductions=total_deductions,
+        taxable_income=taxable_income,
+        tax_before_rebate=tax,
+        rebate=rebate,
+        income_tax=income_tax,
+        cess=cess,
+        total_tax=total_tax,
+        marginal_rate=marginal_rate,
+        effective_rate=total_tax / income if income else 0.0,
+        slabs=tuple(slabs),
+    )
+
+
+def calculate_tax(
+    income: float,
+    regime: str = 'old',
+    deductions_80c: float = 0,
+    deductions_80d: float = 0,
+    deductions_other: float = 0
+) -> TaxResult:
+    """
+    Income tax under one regime (memoized on rupee-rounded inputs).
+
+    Args:
+        income: Gross total income in INR
+        regime: 'old' or 'new'
+        deductions_80c: Section 80C deductions (capped at 1.5 lakh)
+        deductions_80d: Section 80D deductions (capped at 50,000)
+        deductions_other: Other deductions
+
+    Returns:
+        TaxResult (immutable; shared between callers)
+    """
+    if regime not in REGIMES:
+        raise ValueError(f"Unknown tax regime: {regime}")
+    return _calculate(
+        round(income or 0), regime,
+        round(deductions_80c or 0), round(deductions_80d or 0), round(deductions_other or 0)
+    )
+
+
+def compare_regimes(
+    income: float,
+    deductions_80c: float = 0,
+    deductions_80d: float = 0,
+    deductions_other: float = 0
+) -> RegimeComparison:
+    """Both regimes side by side, with the cheaper one and how much it saves"""
+    old = calculate_tax(income, 'old', deductions_80c, deductions_80d, deductions_other)
+    new = calculate_tax(income, 'new', deductions_80c, deductions_80d, deductions_other)
+    better = 'new' if new.total_tax <= old.total_tax else 'old'
+    return RegimeComparison(old=old, new=new, better=better, savings=abs(old.total_tax - new.total_tax))
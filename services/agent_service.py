@@ -3,10 +3,11 @@ Agent Service
 Orchestrates CrewAI financial agents and processes Pixpoc data
 """
 
+import asyncio
 import json
 import sys
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 from loguru import logger
 
@@ -18,15 +19,42 @@ sys.path.insert(0, str(project_root))
 class AgentService:
     """Service for managing AI agent execution"""
     
+    async def load_report_sections(self, phone_number: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        A user's stored report sections, for run_comprehensive_planning.
+        
+        Lets callers load them alongside other lookups; a failed read
+        regenerates every section rather than failing the report.
+        """
+        if not phone_number:
+            return None
+        try:
+            from database.async_db import get_report_sections
+            return await get_report_sections(phone_number)
+        except Exception as e:
+            logger.warning(f"Could not load report sections for {phone_number}: {e}")
+            return {}
+    
     async def run_comprehensive_planning(
         self, 
-        analysis_data: Dict[str, Any]
+        analysis_data: Dict[str, Any],
+        phone_number: Optional[str] = None,
+        call_id: Optional[str] = None,
+        previous_sections: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Execute Comprehensive Planning Agent (Financial + Tax).
         
+        With a phone number, the user's stored report sections are used so
+        only sections whose inputs changed are regenerated, and the new
+        sections are stored after a successful run.
+        
         Args:
             analysis_data: Raw analysis data from Pixpoc (no parsing needed)
+            phone_number: User's phone number (enables section reuse)
+            call_id: Pixpoc call UUID the sections are recorded against
+            previous_sections: Sections already loaded with
+                load_report_sections (default: loaded here)
             
         Returns:
             Markdown report from agent
@@ -38,10 +66,22 @@ class AgentService:
             # Import here to avoid circular dependencies
             try:
                 from finance_bot.comprehensive_planning.main import ComprehensivePlanningCrew
+                from database.async_db import save_report_sections
+                
+                if previous_sections is None:
+                    previous_sections = await self.load_report_sections(phone_number)
+                
+                # Pass raw analysis data - agents will understand JSON dynamically.
+                # Crew runs block for minutes, so keep them off the event loop;
+                # agents are leased from a pool so concurrent runs are safe.
+                crew = ComprehensivePlanningCrew(analysis_data, previous_sections)
+                result = await asyncio.to_thread(crew.run)
                 
-                # Pass raw analysis data - agents will understand JSON dynamically
-                crew = ComprehensivePlanningCrew(analysis_data)
-                result = crew.run()
+                if phone_number:
+                    try:
+                        await save_report_sections(phone_number, call_id, crew.sections())
+                    except Exception as e:
+                        logger.warning(f"Could not store report sections for {phone_number}: {e}")
                 
                 logger.info(f"Comprehensive Planning Agent completed successfully")
                 return str(result)
@@ -81,7 +121,10 @@ Please try again later or contact support.
     async def process_call_and_generate_report(
         self, 
         pixpoc_data: Dict[str, Any],
-        agent_type: str = "comprehensive_planning"
+        agent_type: str = "comprehensive_planning",
+        phone_number: Optional[str] = None,
+        call_id: Optional[str] = None,
+        previous_sections: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Process Pixpoc call data and generate report using AI agents.
@@ -89,6 +132,9 @@ Please try again later or contact support.
         Args:
             pixpoc_data: Raw data from Pixpoc (analysis callback)
             agent_type: Type of agent to run (default: comprehensive_planning)
+            phone_number: User's phone number, to reuse unchanged report sections
+            call_id: Pixpoc call UUID
+            previous_sections: The user's report sections, if already loaded
             
         Returns:
             Markdown report from agent
@@ -97,7 +143,7 @@ Please try again later or contact support.
             logger.info(f"Processing with agent type: {agent_type}")
             
             # Run comprehensive planning (financial + tax)
-            report = await self.run_comprehensive_planning(pixpoc_data)
+            report = await self.run_comprehensive_planning(pixpoc_data, phone_number, call_id, previous_sections)
             
             return report
             
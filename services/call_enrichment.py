@@ -0,0 +1,175 @@
+"""
+Call Enrichment
+Adds the call transcript and details to the analysis data the agents see
+
+The full call record comes from `PixpocClient.get_full_call_data` (details,
+analysis and transcript fetched in parallel over the pooled client).
+Transcripts don't change once a call has completed, so the record is cached
+on disk by call id and reused when a callback is retried or reprocessed.
+The records hold customer transcripts, so the cache lives outside the
+project (system temp dir by default) and is bounded: each write purges
+records older than TRANSCRIPT_CACHE_MAX_AGE_HOURS and the oldest beyond
+TRANSCRIPT_CACHE_MAX_FILES. Transcripts are trimmed to a token budget
+before they reach a prompt.
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from finance_bot.prompt_compaction import estimate_tokens, summarize_to_budget
+from services.pixpoc_client import PixpocClient
+
+project_root = Path(__file__).parent.parent
+
+CALL_ENRICHMENT_ENABLED = os.getenv("CALL_ENRICHMENT_ENABLED", "1") == "1"
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "2000"))
+# Only retries and reprocessing reuse a record, so it need not outlive them
+TRANSCRIPT_CACHE_MAX_AGE_HOURS = float(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_HOURS", "48"))
+TRANSCRIPT_CACHE_MAX_FILES = int(os.getenv("TRANSCRIPT_CACHE_MAX_FILES", "1000"))
+# Enrichment is best-effort; never hold up a report for longer than this
+CALL_ENRICHMENT_TIMEOUT_SECONDS = float(os.getenv("CALL_ENRICHMENT_TIMEOUT_SECONDS", "10"))
+
+# Call detail fields worth passing to the agents
+CALL_DETAIL_KEYS = ("status", "direction", "duration", "durationSeconds", "startedAt", "endedAt")
+
+
+def _cache_dir() -> Path:
+    path = Path(os.getenv("TRANSCRIPT_CACHE_PATH") or Path(tempfile.gettempdir()) / "financebot-transcripts")
+    return path if path.is_absolute() else project_root / path
+
+
+def _cache_file(call_id: str) -> Path:
+    return _cache_dir() / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', call_id)}.json"
+
+
+def _read_cache(call_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_cache_file(call_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(call_id: str, call_data: Dict[str, Any]):
+    path = _cache_file(call_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(call_data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    _purge_cache(path.parent)
+
+
+def _purge_cache(cache_dir: Path):
+    """Delete records past the age limit, then the oldest beyond the file limit"""
+    cutoff = time.time() - TRANSCRIPT_CACHE_MAX_AGE_HOURS * 3600
+    records = []
+    for entry in os.scandir(cache_dir):
+        try:
+            modified = entry.stat().st_mtime
+            if modified < cutoff:
+                os.unlink(entry.path)
+            elif entry.name.endswith(".json"):
+                records.append((modified, entry.path))
+        except OSError:
+            continue
+    records.sort()
+    for _, path in records[:max(len(records) - TRANSCRIPT_CACHE_MAX_FILES, 0)]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def transcript_text(transcript: Any) -> str:
+    """Flatten a transcript (text, or a list of turns) into one line per turn"""
+    if not transcript:
+        return ""
+    if isinstance(transcript, str):
+        return transcript
+
+    lines = []
+    for turn in transcript:
+        if isinstance(turn, dict):
+            speaker = turn.get("role") or turn.get("speaker") or ""
+            text = turn.get("content") or turn.get("text") or turn.get("message") or ""
+            lines.append(f"{speaker}: {text}" if speaker else str(text))
+        else:
+            lines.append(str(turn))
+    return "\n".join(line for line in lines if line.strip())
+
+
+def trim_transcript(transcript: Any, max_tokens: int = TRANSCRIPT_TOKEN_BUDGET) -> str:
+    """
+    Fit a transcript into a token budget.
+
+    Turns mentioning figures (amounts, ₹, %) are kept first, then the rest in
+    call order; see prompt_compaction.summarize_to_budget.
+    """
+    return summarize_to_budget(transcript_text(transcript), max_tokens)
+
+
+async def fetch_call_data(pixpoc_client: PixpocClient, call_id: str) -> Dict[str, Any]:
+    """Full call record, from the local cache when this call was seen before"""
+    call_data = await asyncio.to_thread(_read_cache, call_id)
+    if call_data is not None:
+        logger.info(f"Transcript cache hit for call {call_id}")
+        return call_data
+
+    call_data = await pixpoc_client.get_full_call_data(call_id)
+    # Only cache once the transcript is there; it may lag the callback
+    if call_data.get("transcript"):
+        try:
+            await asyncio.to_thread(_write_cache, call_id, call_data)
+        except OSError as e:
+            logger.warning(f"Could not cache transcript for call {call_id}: {e}")
+    return call_data
+
+
+async def enrich_call(
+    pixpoc_client: PixpocClient,
+    call_id: str,
+    max_tokens: int = TRANSCRIPT_TOKEN_BUDGET,
+    timeout: float = CALL_ENRICHMENT_TIMEOUT_SECONDS
+) -> Dict[str, Any]:
+    """
+    Get the extra call context for the agents.
+
+    Args:
+        pixpoc_client: Shared Pixpoc client
+        call_id: Pixpoc call UUID
+        max_tokens: Token budget for the transcript
+        timeout: Give up (and enrich nothing) after this many seconds
+
+    Returns:
+        Dict with `transcript` and `callDetails` where available; empty if
+        enrichment is disabled or the fetch failed
+    """
+    if not CALL_ENRICHMENT_ENABLED:
+        return {}
+
+    try:
+        call_data = await asyncio.wait_for(fetch_call_data(pixpoc_client, call_id), timeout)
+    except Exception as e:
+        logger.warning(f"Call enrichment skipped for {call_id}: {e!r}")
+        return {}
+
+    enrichment = {}
+    transcript = trim_transcript(call_data.get("transcript"), max_tokens)
+    if transcript:
+        enrichment["transcript"] = transcript
+        logger.info(f"Transcript added for call {call_id} ({estimate_tokens(transcript)} tokens)")
+
+    details = call_data.get("call") or {}
+    call_details = {key: details[key] for key in CALL_DETAIL_KEYS if details.get(key) is not None}
+    if call_details:
+        enrichment["callDetails"] = call_details
+    return enrichment
@@ -0,0 +1,293 @@
+"""
+Campaign Service
+Bulk outbound calling: ingest a contact list, dial it concurrently through
+the pooled Pixpoc client and stream progress back
+
+A campaign runs as a background job: the progress stream only relays its
+events, so a client that disconnects mid-campaign does not stop the calls
+being placed or recorded.
+
+Contacts come from CSV (a `phone` or `phone_number` column, optional `name`,
+every other column passed to the agent as contact data) or JSONL (one object
+per line with the same keys).
+"""
+
+import asyncio
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+
+from database import async_db
+from services.pixpoc_client import PixpocClient
+
+PHONE_KEYS = ("phone", "phone_number", "phoneNumber", "toNumber")
+NAME_KEYS = ("name", "contact_name", "contactName")
+
+# Attempts at the final save of a campaign's placed calls before it reports an error
+SAVE_ATTEMPTS = 3
+
+
+def _contact_from_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Split a CSV row / JSON object into phone, name and contact data"""
+    phone = next((str(record[key]).strip() for key in PHONE_KEYS if record.get(key)), None)
+    if not phone:
+        return None
+    name = next((str(record[key]).strip() for key in NAME_KEYS if record.get(key)), None)
+    data = {
+        key: value for key, value in record.items()
+        if key not in PHONE_KEYS and key not in NAME_KEYS and value not in (None, "")
+    }
+    return {"phone": phone, "name": name, "data": data}
+
+
+def parse_contacts(content: str, format: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Parse a contact list.
+
+    Args:
+        content: CSV or JSONL text
+        format: 'csv' or 'jsonl' (default: JSONL if the first line is a JSON object)
+
+    Returns:
+        Contacts as dicts with phone, name and data; rows without a phone
+        number are dropped
+    """
+    content = content.lstrip("﻿")
+    if format is None:
+        format = "jsonl" if content.lstrip().startswith("{") else "csv"
+
+    if format == "jsonl":
+        records = [json.loads(line) for line in content.splitlines() if line.strip()]
+    elif format == "csv":
+        records = list(csv.DictReader(io.StringIO(content)))
+    else:
+        raise ValueError(f"Unsupported contact format: {format}")
+
+    contacts = [_contact_from_record(record) for record in records]
+    return [contact for contact in contacts if contact]
+
+
+# Campaign jobs still running, referenced so they finish after their stream closes
+_running_jobs = set()
+
+
+class DialPacer:
+    """
+    Spaces out one campaign's dials so at most `rate` start per second.
+
+    Only paces this campaign; every Pixpoc request still goes through the
+    shared services.rate_limiter bucket as well.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CampaignService:
+    """Dials a contact list with bounded concurrency and a call rate limit"""
+
+    def __init__(
+        self,
+        pixpoc_client: PixpocClient,
+        agent_id: str,
+        from_number_id: Optional[str] = None,
+        concurrency: int = 10,
+        calls_per_second: float = 5.0,
+        save_batch_size: int = 50,
+        dedup_hours: float = 24.0
+    ):
+        """
+        Initialize campaign service.
+
+        Args:
+            pixpoc_client: Shared Pixpoc client (its connection pool is reused)
+            agent_id: Pixpoc agent to place the calls with
+            from_number_id: Optional from number UUID
+            concurrency: Max calls being initiated at once
+            calls_per_second: Max call initiations per second
+            save_batch_size: Calls saved to the database per transaction
+            dedup_hours: Skip numbers already called within this window (0 disables)
+        """
+        self.pixpoc_client = pixpoc_client
+        self.agent_id = agent_id
+        self.from_number_id = from_number_id
+        self.concurrency = max(1, concurrency)
+        self.pacer = DialPacer(calls_per_second)
+        self.save_batch_size = max(1, save_batch_size)
+        self.dedup_hours = dedup_hours
+
+    async def _dedupe(self, contacts: List[Dict[str, Any]]):
+        """Normalize numbers, drop repeats within the list and recently called numbers"""
+        unique, skipped = {}, []
+        for contact in contacts:
+            phone = PixpocClient.to_e164(contact["phone"])
+            if phone in unique:
+                skipped.append({"phone": phone, "reason": "duplicate in list"})
+            else:
+                unique[phone] = dict(contact, phone=phone)
+
+        if self.dedup_hours > 0 and unique:
+            since = (datetime.now() - timedelta(hours=self.dedup_hours)).isoformat()
+            recent = await async_db.recently_called_numbers(list(unique), since)
+            for phone in recent:
+                del unique[phone]
+                skipped.append({"phone": phone, "reason": f"called in the last {self.dedup_hours:g}h"})
+
+        return list(unique.values()), skipped
+
+    async def _dial(self, contact: Dict[str, Any]) -> Dict[str, Any]:
+        """Initiate one call, returning a progress event"""
+        await self.pacer.acquire()
+        try:
+            result = await self.pixpoc_client.initiate_call(
+                phone_number=contact["phone"],
+                agent_id=self.agent_id,
+                contact_name=contact.get("name"),
+                contact_data=contact.get("data") or None,
+                from_number_id=self.from_number_id
+            )
+            return {
+                "type": "call",
+                "phone": contact["phone"],
+                "status": "initiated",
+                "call_id": result["call"]["id"],
+                "tracking_id": result["call"].get("trackingId"),
+                "contact_id": (result.get("contact") or {}).get("id"),
+                "campaign_id": (result.get("campaign") or {}).get("id")
+            }
+        except Exception as e:
+            return {"type": "call", "phone": contact["phone"], "status": "failed", "error": str(e)}
+
+    async def _execute(self, to_dial: List[Dict[str, Any]], skipped: list, started: float, progress: asyncio.Queue):
+        """
+        Dial and record every contact, putting progress events on `progress`.
+
+        Runs independently of whoever reads `progress`. Initiated calls are
+        saved in batches; if the job is cancelled (server shutdown), no new
+        dials start, in-flight dials are allowed to finish and every call
+        they placed is saved before it exits.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for contact in to_dial:
+            queue.put_nowait(contact)
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    contact = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await events.put(await self._dial(contact))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(to_dial)))]
+        pending_saves: List[Dict[str, Any]] = []
+        counts = {"initiated": 0, "failed": 0}
+        done = 0
+
+        def record(event):
+            nonlocal done
+            done += 1
+            counts[event["status"]] += 1
+            if event["status"] == "initiated":
+                pending_saves.append({
+                    "phone_number": event["phone"],
+                    "call_id": event["call_id"],
+                    "tracking_id": event["tracking_id"],
+                    "contact_id": event["contact_id"],
+                    "campaign_id": event["campaign_id"]
+                })
+            progress.put_nowait(dict(event, done=done, total=len(to_dial)))
+
+        async def flush():
+            # Calls stay queued until saved; save_calls upserts, so a retry is safe
+            if pending_saves:
+                await async_db.save_calls(pending_saves[:])
+                pending_saves.clear()
+
+        async def final_flush():
+            for attempt in range(1, SAVE_ATTEMPTS + 1):
+                try:
+                    return await flush()
+                except Exception as e:
+                    if attempt == SAVE_ATTEMPTS:
+                        logger.error(f"Could not save {len(pending_saves)} placed campaign calls: {e}")
+                        raise
+                    logger.warning(f"Saving campaign calls failed, retrying: {e}")
+                    await asyncio.sleep(attempt)
+
+        try:
+            while done < len(to_dial):
+                record(await events.get())
+                if len(pending_saves) >= self.save_batch_size:
+                    try:
+                        await flush()
+                    except Exception as e:
+                        # Kept queued for the next batch or the final flush
+                        logger.warning(f"Saving campaign calls failed, will retry: {e}")
+        finally:
+            # Stop handing out contacts, but let dials already sent finish:
+            # their calls may have been placed and must be recorded
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.gather(*workers, return_exceptions=True)
+            while not events.empty():
+                record(events.get_nowait())
+            await final_flush()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"📞 Campaign finished: {counts['initiated']} initiated, {counts['failed']} failed in {elapsed:.1f}s")
+        progress.put_nowait({
+            "type": "completed",
+            "total": len(to_dial),
+            "skipped": len(skipped),
+            "elapsed_seconds": round(elapsed, 2),
+            **counts
+        })
+
+    async def _job(self, to_dial, skipped, started, progress: asyncio.Queue):
+        try:
+            await self._execute(to_dial, skipped, started, progress)
+        except Exception as e:
+            logger.error(f"Campaign failed: {e}")
+            progress.put_nowait({"type": "error", "error": str(e)})
+
+    async def run(self, contacts: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Start dialling every contact in the background, yielding progress
+        events as calls are placed.
+
+        Events: one 'started' (with totals and skipped numbers), one 'call'
+        per dialled contact, and a final 'completed' summary (or 'error' if
+        saving calls failed). Closing the iterator early does not stop the
+        campaign.
+        """
+        started = time.perf_counter()
+        to_dial, skipped = await self._dedupe(contacts)
+        yield {"type": "started", "total": len(to_dial), "skipped": skipped}
+
+        progress: asyncio.Queue = asyncio.Queue()
+        job = asyncio.create_task(self._job(to_dial, skipped, started, progress))
+        _running_jobs.add(job)
+        job.add_done_callback(_running_jobs.discard)
+
+        while True:
+            event = await progress.get()
+            yield event
+            if event["type"] in ("completed", "error"):
+                return
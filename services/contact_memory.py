@@ -0,0 +1,222 @@
+"""
+Contact Memory
+Incrementally updated memory of a user's calls, kept locally and written to
+the Pixpoc contact's `memory` metadata
+
+The memory has three levels so that the cost of an update does not grow
+with the number of calls:
+
+- profile: the latest value of every fact the calls established (the
+  analysis metadata flattened to key paths), updated by delta with no model
+  call
+- notes: one short note per recent call, written from the facts that
+  changed and a budget-trimmed excerpt of its report
+- history: once more than MEMORY_RECENT_CALLS notes pile up, the oldest are
+  folded into a bounded summary of earlier calls
+
+Every model prompt is built from bounded pieces (changed facts, a report
+excerpt, the history and a few notes), and the state is stored in the
+contact_memory table, so Pixpoc's copy is only read to seed a contact this
+server has never seen.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.async_db import get_contact_memory, save_contact_memory
+from services.contact_metadata import get_metadata
+from finance_bot.prompt_compaction import estimate_tokens, summarize_to_budget
+from finance_bot.report_sections import analysis_facts
+
+MEMORY_MODEL = os.getenv("MEMORY_MODEL", "gpt-4o-mini")
+# Notes kept verbatim before the oldest are folded into the history
+MEMORY_RECENT_CALLS = int(os.getenv("MEMORY_RECENT_CALLS", "5"))
+MEMORY_REPORT_TOKENS = int(os.getenv("MEMORY_REPORT_TOKENS", "800"))
+MEMORY_NOTE_TOKENS = int(os.getenv("MEMORY_NOTE_TOKENS", "150"))
+MEMORY_HISTORY_TOKENS = int(os.getenv("MEMORY_HISTORY_TOKENS", "400"))
+# Budget for the rendered memory sent to Pixpoc
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "1500"))
+
+SYSTEM_PROMPT = (
+    "You are a financial advisor assistant that keeps concise, factual notes "
+    "about a client's financial situation across calls."
+)
+
+
+def empty_state() -> Dict[str, Any]:
+    """Memory of a contact with no calls yet"""
+    return {"profile": {}, "notes": [], "history": "", "calls": 0}
+
+
+def merge_facts(profile: Dict[str, Any], facts: Dict[str, Any]) -> Tuple[Dict[str, Any], List[tuple]]:
+    """
+    Apply a call's facts to the rolling profile.
+
+    Returns:
+        (updated profile, [(key, previous value, new value)] for facts that changed)
+    """
+    changes = [(key, profile.get(key), value) for key, value in facts.items() if profile.get(key) != value]
+    return {**profile, **facts}, changes
+
+
+def _format_value(value) -> str:
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+def format_changes(changes: List[tuple]) -> str:
+    """Changed facts as markdown bullets"""
+    lines = []
+    for key, before, after in changes:
+        if before is None:
+            lines.append(f"- {key}: {_format_value(after)}")
+        else:
+            lines.append(f"- {key}: {_format_value(before)} -> {_format_value(after)}")
+    return "\n".join(lines)
+
+
+def render_memory(state: Dict[str, Any], max_tokens: int = MEMORY_MAX_TOKENS) -> str:
+    """Memory text for the Pixpoc contact: profile, earlier history and recent calls"""
+    parts = []
+    if state["profile"]:
+        parts.append("## Financial Profile\n" + "\n".join(
+            f"- {key}: {_format_value(value)}" for key, value in sorted(state["profile"].items())
+        ))
+    if state["history"]:
+        parts.append("## Earlier Calls\n" + state["history"])
+    if state["notes"]:
+        parts.append("## Recent Calls\n" + "\n\n".join(
+            f"### {note['date'][:10]}\n{note['text']}" for note in state["notes"]
+        ))
+    return summarize_to_budget("\n\n".join(parts), max_tokens)
+
+
+class ContactMemory:
+    """Updates a contact's memory after each report"""
+
+    def __init__(self, openai_client_factory):
+        """
+        Args:
+            openai_client_factory: Returns the shared (sync) OpenAI client
+        """
+        self.openai_client_factory = openai_client_factory
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        """One chat completion, run off the event loop"""
+        response = await asyncio.to_thread(
+            self.openai_client_factory().chat.completions.create,
+            model=MEMORY_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _call_note(self, changes: List[tuple], report: str) -> str:
+        """Short note on what a call established or changed"""
+        changed = format_changes(changes) or "No structured facts changed."
+        prompt = f"""Write a note of at most 80 words on this call for the client's file: what changed in their finances and the main recommendations. Use plain sentences or short bullets.
+
+FACTS ESTABLISHED OR CHANGED:
+{changed}
+
+REPORT EXCERPT:
+{summarize_to_budget(report, MEMORY_REPORT_TOKENS)}"""
+        try:
+            return await self._complete(prompt, MEMORY_NOTE_TOKENS)
+        except Exception as e:
+            logger.warning(f"Memory note generation failed, keeping changed facts only: {e}")
+            return changed
+
+    async def _compact(self, history: str, notes: List[dict]) -> str:
+        """Fold the oldest call notes into the history summary"""
+        folded = "\n\n".join(f"{note['date'][:10]}: {note['text']}" for note in notes)
+        prompt = f"""Merge these older call notes into the summary of the client's earlier calls. Keep decisions, life events and how their finances evolved; drop details superseded later. At most 200 words.
+
+SUMMARY SO FAR:
+{history or "None yet."}
+
+NOTES TO MERGE:
+{folded}"""
+        try:
+            return await self._complete(prompt, MEMORY_HISTORY_TOKENS)
+        except Exception as e:
+            logger.warning(f"Memory compaction failed, condensing extractively: {e}")
+            return summarize_to_budget(f"{history}\n{folded}".strip(), MEMORY_HISTORY_TOKENS)
+
+    async def _load(self, phone_number: str, contact_id: Optional[str], pixpoc_client) -> Dict[str, Any]:
+        """Stored state, or a fresh one seeded from the memory Pixpoc already holds"""
+        stored = await get_contact_memory(phone_number)
+        if stored:
+            return stored["state"]
+
+        state = empty_state()
+        if contact_id and pixpoc_client is not None:
+            try:
+                metadata = await get_metadata(contact_id, pixpoc_client, phone_number)
+                existing = metadata.get("memory") or ""
+                if existing:
+                    state["history"] = summarize_to_budget(existing, MEMORY_HISTORY_TOKENS)
+                    logger.info(f"Seeded memory from contact metadata: {len(existing)} characters")
+            except Exception as e:
+                logger.warning(f"Could not fetch existing metadata (contact might be new): {e}")
+        return state
+
+    async def update(
+        self,
+        phone_number: str,
+        contact_id: Optional[str],
+        call_id: str,
+        analysis_data: Dict[str, Any],
+        report: str,
+        pixpoc_client=None
+    ) -> str:
+        """
+        Fold one call into the contact's memory and store it.
+
+        Args:
+            phone_number: User's phone number
+            contact_id: Pixpoc contact ID
+            call_id: Pixpoc call UUID (a reprocessed call replaces its note)
+            analysis_data: Analysis data from the call callback
+            report: Markdown report generated for the call
+            pixpoc_client: Used only to seed a contact never stored locally
+
+        Returns:
+            Rendered memory text
+        """
+        state = await self._load(phone_number, contact_id, pixpoc_client)
+
+        facts = analysis_facts(analysis_data) if (analysis_data or {}).get("metadata") else {}
+        state["profile"], changes = merge_facts(state["profile"], facts)
+
+        notes = [note for note in state["notes"] if note["call_id"] != call_id]
+        if len(notes) == len(state["notes"]):
+            state["calls"] += 1
+        notes.append({
+            "call_id": call_id,
+            "date": datetime.now().isoformat(),
+            "text": await self._call_note(changes, report)
+        })
+
+        overflow = len(notes) - MEMORY_RECENT_CALLS
+        if overflow > 0:
+            state["history"] = await self._compact(state["history"], notes[:overflow])
+            notes = notes[overflow:]
+        state["notes"] = notes
+
+        memory = render_memory(state)
+        await save_contact_memory(phone_number, contact_id, state, memory)
+        logger.info(
+            f"Memory updated: {len(changes)} changed facts, {len(notes)} recent notes, "
+            f"{state['calls']} calls, ~{estimate_tokens(memory)} tokens"
+        )
+        return memory
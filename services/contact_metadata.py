@@ -0,0 +1,151 @@
+"""
+Contact Metadata
+Local copy of Pixpoc contact metadata, authoritative for reads, with
+write-behind sync back to Pixpoc
+
+Reads come from the contact_metadata table; a contact that was never stored
+is read through from Pixpoc once. Updates are applied locally at once and
+queued. A background syncer sends each contact's queued updates to Pixpoc
+as one merged request once the oldest has waited CONTACT_SYNC_DELAY_SECONDS,
+so repeated updates within that window collapse into a single PUT. Failed
+syncs are retried with exponential backoff, and a claim on the contact row
+keeps workers from sending the same updates twice.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from database.async_db import (
+    claim_contact_metadata_sync,
+    complete_contact_metadata_sync,
+    due_contact_metadata,
+    fail_contact_metadata_sync,
+    get_contact_metadata,
+    queue_contact_metadata,
+    save_contact_metadata,
+)
+
+# Coalescing window: updates are held this long before they are sent
+CONTACT_SYNC_DELAY_SECONDS = float(os.getenv("CONTACT_SYNC_DELAY_SECONDS", "5"))
+CONTACT_SYNC_INTERVAL_SECONDS = float(os.getenv("CONTACT_SYNC_INTERVAL_SECONDS", "2"))
+CONTACT_SYNC_BATCH_SIZE = int(os.getenv("CONTACT_SYNC_BATCH_SIZE", "50"))
+CONTACT_SYNC_CONCURRENCY = int(os.getenv("CONTACT_SYNC_CONCURRENCY", "4"))
+CONTACT_SYNC_MAX_BACKOFF_SECONDS = float(os.getenv("CONTACT_SYNC_MAX_BACKOFF_SECONDS", "900"))
+# Floor for the retry backoff base, so CONTACT_SYNC_DELAY_SECONDS=0 still backs off
+CONTACT_SYNC_MIN_BACKOFF_SECONDS = float(os.getenv("CONTACT_SYNC_MIN_BACKOFF_SECONDS", "5"))
+# A claim not completed or failed within this long is treated as abandoned
+CONTACT_SYNC_CLAIM_SECONDS = 120
+
+
+def _after(seconds: float) -> str:
+    return (datetime.now() + timedelta(seconds=seconds)).isoformat()
+
+
+async def get_metadata(contact_id: str, pixpoc_client, phone_number: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A contact's metadata, including updates not yet synced to Pixpoc.
+
+    Args:
+        contact_id: Pixpoc contact ID
+        pixpoc_client: Used once to read a contact that was never stored
+        phone_number: User's phone number, recorded with a newly stored contact
+
+    Returns:
+        Metadata key-value pairs
+    """
+    stored = await get_contact_metadata(contact_id)
+    if stored is not None:
+        return stored["metadata"]
+
+    contact_data = await pixpoc_client.get_contact_metadata(contact_id)
+    metadata = contact_data.get("metadata") or {}
+    await save_contact_metadata(contact_id, metadata, phone_number)
+    return metadata
+
+
+async def update_metadata(contact_id: str, updates: Dict[str, Any], phone_number: Optional[str] = None):
+    """
+    Merge metadata updates locally and queue them for Pixpoc.
+
+    Args:
+        contact_id: Pixpoc contact ID
+        updates: Metadata key-value pairs to update/merge
+        phone_number: User's phone number
+    """
+    await queue_contact_metadata(contact_id, updates, phone_number)
+
+
+class ContactMetadataSyncer:
+    """Sends queued contact metadata updates to Pixpoc in the background"""
+
+    def __init__(
+        self,
+        pixpoc_client,
+        delay: float = CONTACT_SYNC_DELAY_SECONDS,
+        batch_size: int = CONTACT_SYNC_BATCH_SIZE,
+        concurrency: int = CONTACT_SYNC_CONCURRENCY
+    ):
+        self.pixpoc_client = pixpoc_client
+        self.delay = delay
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def sync_contact(self, contact_id: str) -> bool:
+        """
+        Send one contact's queued updates as a single merged request.
+
+        Returns:
+            Whether the updates reached Pixpoc
+        """
+        async with self.semaphore:
+            stored = await claim_contact_metadata_sync(contact_id, _after(CONTACT_SYNC_CLAIM_SECONDS))
+            if not stored or not stored["pending"]:
+                return False
+            try:
+                await self.pixpoc_client.update_contact_metadata(contact_id=contact_id, metadata=stored["updates"])
+            except Exception as e:
+                base = max(self.delay, CONTACT_SYNC_MIN_BACKOFF_SECONDS)
+                backoff = min(base * 2 ** (stored["attempts"] + 1), CONTACT_SYNC_MAX_BACKOFF_SECONDS)
+                logger.warning(f"Contact metadata sync failed for {contact_id}, retrying in {backoff:g}s: {e}")
+                await fail_contact_metadata_sync(contact_id, _after(backoff))
+                return False
+            await complete_contact_metadata_sync(contact_id, stored["metadata"], stored["last_update_id"])
+            if stored["pending"] > 1:
+                logger.info(f"Synced {stored['pending']} coalesced metadata updates for {contact_id}")
+            return True
+
+    async def sync_due(self, flush: bool = False) -> int:
+        """
+        Sync every contact whose coalescing window has passed.
+
+        Args:
+            flush: Ignore the window and sync everything queued (shutdown)
+
+        Returns:
+            Number of contacts synced
+        """
+        queued_before = datetime.now().isoformat() if flush else _after(-self.delay)
+        synced = 0
+        while True:
+            contact_ids = await due_contact_metadata(queued_before, self.batch_size)
+            if not contact_ids:
+                return synced
+            results = await asyncio.gather(*(self.sync_contact(contact_id) for contact_id in contact_ids))
+            synced += sum(results)
+            # Failed and contended contacts are claimed, so they drop out of
+            # the next query; stop once a batch makes no progress
+            if not any(results):
+                return synced
+
+    async def run(self, interval: float = CONTACT_SYNC_INTERVAL_SECONDS):
+        """Sync due contacts every `interval` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_due()
+            except Exception as e:
+                logger.warning(f"Contact metadata syncer failed: {e}")
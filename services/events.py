@@ -0,0 +1,154 @@
+"""
+Report Events
+Pushes report notifications to connected clients over server-sent events
+
+Each worker process keeps its own subscribers (one queue per open
+/api/events stream). process_completed_call publishes `report_ready` or
+`report_failed` straight to them. A report finished by another worker is
+picked up by `watch_reports`: a single indexed query per worker every few
+seconds, run only while someone is subscribed, no matter how many clients
+are connected.
+"""
+
+import asyncio
+import json
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+# Event ids remembered so a report published locally isn't re-sent by the watcher
+RECENT_EVENT_IDS = 1000
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def format_sse(event_type: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Encode one server-sent event"""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBroker:
+    """Per-process fan-out of events to subscribers, keyed by phone number"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._recent = OrderedDict()
+
+    def has_subscribers(self, phone_number: Optional[str] = None) -> bool:
+        if phone_number is None:
+            return any(self._subscribers.values())
+        return bool(self._subscribers.get(phone_number))
+
+    def subscribe(self, phone_number: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[phone_number].add(queue)
+        return queue
+
+    def unsubscribe(self, phone_number: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(phone_number)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[phone_number]
+
+    def publish(self, phone_number: str, event_type: str, data: Dict[str, Any], event_id: Optional[str] = None):
+        """
+        Send an event to every subscriber for a phone number.
+
+        Events with an id already published are dropped. A subscriber too
+        slow to keep up misses events rather than holding up the others.
+        """
+        if event_id:
+            if event_id in self._recent:
+                return
+            self._recent[event_id] = True
+            if len(self._recent) > RECENT_EVENT_IDS:
+                self._recent.popitem(last=False)
+
+        message = format_sse(event_type, data, event_id)
+        for queue in list(self._subscribers.get(phone_number, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping {event_type} event for a slow subscriber of {phone_number}")
+
+    async def stream(
+        self,
+        phone_number: str,
+        heartbeat: float = 15.0,
+        replay: Optional[Callable[[], Awaitable[List[str]]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield SSE messages for a phone number until the consumer stops.
+
+        A comment line is sent every `heartbeat` seconds of silence so
+        proxies keep the connection open and clients notice a dead backend.
+
+        Args:
+            phone_number: User whose events to stream
+            heartbeat: Seconds of silence before a keep-alive comment
+            replay: Returns messages the client missed before connecting;
+                called after subscribing so nothing falls in between
+        """
+        queue = self.subscribe(phone_number)
+        try:
+            yield "retry: 3000\n\n"
+            if replay is not None:
+                for message in await replay():
+                    yield message
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            self.unsubscribe(phone_number, queue)
+
+
+_broker: Optional[EventBroker] = None
+
+
+def get_event_broker() -> EventBroker:
+    """Process-wide event broker"""
+    global _broker
+    if _broker is None:
+        _broker = EventBroker()
+    return _broker
+
+
+def publish_report_ready(phone_number: str, report: Dict[str, Any], call_id: Optional[str] = None):
+    """Notify a user's clients that a report was saved"""
+    get_event_broker().publish(
+        phone_number, "report_ready", dict(report, callId=call_id), event_id=report["id"]
+    )
+
+
+async def watch_reports(interval: float):
+    """
+    Forward reports saved by other worker processes to this worker's subscribers.
+
+    Args:
+        interval: Seconds between checks of the reports table
+    """
+    from database.async_db import get_reports_since
+
+    broker = get_event_broker()
+    since = datetime.now().isoformat()
+    while True:
+        await asyncio.sleep(interval)
+        if not broker.has_subscribers():
+            since = datetime.now().isoformat()
+            continue
+        try:
+            for phone_number, report in await get_reports_since(since):
+                since = max(since, report["date"])
+                if broker.has_subscribers(phone_number):
+                    publish_report_ready(phone_number, report)
+        except Exception as e:
+            logger.warning(f"Report watcher failed: {e}")
@@ -10,6 +10,11 @@ import asyncio
 from typing import Dict, Any, Optional
 from loguru import logger
 
+from services.rate_limiter import AsyncRateLimitedTransport, get_rate_limiter
+
+# 429s retried by the client after waiting out Retry-After
+RATE_LIMIT_RETRIES = 2
+
 
 class PixpocClient:
     """Client for Pixpoc.ai Call Manager API integration"""
@@ -28,6 +33,88 @@ class PixpocClient:
             "X-API-Key": api_key,
             "Content-Type": "application/json"
         }
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._session = None
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared async HTTP client.
+        
+        Reusing one client keeps connections (and TLS sessions) to Pixpoc
+        alive across requests instead of reconnecting per call. Every request
+        waits for the shared 'pixpoc' rate-limit bucket first.
+        """
+        if self._async_client is None or self._async_client.is_closed:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=30.0,
+                transport=AsyncRateLimitedTransport("pixpoc", transport, max_retries=RATE_LIMIT_RETRIES)
+            )
+        return self._async_client
+    
+    def _get_session(self):
+        """Get the shared requests session used by synchronous calls"""
+        if self._session is None:
+            import requests
+            
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+        return self._session
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    @staticmethod
+    def to_e164(phone_number: str) -> str:
+        """Normalize a phone number to E.164, assuming India if no country code"""
+        phone_number = phone_number.strip().replace(" ", "").replace("-", "")
+        if not phone_number.startswith('+'):
+            phone_number = f"+91{phone_number.lstrip('0')}"
+        return phone_number
+    
+    def _call_payload(
+        self,
+        phone_number: str,
+        agent_id: str,
+        contact_name: Optional[str] = None,
+        contact_data: Optional[Dict[str, Any]] = None,
+        from_number_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the POST /api/v1/calls body"""
+        payload = {
+            "toNumber": self.to_e164(phone_number),
+            "agentId": agent_id,
+        }
+        
+        if contact_name:
+            payload["contactName"] = contact_name
+        if contact_data:
+            payload["contactData"] = contact_data
+        if from_number_id:
+            payload["fromNumberId"] = from_number_id
+        return payload
+    
+    @staticmethod
+    def _call_result(status_code: int, body: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Unwrap a POST /api/v1/calls response or raise with Pixpoc's error"""
+        if status_code == 200:
+            if body.get("success"):
+                logger.info(f"Call initiated successfully: {body['data']['call']['id']}")
+                return body["data"]
+            error_msg = f"API returned success=false: {body.get('message')}"
+        else:
+            error_msg = f"Failed to initiate call: HTTP {status_code} - {text}"
+        logger.error(error_msg)
+        raise Exception(error_msg)
     
     def initiate_call_sync(
         self, 
@@ -55,47 +142,21 @@ class PixpocClient:
         try:
             import requests
             
-            # Ensure phone number is in E.164 format
-            if not phone_number.startswith('+'):
-                # Assume Indian number if no country code
-                phone_number = f"+91{phone_number.lstrip('0')}"
-            
             url = f"{self.base_url}/api/v1/calls"
+            payload = self._call_payload(phone_number, agent_id, contact_name, contact_data, from_number_id)
             
-            payload = {
-                "toNumber": phone_number,
-                "agentId": agent_id,
-            }
-            
-            if contact_name:
-                payload["contactName"] = contact_name
-            if contact_data:
-                payload["contactData"] = contact_data
-            if from_number_id:
-                payload["fromNumberId"] = from_number_id
-            
-            logger.info(f"Initiating call to {phone_number} with agent {agent_id}")
+            logger.info(f"Initiating call to {payload['toNumber']} with agent {agent_id}")
             
-            response = requests.post(
+            limiter = get_rate_limiter()
+            limiter.acquire("pixpoc")
+            response = self._get_session().post(
                 url, 
                 json=payload, 
-                headers=self.headers,
                 timeout=30
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("success"):
-                    logger.info(f"Call initiated successfully: {result['data']['call']['id']}")
-                    return result["data"]
-                else:
-                    error_msg = f"API returned success=false: {result.get('message')}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-            else:
-                error_msg = f"Failed to initiate call: HTTP {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            limiter.observe("pixpoc", response.status_code, response.headers)
+            body = response.json() if response.status_code == 200 else {}
+            return self._call_result(response.status_code, body, response.text)
                 
         except requests.exceptions.RequestException as e:
             error_msg = f"Network error initiating call: {e}"
@@ -105,6 +166,43 @@ class PixpocClient:
             error_msg = f"Error initiating call: {e}"
             logger.error(error_msg)
             raise
+    
+    async def initiate_call(
+        self, 
+        phone_number: str, 
+        agent_id: str,
+        contact_name: Optional[str] = None,
+        contact_data: Optional[Dict[str, Any]] = None,
+        from_number_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Initiate a single outbound call over the pooled async client.
+        
+        Endpoint: POST /api/v1/calls
+        
+        Args:
+            phone_number: Phone number (normalized to E.164)
+            agent_id: UUID of the AI agent to use
+            contact_name: Name of the contact (for personalization)
+            contact_data: Additional contact data as key-value pairs
+            from_number_id: Optional specific from number UUID to use
+            
+        Returns:
+            Response with call, contact, and campaign details
+        """
+        url = f"{self.base_url}/api/v1/calls"
+        payload = self._call_payload(phone_number, agent_id, contact_name, contact_data, from_number_id)
+        
+        try:
+            client = self._get_async_client()
+            response = await client.post(url, json=payload)
+            body = response.json() if response.status_code == 200 else {}
+            return self._call_result(response.status_code, body, response.text)
+        except httpx.HTTPError as e:
+            error_msg = f"Network error initiating call: {e}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+    
     async def get_call_details(self, call_id: str) -> Dict[str, Any]:
         """
         Get details of a specific call.
@@ -120,16 +218,16 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/calls/{call_id}"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info(f"Retrieved call details for {call_id}")
-                    return data["data"]["call"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info(f"Retrieved call details for {call_id}")
+                return data["data"]["call"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to get call details: {e}")
             raise
@@ -149,16 +247,16 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/calls/{call_id}/analysis"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info(f"Retrieved analysis for call {call_id}")
-                    return data["data"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info(f"Retrieved analysis for call {call_id}")
+                return data["data"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to get call analysis: {e}")
             raise
@@ -178,16 +276,16 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/calls/{call_id}/transcript"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info(f"Retrieved transcript for call {call_id}")
-                    return data["data"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info(f"Retrieved transcript for call {call_id}")
+                return data["data"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to get call transcript: {e}")
             raise
@@ -204,16 +302,16 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/account"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info("Retrieved account information")
-                    return data["data"]["account"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info("Retrieved account information")
+                return data["data"]["account"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to get account info: {e}")
             raise
@@ -233,16 +331,16 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/inbound-calls/{call_id}"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info(f"Retrieved inbound call {call_id}")
-                    return data["data"]["inboundCall"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info(f"Retrieved inbound call {call_id}")
+                return data["data"]["inboundCall"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to get inbound call: {e}")
             raise
@@ -262,16 +360,16 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/contacts/{contact_id}/metadata"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info(f"Retrieved metadata for contact {contact_id}")
-                    return data["data"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info(f"Retrieved metadata for contact {contact_id}")
+                return data["data"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to get contact metadata: {e}")
             raise
@@ -296,21 +394,19 @@ class PixpocClient:
         url = f"{self.base_url}/api/v1/contacts/{contact_id}/metadata"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.put(
-                    url, 
-                    json={"metadata": metadata},
-                    headers=self.headers, 
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("success"):
-                    logger.info(f"Updated metadata for contact {contact_id}")
-                    return data["data"]
-                else:
-                    raise Exception(data.get("error", "Unknown error"))
+            client = self._get_async_client()
+            response = await client.put(
+                url, 
+                json={"metadata": metadata}
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("success"):
+                logger.info(f"Updated metadata for contact {contact_id}")
+                return data["data"]
+            else:
+                raise Exception(data.get("error", "Unknown error"))
         except Exception as e:
             logger.error(f"Failed to update contact metadata: {e}")
             raise
@@ -0,0 +1,436 @@
+"""
+Upstream Rate Limiter
+Shared token buckets for outbound calls (Pixpoc, OpenAI), adapted from the
+upstream's own rate-limit headers
+
+Each upstream has one bucket stored in a small SQLite file, so every worker
+process on the host draws from the same budget. Callers reserve a token
+before each request and report the response afterwards:
+
+- `Retry-After` / `retry-after-ms` on a 429 blocks the bucket until then and
+  halves its refill rate, once per block: a burst of 429s from one upstream
+  window backs off once. Successes grow it back toward the ceiling.
+- `x-ratelimit-remaining-*` / `x-ratelimit-reset-*` (OpenAI style) or plain
+  `x-ratelimit-remaining` / `x-ratelimit-reset` cap the bucket at what is
+  left in the upstream's window. Reservations count that budget down, and
+  once it is spent callers wait for the reset instead of drawing 429s.
+- `x-ratelimit-limit-requests` (per minute) or plain `x-ratelimit-limit` (per
+  `x-ratelimit-window` seconds, default 1) caps the rate.
+
+httpx transports wrap this so the pooled clients are limited transparently.
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import httpx
+from loguru import logger
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_STATE_PATH = Path(
+    os.getenv("RATE_LIMIT_STATE_PATH") or Path(tempfile.gettempdir()) / "financebot-ratelimits.db"
+)
+
+# Slowest a bucket will adapt down to, as a fraction of its configured rate
+MIN_RATE_FRACTION = 0.05
+# Multiplicative decrease on 429, additive increase (fraction of max) on success
+BACKOFF_FACTOR = 0.5
+RECOVERY_STEP = 0.05
+# Block used when a 429 carries no Retry-After
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+# Window assumed for a plain x-ratelimit-limit without x-ratelimit-window
+DEFAULT_LIMIT_WINDOW_SECONDS = 1.0
+
+
+@dataclass
+class UpstreamLimit:
+    """Configured ceiling for one upstream"""
+    rate: float   # requests per second
+    burst: float  # bucket capacity
+
+
+def _limit_from_env(upstream: str, rate: float, burst: float) -> UpstreamLimit:
+    prefix = f"RATE_LIMIT_{upstream.upper()}"
+    return UpstreamLimit(
+        rate=float(os.getenv(f"{prefix}_RPS", rate)),
+        burst=float(os.getenv(f"{prefix}_BURST", burst))
+    )
+
+
+DEFAULT_LIMITS = {
+    "pixpoc": _limit_from_env("pixpoc", 5, 10),
+    "openai": _limit_from_env("openai", 8, 20),
+}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse '20ms', '1.5s', '6m0s', '1h2m3s' or plain seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from retry-after-ms / Retry-After (seconds or HTTP date)"""
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def _reset_seconds(value: Optional[str]) -> Optional[float]:
+    """x-ratelimit-reset as a duration, accepting epoch timestamps too"""
+    if not value:
+        return None
+    seconds = _parse_duration(value)
+    if seconds is not None and seconds > 1e9:
+        seconds -= time.time()
+    return None if seconds is None else max(seconds, 0.0)
+
+
+def budget_from_headers(headers: Mapping[str, str]) -> Optional[tuple]:
+    """
+    Remaining requests and seconds until reset advertised by the upstream.
+
+    Returns:
+        (remaining, reset_seconds) or None if the headers don't say
+    """
+    for suffix in ("-requests", ""):
+        remaining = headers.get(f"x-ratelimit-remaining{suffix}")
+        reset = _reset_seconds(headers.get(f"x-ratelimit-reset{suffix}"))
+        if remaining is not None and reset is not None:
+            try:
+                return float(remaining), reset
+            except ValueError:
+                return None
+    return None
+
+
+def ceiling_from_headers(headers: Mapping[str, str]) -> Optional[float]:
+    """Requests per second the upstream allows, if its headers say"""
+    per_minute = headers.get("x-ratelimit-limit-requests")
+    if per_minute and per_minute.isdigit():
+        return int(per_minute) / 60
+
+    limit = headers.get("x-ratelimit-limit")
+    if limit and limit.isdigit():
+        window = _parse_duration(headers.get("x-ratelimit-window") or "") or DEFAULT_LIMIT_WINDOW_SECONDS
+        return int(limit) / window
+    return None
+
+
+def tokens_exhausted_for(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds until OpenAI's token budget resets, if it is used up"""
+    if headers.get("x-ratelimit-remaining-tokens") == "0":
+        return _reset_seconds(headers.get("x-ratelimit-reset-tokens"))
+    return None
+
+
+class RateLimiter:
+    """Token buckets per upstream, shared across processes via SQLite"""
+
+    def __init__(
+        self,
+        state_path: Path = RATE_LIMIT_STATE_PATH,
+        limits: Optional[Dict[str, UpstreamLimit]] = None,
+        enabled: bool = RATE_LIMIT_ENABLED
+    ):
+        self.state_path = Path(state_path)
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.enabled = enabled
+        self._local = threading.local()
+
+    def _limit(self, upstream: str) -> UpstreamLimit:
+        return self.limits.get(upstream) or _limit_from_env(upstream, 5, 10)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection to the state file (reopened after fork)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.state_path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    upstream TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0,
+                    remaining REAL,
+                    window_reset REAL NOT NULL DEFAULT 0
+                )
+            """)
+            # State files from before the upstream budget was tracked
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(buckets)")}
+            if "remaining" not in columns:
+                conn.execute("ALTER TABLE buckets ADD COLUMN remaining REAL")
+                conn.execute("ALTER TABLE buckets ADD COLUMN window_reset REAL NOT NULL DEFAULT 0")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _update(self, upstream: str, change):
+        """
+        Read-modify-write a bucket under an exclusive lock.
+
+        `change(state, limit, now)` mutates the state dict (tokens, rate,
+        blocked_until, and the upstream's advertised `remaining` budget until
+        `window_reset`) after refill and may return a value.
+        """
+        limit = self._limit(upstream)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, rate, updated_at, blocked_until, remaining, window_reset "
+                "FROM buckets WHERE upstream = ?",
+                (upstream,)
+            ).fetchone()
+            if row:
+                tokens, rate, updated_at, blocked_until, remaining, window_reset = row
+                tokens = min(limit.burst, tokens + max(now - updated_at, 0.0) * rate)
+            else:
+                tokens, rate, blocked_until, remaining, window_reset = limit.burst, limit.rate, 0.0, None, 0.0
+            if now >= window_reset:
+                # The upstream's window has reset; its budget is unknown until the next response
+                remaining = None
+
+            state = {"tokens": tokens, "rate": rate, "blocked_until": blocked_until,
+                     "remaining": remaining, "window_reset": window_reset}
+            result = change(state, limit, now)
+            conn.execute(
+                """
+                INSERT INTO buckets (upstream, tokens, rate, updated_at, blocked_until, remaining, window_reset)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (upstream) DO UPDATE SET
+                    tokens = excluded.tokens, rate = excluded.rate,
+                    updated_at = excluded.updated_at, blocked_until = excluded.blocked_until,
+                    remaining = excluded.remaining, window_reset = excluded.window_reset
+                """,
+                (upstream, state["tokens"], state["rate"], now, state["blocked_until"],
+                 state["remaining"], state["window_reset"])
+            )
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reserve(self, upstream: str, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens, going into debt if needed.
+
+        Returns:
+            Seconds the caller must wait before sending
+        """
+        if not self.enabled:
+            return 0.0
+
+        def take(state, limit, now):
+            state["tokens"] -= cost
+            debt_wait = -state["tokens"] / state["rate"] if state["tokens"] < 0 else 0.0
+            window_wait = 0.0
+            if state["remaining"] is not None:
+                # Spend the upstream's advertised budget; past it, wait for its reset
+                state["remaining"] -= cost
+                if state["remaining"] < 0:
+                    window_wait = state["window_reset"] - now
+            return max(debt_wait, window_wait, state["blocked_until"] - now, 0.0)
+
+        try:
+            return self._update(upstream, take)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limiter unavailable for {upstream}, not limiting: {e}")
+            return 0.0
+
+    def observe(self, upstream: str, status_code: int, headers: Mapping[str, str]):
+        """Adapt the bucket to an upstream response"""
+        if not self.enabled:
+            return
+
+        headers = {key.lower(): value for key, value in headers.items()}
+
+        def adapt(state, limit, now):
+            floor = limit.rate * MIN_RATE_FRACTION
+            # 429s for requests already in flight belong to the same block: back off once
+            blocked = now < state["blocked_until"]
+            ceiling = min(limit.rate, ceiling_from_headers(headers) or limit.rate)
+
+            budget = budget_from_headers(headers)
+            if budget:
+                # Never spend more than the upstream says is left in its window;
+                # within a window, reservations since may already have spent more
+                remaining, reset = budget
+                if state["remaining"] is None or now + reset > state["window_reset"]:
+                    state["window_reset"] = now + reset
+                state["remaining"] = remaining if state["remaining"] is None else min(state["remaining"], remaining)
+                state["tokens"] = min(state["tokens"], remaining)
+                if remaining <= 0:
+                    state["blocked_until"] = max(state["blocked_until"], now + reset)
+
+            if status_code == 429:
+                retry_after = retry_after_seconds(headers) or DEFAULT_RETRY_AFTER_SECONDS
+                if not blocked:
+                    state["rate"] = max(floor, min(state["rate"], ceiling) * BACKOFF_FACTOR)
+                    logger.warning(f"⏳ {upstream} rate limited; pausing {retry_after:.1f}s at {state['rate']:.2f} req/s")
+                state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+                state["tokens"] = min(state["tokens"], 0.0)
+                return
+
+            if 200 <= status_code < 400:
+                state["rate"] += limit.rate * RECOVERY_STEP
+            state["rate"] = min(state["rate"], ceiling)
+
+            tokens_reset = tokens_exhausted_for(headers)
+            if tokens_reset:
+                state["blocked_until"] = max(state["blocked_until"], now + tokens_reset)
+
+        try:
+            self._update(upstream, adapt)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limiter could not record {upstream} response: {e}")
+
+    def acquire(self, upstream: str, cost: float = 1.0):
+        """Block until a request to `upstream` may be sent"""
+        wait = self.reserve(upstream, cost)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, upstream: str, cost: float = 1.0):
+        """Wait (without blocking the event loop) until a request may be sent"""
+        if not self.enabled:
+            return
+        wait = await asyncio.to_thread(self.reserve, upstream, cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def observe_async(self, upstream: str, status_code: int, headers: Mapping[str, str]):
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self.observe, upstream, status_code, headers)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that waits for the upstream's bucket before each request"""
+
+    def __init__(
+        self,
+        upstream: str,
+        transport: Optional[httpx.BaseTransport] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 0
+    ):
+        self.upstream = upstream
+        self.transport = transport or httpx.HTTPTransport()
+        self.limiter = limiter or get_rate_limiter()
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(self.upstream)
+            response = self.transport.handle_request(request)
+            self.limiter.observe(self.upstream, response.status_code, response.headers)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            response.close()
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async httpx transport that waits for the upstream's bucket before each request"""
+
+    def __init__(
+        self,
+        upstream: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 0
+    ):
+        self.upstream = upstream
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.limiter = limiter or get_rate_limiter()
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async(self.upstream)
+            response = await self.transport.handle_async_request(request)
+            await self.limiter.observe_async(self.upstream, response.status_code, response.headers)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            await response.aclose()
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_openai_http_client = None
+_openai_http_client_lock = threading.Lock()
+
+
+def openai_http_client() -> httpx.Client:
+    """
+    Shared httpx client for OpenAI SDK clients (including crewai's).
+
+    The SDK keeps its own retries; this only paces requests and feeds the
+    bucket from OpenAI's x-ratelimit-* headers.
+    """
+    global _openai_http_client
+    if _openai_http_client is None:
+        with _openai_http_client_lock:
+            if _openai_http_client is None:
+                _openai_http_client = httpx.Client(
+                    transport=RateLimitedTransport("openai"),
+                    timeout=httpx.Timeout(600.0, connect=10.0)
+                )
+    return _openai_http_client
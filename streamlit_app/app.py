@@ -15,7 +15,7 @@ sys.path.insert(0, str(project_root))
 from streamlit_app.components.auth import show_login_page
 from streamlit_app.components.dashboard import show_dashboard
 from streamlit_app.utils.session import init_session, is_authenticated
-from database.db import init_db
+from streamlit_app.utils.data import get_database
 
 # Page configuration
 st.set_page_config(
@@ -25,8 +25,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize database
-init_db()
+# Initialize database once per server process, not on every rerun
+get_database()
 
 # Initialize session state
 init_session()
@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 import asyncio
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,8 +16,14 @@ load_dotenv()
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from database.db import get_user_reports, get_user_financial_data, save_call, get_call_by_tracking_id
-from services.pixpoc_client import PixpocClient
+from database.db import save_call
+from streamlit_app.utils.data import (
+    check_for_new_report,
+    get_financial_history,
+    get_pixpoc_client,
+    get_user_financial_data,
+    get_user_reports,
+)
 
 
 def show_dashboard():
@@ -26,10 +33,18 @@ def show_dashboard():
     st.title(f"👋 Welcome, {st.session_state.user.get('name', 'User')}!")
     st.write("Your personalized financial dashboard")
     
+    if check_for_new_report(st.session_state.user.get('phone')):
+        st.session_state.call_in_progress = False
+        st.success("📄 Your new report is ready!")
+    
+    if st.session_state.pop('report_failed', False):
+        st.error("❌ We couldn't generate your report from the last call. Please try again.")
+    
     st.divider()
     
     # Financial summary
     show_financial_summary()
+    show_financial_trends()
     
     st.divider()
     
@@ -48,7 +63,8 @@ def show_financial_summary():
     st.subheader("📊 Financial Summary")
     
     phone = st.session_state.user.get('phone')
-    financial_data = get_user_financial_data(phone)
+    # Only the summary columns - the raw data blob isn't needed here
+    financial_data = get_user_financial_data(phone, fields=('income', 'savings', 'expenses'))
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -87,6 +103,24 @@ def show_financial_summary():
         )
 
 
+def show_financial_trends():
+    """Show net worth and savings over time once there are several snapshots"""
+    
+    phone = st.session_state.user.get('phone')
+    history = get_financial_history(phone)
+    if len(history) < 2:
+        return
+    
+    import plotly.graph_objects as go
+    
+    dates = [point['taken_at'][:10] for point in history]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=[point['net_worth'] for point in history], name='Net Worth'))
+    fig.add_trace(go.Scatter(x=dates, y=[point['savings'] for point in history], name='Monthly Savings'))
+    fig.update_layout(title='Net Worth & Savings Trend', xaxis_title='Date', yaxis_title='Amount (₹)')
+    st.plotly_chart(fig, use_container_width=True)
+
+
 def show_call_to_action():
     """Show call initiation section"""
     
@@ -118,11 +152,8 @@ def initiate_call():
     
     with st.spinner("📞 Initiating call..."):
         try:
-            # Initialize Pixpoc client
-            client = PixpocClient(
-                base_url=os.getenv("PIXPOC_API_BASE_URL", "https://app.pixpoc.ai"),
-                api_key=os.getenv("PIXPOC_API_KEY", "")
-            )
+            # Shared across sessions; created on the first call
+            client = get_pixpoc_client()
             
             agent_id = os.getenv("PIXPOC_AGENT_ID")
             from_number_id = os.getenv("PIXPOC_FROM_NUMBER_ID")
@@ -180,8 +211,7 @@ def initiate_call():
             After the call completes, we'll automatically generate a personalized financial report for you.
             """)
             
-            # Add auto-refresh message
-            st.warning("🔄 Dashboard will auto-refresh when your report is ready...")
+            st.warning("🔄 This page will update as soon as your report is ready...")
         
         except Exception as e:
             st.error(f"❌ Error initiating call: {str(e)}")
@@ -206,8 +236,11 @@ def show_recent_reports():
     
     st.subheader("📄 Recent Reports")
     
+    from streamlit_app.pages.reports import show_report_download
+    
     phone = st.session_state.user.get('phone')
-    reports = get_user_reports(phone)
+    # One extra row tells us whether there are more than we show
+    reports = get_user_reports(phone, limit=4)
     
     if not reports:
         st.info("📭 No reports yet. Generate your first report by starting an AI call!")
@@ -227,18 +260,7 @@ def show_recent_reports():
                     st.caption(f"🏷️ {report['type'].replace('_', ' ').title()}")
                 
                 with col4:
-                    try:
-                        with open(report['path'], 'rb') as f:
-                            st.download_button(
-                                label="⬇️",
-                                data=f,
-                                file_name=report['filename'],
-                                mime="application/pdf",
-                                key=f"dash_download_{report['id']}",
-                                help="Download report"
-                            )
-                    except FileNotFoundError:
-                        st.error("❌")
+                    show_report_download(report, key_prefix="dash_download", label="⬇️")
                 
                 st.divider()
         
@@ -247,9 +269,37 @@ def show_recent_reports():
                 st.session_state.page = "Reports"
                 st.rerun()
     
-    # Auto-refresh if call in progress
+    # Wait for the backend to push the report instead of polling for it
     if st.session_state.get('call_in_progress'):
-        import time
-        time.sleep(5)
+        wait_for_report_and_rerun(phone)
+
+
+def wait_for_report_and_rerun(phone):
+    """
+    Hold the script on the backend's event stream until the report is ready
+    (or failed), then rerun. Falls back to re-checking the database every few
+    seconds when the webhook server can't be reached.
+    """
+    import httpx
+    from streamlit_app.utils.data import REPORT_VERSION_TTL_SECONDS
+    from streamlit_app.utils.report_events import wait_for_report
+    
+    status = st.empty()
+    status.caption("⏳ Waiting for your report...")
+    
+    try:
+        result = wait_for_report(
+            phone,
+            since=st.session_state.get('seen_report_version'),
+            # Touching an element lets a click interrupt the wait
+            on_heartbeat=lambda: status.caption("⏳ Waiting for your report...")
+        )
+    except httpx.HTTPError:
+        time.sleep(REPORT_VERSION_TTL_SECONDS)
         st.rerun()
+    
+    if result and result[0] == 'report_failed':
+        st.session_state.call_in_progress = False
+        st.session_state.report_failed = True
+    st.rerun()
 
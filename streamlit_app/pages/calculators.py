@@ -2,8 +2,38 @@
 Financial Calculators Page
 """
 
+import numpy as np
+import plotly.graph_objects as go
 import streamlit as st
-from streamlit_app.utils.helpers import calculate_sip, calculate_emi, format_currency
+
+from finance_bot.calculators import emi_sensitivity, loan_schedule, sip_sensitivity, sip_schedule, yearly
+from finance_bot.goal_projection import simulate_goal
+from finance_bot.tax_engine import compare_regimes, tax_curve
+from streamlit_app.utils.helpers import format_currency
+
+# Sensitivity grid axes (every return/rate x every year up to 30)
+SIP_GRID_RETURNS = np.arange(4, 21)
+LOAN_GRID_RATES = np.arange(6.0, 14.5, 0.5)
+GRID_YEARS = np.arange(1, 31)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_goal_projection(**inputs):
+    """simulate_goal is seeded, so identical inputs can share one result"""
+    return simulate_goal(**inputs)
+
+
+def show_heatmap(values, x, y, x_title, y_title, title):
+    """Plotly heatmap of a sensitivity grid (rows = y, columns = x)"""
+    fig = go.Figure(data=go.Heatmap(
+        z=values,
+        x=x,
+        y=y,
+        colorscale="Viridis",
+        hovertemplate=f"{y_title}: %{{y}}<br>{x_title}: %{{x}}<br>₹%{{z:,.0f}}<extra></extra>"
+    ))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title)
+    st.plotly_chart(fig, use_container_width=True)
 
 
 def show_calculators_page():
@@ -15,7 +45,9 @@ def show_calculators_page():
     st.divider()
     
     # Calculator tabs
-    tab1, tab2, tab3 = st.tabs(["📈 SIP Calculator", "🏦 EMI Calculator", "💼 Tax Calculator"])
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📈 SIP Calculator", "🏦 EMI Calculator", "🎯 Goal Planner", "💼 Tax Calculator"
+    ])
     
     # SIP Calculator
     with tab1:
@@ -47,37 +79,61 @@ def show_calculators_page():
                 value=10,
                 step=1
             )
+            step_up = st.slider(
+                "Yearly Step-up (%)",
+                min_value=0,
+                max_value=25,
+                value=0,
+                step=1,
+                help="Increase your monthly investment by this much every year"
+            )
+        
+        schedule = sip_schedule(monthly_amount, expected_return, time_period, step_up)
+        total_investment = schedule['invested'][-1]
+        maturity_value = schedule['value'][-1]
+        estimated_returns = maturity_value - total_investment
         
         with col2:
             st.subheader("Results")
-            result = calculate_sip(monthly_amount, expected_return, time_period)
             
             st.metric(
                 "💰 Total Investment",
-                format_currency(result['total_investment'])
+                format_currency(total_investment)
             )
             st.metric(
                 "📈 Estimated Returns",
-                format_currency(result['estimated_returns']),
-                delta=f"+{result['estimated_returns']/result['total_investment']*100:.1f}%"
+                format_currency(estimated_returns),
+                delta=f"+{estimated_returns/total_investment*100:.1f}%"
             )
             st.metric(
                 "🎯 Maturity Value",
-                format_currency(result['maturity_value'])
+                format_currency(maturity_value)
             )
             
-            # Show chart
-            import plotly.graph_objects as go
-            
             fig = go.Figure(data=[
                 go.Pie(
                     labels=['Investment', 'Returns'],
-                    values=[result['total_investment'], result['estimated_returns']],
+                    values=[total_investment, estimated_returns],
                     hole=.3
                 )
             ])
             fig.update_layout(title="Investment Breakdown")
             st.plotly_chart(fig, use_container_width=True)
+        
+        # Year-by-year growth
+        years = np.arange(1, time_period + 1)
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=years, y=yearly(schedule, 'invested'), name='Invested'))
+        fig.add_trace(go.Scatter(x=years, y=yearly(schedule, 'value'), name='Value', mode='lines+markers'))
+        fig.update_layout(title="Growth by Year", xaxis_title="Year", yaxis_title="₹")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        with st.expander("📊 What if returns or the period change?"):
+            grid = sip_sensitivity(monthly_amount, SIP_GRID_RETURNS, GRID_YEARS, step_up)
+            show_heatmap(
+                grid['value'], GRID_YEARS, [f"{r}%" for r in SIP_GRID_RETURNS],
+                "Years", "Annual return", "Maturity Value"
+            )
     
     # EMI Calculator
     with tab2:
@@ -109,43 +165,251 @@ def show_calculators_page():
                 value=20,
                 step=1
             )
+            
+            st.write("**Prepayments (optional)**")
+            extra_monthly = st.number_input(
+                "Extra Payment Every Month (₹)",
+                min_value=0,
+                max_value=10000000,
+                value=0,
+                step=1000
+            )
+            lump_sum = st.number_input(
+                "One-time Prepayment (₹)",
+                min_value=0,
+                max_value=100000000,
+                value=0,
+                step=50000
+            )
+            lump_sum_year = st.number_input(
+                "Prepay in Year",
+                min_value=1,
+                max_value=tenure,
+                value=1,
+                step=1
+            ) if lump_sum else 1
+        
+        lump_sums = {lump_sum_year * 12: lump_sum} if lump_sum else None
+        schedule = loan_schedule(loan_amount, interest_rate, tenure * 12)
+        prepaid = loan_schedule(loan_amount, interest_rate, tenure * 12, extra_monthly, lump_sums)
+        has_prepayment = bool(extra_monthly or lump_sum)
         
         with col2:
             st.subheader("Results")
-            result = calculate_emi(loan_amount, interest_rate, tenure * 12)
             
             st.metric(
                 "💳 Monthly EMI",
-                format_currency(result['emi'])
+                format_currency(schedule['emi'])
             )
             st.metric(
                 "💸 Total Interest",
-                format_currency(result['total_interest'])
+                format_currency(schedule['total_interest'])
             )
             st.metric(
                 "💰 Total Amount Payable",
-                format_currency(result['total_amount'])
+                format_currency(schedule['total_paid'])
             )
+            if has_prepayment:
+                st.metric(
+                    "✂️ Interest Saved with Prepayments",
+                    format_currency(schedule['total_interest'] - prepaid['total_interest']),
+                    delta=f"{tenure * 12 - int(prepaid['months'])} months sooner"
+                )
             
-            # Show chart
             fig = go.Figure(data=[
                 go.Pie(
                     labels=['Principal', 'Interest'],
-                    values=[loan_amount, result['total_interest']],
+                    values=[loan_amount, prepaid['total_interest']],
                     hole=.3
                 )
             ])
             fig.update_layout(title="Payment Breakdown")
             st.plotly_chart(fig, use_container_width=True)
+        
+        # Outstanding balance over the loan
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=schedule['month'], y=schedule['balance'], name='Outstanding'))
+        if has_prepayment:
+            fig.add_trace(go.Scatter(x=prepaid['month'], y=prepaid['balance'], name='With prepayments'))
+        fig.update_layout(title="Outstanding Balance", xaxis_title="Month", yaxis_title="₹")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        with st.expander("📅 Amortization schedule"):
+            st.dataframe(
+                {
+                    "Year": np.arange(1, tenure + 1),
+                    "EMI Paid": yearly(prepaid, 'payment', how='sum').round(),
+                    "Principal": yearly(prepaid, 'principal', how='sum').round(),
+                    "Interest": yearly(prepaid, 'interest', how='sum').round(),
+                    "Balance": yearly(prepaid, 'balance').round(),
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        with st.expander("📊 What if the rate or tenure change?"):
+            grid = emi_sensitivity(loan_amount, LOAN_GRID_RATES, GRID_YEARS)
+            show_heatmap(
+                grid['emi'], GRID_YEARS, [f"{r:g}%" for r in LOAN_GRID_RATES],
+                "Tenure (years)", "Interest rate", "Monthly EMI"
+            )
     
-    # Tax Calculator
+    # Goal Planner
     with tab3:
-        st.header("Income Tax Calculator")
-        st.write("Compare Old vs New tax regimes")
-        
-        st.info("🚧 Advanced tax calculator coming soon! For now, use our AI agent to get personalized tax advice.")
+        show_goal_planner()
+    
+    # Tax Calculator
+    with tab4:
+        show_tax_calculator()
+
+
+def show_goal_planner():
+    """Monte Carlo goal / retirement planner"""
+    
+    st.header("Goal Planner")
+    st.write("See how likely you are to reach a goal across thousands of simulated markets")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Your Plan")
+        current_savings = st.number_input("Current Savings (₹)", min_value=0, max_value=1000000000, value=500000, step=50000)
+        monthly_investment = st.number_input("Monthly Investment (₹)", min_value=0, max_value=10000000, value=20000, step=1000)
+        step_up = st.slider("Yearly Step-up (%)", min_value=0, max_value=25, value=5, step=1, key="goal_step_up")
+        years = st.slider("Years to Goal", min_value=1, max_value=40, value=20, step=1)
+        goal_amount = st.number_input(
+            "Goal Amount in Today's Money (₹)", min_value=0, max_value=10000000000, value=10000000, step=500000
+        )
+        inflation = st.slider("Inflation (%)", min_value=0.0, max_value=12.0, value=6.0, step=0.5)
+    
+    with col2:
+        st.subheader("Portfolio")
+        equity = st.slider("Equity (%)", min_value=0, max_value=100, value=60, step=5)
+        debt = st.slider("Debt (%)", min_value=0, max_value=100 - equity, value=min(30, 100 - equity), step=5)
+        gold = 100 - equity - debt
+        st.caption(f"Gold: {gold}%")
         
-        if st.button("📞 Talk to Tax Planning Agent", type="primary"):
-            st.session_state.page = "Dashboard"
-            st.rerun()
+        plan_retirement = st.checkbox("Draw an income from it afterwards (retirement)")
+        retirement_years, monthly_withdrawal = 0, 0
+        if plan_retirement:
+            retirement_years = st.slider("Years of Withdrawals", min_value=1, max_value=40, value=25, step=1)
+            monthly_withdrawal = st.number_input(
+                "Monthly Withdrawal in Today's Money (₹)", min_value=0, max_value=10000000, value=50000, step=5000
+            )
+        paths = st.select_slider("Simulated Markets", options=[1000, 5000, 10000, 50000, 100000], value=10000)
+    
+    if equity + debt + gold == 0:
+        st.warning("Choose an allocation to simulate.")
+        return
+    
+    with st.spinner("Simulating..."):
+        result = run_goal_projection(
+            initial=current_savings,
+            monthly_contribution=monthly_investment,
+            years=years + retirement_years,
+            goal_amount=0 if plan_retirement else goal_amount,
+            allocation={'equity': equity, 'debt': debt, 'gold': gold},
+            inflation=inflation,
+            step_up=step_up,
+            withdrawal_start_year=years if plan_retirement else None,
+            monthly_withdrawal=monthly_withdrawal,
+            paths=paths
+        )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if plan_retirement:
+            st.metric("✅ Money Lasts", f"{(1 - result['depletion_probability']) * 100:.0f}%")
+        else:
+            st.metric("✅ Chance of Reaching Goal", f"{result['success_probability'] * 100:.0f}%")
+    with col2:
+        st.metric("📊 Median Outcome (today's ₹)", format_currency(result['real_percentiles'][50]))
+    with col3:
+        st.metric(
+            "📉 Bad Market, 5th Percentile (today's ₹)",
+            format_currency(result['real_percentiles'][5])
+        )
+    st.caption(
+        f"Expected portfolio return {result['expected_return']:.1f}% a year, "
+        f"volatility {result['volatility']:.1f}%. {result['paths']:,} simulated paths."
+    )
+    
+    # Percentile bands by year (nominal ₹)
+    bands = result['bands']
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=bands['year'], y=bands[95], line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=bands['year'], y=bands[5], fill='tonexty', line=dict(width=0), name='5th–95th percentile'))
+    fig.add_trace(go.Scatter(x=bands['year'], y=bands[75], line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=bands['year'], y=bands[25], fill='tonexty', line=dict(width=0), name='25th–75th percentile'))
+    fig.add_trace(go.Scatter(x=bands['year'], y=bands[50], name='Median', line=dict(width=3)))
+    if result['goal_nominal']:
+        fig.add_hline(y=result['goal_nominal'], line_dash="dash", annotation_text="Goal (inflated)")
+    fig.update_layout(title="Projected Portfolio Value", xaxis_title="Year", yaxis_title="₹")
+    st.plotly_chart(fig, use_container_width=True)
+
 
+def show_tax_calculator():
+    """Old vs new regime comparison"""
+    
+    st.header("Income Tax Calculator")
+    st.write("Compare Old vs New tax regimes")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Income")
+        income = st.number_input("Gross Annual Income (₹)", min_value=0, max_value=100000000, value=1200000, step=50000)
+    
+    with col2:
+        st.subheader("Deductions (Old Regime)")
+        deductions_80c = st.slider("Section 80C (₹)", min_value=0, max_value=150000, value=150000, step=5000)
+        deductions_80d = st.slider("Section 80D (₹)", min_value=0, max_value=50000, value=25000, step=5000)
+        deductions_other = st.number_input("Other Deductions (₹)", min_value=0, max_value=10000000, value=0, step=10000)
+    
+    comparison = compare_regimes(income, deductions_80c, deductions_80d, deductions_other)
+    
+    col1, col2 = st.columns(2)
+    for column, result in ((col1, comparison.old), (col2, comparison.new)):
+        with column:
+            badge = " ✅" if comparison.better == result.regime else ""
+            st.subheader(f"{result.regime.title()} Regime{badge}")
+            st.metric("💰 Total Tax", format_currency(result.total_tax))
+            st.metric("📉 Taxable Income", format_currency(result.taxable_income))
+            st.caption(
+                f"Effective rate {result.effective_rate * 100:.1f}% · "
+                f"marginal slab {result.marginal_rate * 100:.0f}%"
+                + (f" · rebate {format_currency(result.rebate)}" if result.rebate else "")
+            )
+            st.dataframe(
+                {
+                    "Slab": [
+                        f"{format_currency(slab.lower)} – " + (format_currency(slab.upper) if slab.upper else "above")
+                        for slab in result.slabs
+                    ],
+                    "Rate": [f"{slab.rate * 100:.0f}%" for slab in result.slabs],
+                    "Tax": [format_currency(slab.tax) for slab in result.slabs],
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+    
+    if comparison.savings:
+        st.success(
+            f"💡 The {comparison.better} regime saves you {format_currency(comparison.savings)} a year"
+        )
+    else:
+        st.info("Both regimes cost the same at this income")
+    
+    # Tax across incomes with the same deductions
+    old_deductions = comparison.old.total_deductions
+    incomes = np.linspace(0, max(3000000, income * 2), 200)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=incomes, y=tax_curve(incomes, 'old', old_deductions), name='Old Regime'))
+    fig.add_trace(go.Scatter(x=incomes, y=tax_curve(incomes, 'new'), name='New Regime'))
+    fig.add_vline(x=income, line_dash="dash", annotation_text="You")
+    fig.update_layout(title="Tax by Income", xaxis_title="Gross Income (₹)", yaxis_title="Total Tax (₹)")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    if st.button("📞 Talk to Tax Planning Agent", type="primary"):
+        st.session_state.page = "Dashboard"
+        st.rerun()
@@ -2,108 +2,134 @@
 Reports Page
 """
 
+import math
+import mimetypes
+import os
+from urllib.parse import urlencode
+
 import streamlit as st
-from database.db import get_user_reports
-from pathlib import Path
+from streamlit_app.utils.data import get_user_reports, count_user_reports, load_report_bytes
+
+REPORTS_PAGE_SIZE = int(os.getenv("REPORTS_PAGE_SIZE", "10"))
+# Public URL of the webhook server; when set, downloads stream straight from
+# its /api/reports/download endpoint instead of through Streamlit
+REPORT_DOWNLOAD_BASE_URL = os.getenv("REPORT_DOWNLOAD_BASE_URL", "")
+
+REPORT_TYPE_LABELS = {
+    'comprehensive_planning': '🧭 Comprehensive Plans',
+    'financial_planning': '💼 Financial Plans',
+    'tax_planning': '💰 Tax Plans',
+}
+
+
+def report_type_label(report_type):
+    """Display name for a report type"""
+    return REPORT_TYPE_LABELS.get(report_type, report_type.replace('_', ' ').title())
+
+
+def format_size(size):
+    """File size from report metadata, or a dash for reports saved before sizes were recorded"""
+    return f"{size / 1024:.0f} KB" if size else "—"
+
+
+def show_report_download(report, key_prefix="download", label="⬇️ Download"):
+    """
+    Download control for a report that doesn't read the file on render.
+
+    Links to the webhook server's download endpoint when
+    REPORT_DOWNLOAD_BASE_URL is set. Otherwise the first click loads that one
+    file (cached) and swaps in a save button.
+    """
+    if REPORT_DOWNLOAD_BASE_URL:
+        query = urlencode({'path': report['path'], 'filename': report['filename']})
+        st.link_button(label, f"{REPORT_DOWNLOAD_BASE_URL.rstrip('/')}/api/reports/download?{query}")
+        return
+
+    # Only one report's bytes are held for the session at a time
+    if st.session_state.get('prepared_report') != report['id']:
+        if st.button(label, key=f"prepare_{key_prefix}_{report['id']}"):
+            st.session_state.prepared_report = report['id']
+            st.rerun()
+        return
+
+    try:
+        data = load_report_bytes(report['path'])
+    except FileNotFoundError:
+        st.error("File not found")
+        return
+
+    st.download_button(
+        label="💾 Save",
+        data=data,
+        file_name=report['filename'],
+        mime=mimetypes.guess_type(report['filename'])[0] or "application/pdf",
+        key=f"{key_prefix}_{report['id']}"
+    )
 
 
 def show_reports_page():
     """Show reports page"""
-    
+
     st.title("📄 Your Financial Reports")
     st.write("Download and view your personalized financial reports")
-    
+
     st.divider()
-    
-    # Get user's reports
+
     phone = st.session_state.user.get('phone')
-    reports = get_user_reports(phone)
-    
-    if not reports:
+    counts = count_user_reports(phone)
+    total = sum(counts.values())
+
+    if not total:
         st.info("📭 No reports yet. Generate your first report from the Dashboard!")
-        
+
         if st.button("Go to Dashboard", type="primary"):
             st.session_state.page = "Dashboard"
             st.rerun()
-    else:
-        # Group reports by type
-        financial_reports = [r for r in reports if 'financial' in r['type']]
-        tax_reports = [r for r in reports if 'tax' in r['type']]
-        
-        # Financial Planning Reports
-        if financial_reports:
-            st.subheader("💼 Financial Planning Reports")
-            for report in financial_reports:
-                with st.container():
-                    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
-                    
-                    with col1:
-                        st.write(f"**{report['title']}**")
-                    
-                    with col2:
-                        st.caption(f"📅 {report['date'][:10]}")
-                    
-                    with col3:
-                        file_size = Path(report['path']).stat().st_size / 1024
-                        st.caption(f"📊 {file_size:.0f} KB")
-                    
-                    with col4:
-                        try:
-                            with open(report['path'], 'rb') as f:
-                                st.download_button(
-                                    label="⬇️ Download",
-                                    data=f,
-                                    file_name=report['filename'],
-                                    mime="application/pdf",
-                                    key=f"download_{report['id']}"
-                                )
-                        except FileNotFoundError:
-                            st.error("File not found")
-                
-                st.divider()
-        
-        # Tax Planning Reports
-        if tax_reports:
-            st.subheader("💰 Tax Planning Reports")
-            for report in tax_reports:
-                with st.container():
-                    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
-                    
-                    with col1:
-                        st.write(f"**{report['title']}**")
-                    
-                    with col2:
-                        st.caption(f"📅 {report['date'][:10]}")
-                    
-                    with col3:
-                        file_size = Path(report['path']).stat().st_size / 1024
-                        st.caption(f"📊 {file_size:.0f} KB")
-                    
-                    with col4:
-                        try:
-                            with open(report['path'], 'rb') as f:
-                                st.download_button(
-                                    label="⬇️ Download",
-                                    data=f,
-                                    file_name=report['filename'],
-                                    mime="application/pdf",
-                                    key=f"download_{report['id']}"
-                                )
-                        except FileNotFoundError:
-                            st.error("File not found")
-                
-                st.divider()
-        
-        # Stats
-        st.subheader("📊 Report Statistics")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Total Reports", len(reports))
-        
-        with col2:
-            st.metric("Financial Plans", len(financial_reports))
-        
-        with col3:
-            st.metric("Tax Plans", len(tax_reports))
+        return
+
+    # Filter and page through the list; only one page of rows is loaded
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        report_type = st.selectbox(
+            "Report type",
+            [None] + sorted(counts),
+            format_func=lambda t: "All reports" if t is None else report_type_label(t)
+        )
+    matching = counts[report_type] if report_type else total
+    pages = max(1, math.ceil(matching / REPORTS_PAGE_SIZE))
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+
+    offset = (page - 1) * REPORTS_PAGE_SIZE
+    reports = get_user_reports(phone, limit=REPORTS_PAGE_SIZE, offset=offset, report_type=report_type)
+    st.caption(f"Showing {offset + 1}–{offset + len(reports)} of {matching}")
+
+    for report in reports:
+        with st.container():
+            col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+
+            with col1:
+                st.write(f"**{report['title']}**")
+                st.caption(report_type_label(report['type']))
+
+            with col2:
+                st.caption(f"📅 {report['date'][:10]}")
+
+            with col3:
+                st.caption(f"📊 {format_size(report['size'])}")
+
+            with col4:
+                show_report_download(report)
+
+        st.divider()
+
+    # Stats
+    st.subheader("📊 Report Statistics")
+    columns = st.columns(len(counts) + 1)
+
+    with columns[0]:
+        st.metric("Total Reports", total)
 
+    for column, (count_type, count) in zip(columns[1:], sorted(counts.items())):
+        with column:
+            st.metric(report_type_label(count_type), count)
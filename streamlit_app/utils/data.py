@@ -0,0 +1,115 @@
+"""
+Data access for the Streamlit app
+Cached reads shared by every session, plus shared clients
+
+Streamlit reruns a page on every interaction, so calling database/db.py
+directly means one query per widget per session per rerun. Reads here go
+through st.cache_data, keyed by phone number and by the user's newest report
+(see report_version), so:
+
+- all sessions for a phone share one cached copy,
+- a new report changes the key, which invalidates just that user's entries
+  (the call's financial figures are committed in the same transaction),
+- TTLs bound staleness for anything written outside the report flow.
+"""
+
+import os
+
+import streamlit as st
+
+from database import db
+
+REPORT_VERSION_TTL_SECONDS = int(os.getenv("STREAMLIT_REPORT_CHECK_SECONDS", "5"))
+DATA_CACHE_TTL_SECONDS = int(os.getenv("STREAMLIT_DATA_CACHE_SECONDS", "60"))
+
+
+@st.cache_resource
+def get_database():
+    """Initialize the database once per server process"""
+    db.init_db()
+    return db.get_repository()
+
+
+@st.cache_resource
+def get_pixpoc_client():
+    """Shared Pixpoc client (one connection pool for every session)"""
+    # Imported on first call so pages render without httpx/requests
+    from services.pixpoc_client import PixpocClient
+
+    return PixpocClient(
+        base_url=os.getenv("PIXPOC_API_BASE_URL", "https://app.pixpoc.ai"),
+        api_key=os.getenv("PIXPOC_API_KEY", "")
+    )
+
+
+@st.cache_data(ttl=REPORT_VERSION_TTL_SECONDS, show_spinner=False)
+def report_version(phone):
+    """
+    Timestamp of the user's newest report ('' if none).
+
+    The cheapest possible read (one indexed row); every other cached read
+    takes it as part of its key, so a new report invalidates them.
+    """
+    newest = db.get_user_reports(phone, limit=1)
+    return newest[0]['date'] if newest else ''
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL_SECONDS, max_entries=1000, show_spinner=False)
+def _user_reports(phone, version, limit, offset, report_type):
+    return db.get_user_reports(phone, limit, offset, report_type)
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL_SECONDS, max_entries=1000, show_spinner=False)
+def _report_counts(phone, version):
+    return db.count_user_reports(phone)
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL_SECONDS, max_entries=1000, show_spinner=False)
+def _financial_data(phone, version, fields):
+    return db.get_user_financial_data(phone, fields)
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL_SECONDS * 5, max_entries=1000, show_spinner=False)
+def _financial_history(phone, version):
+    return db.get_financial_history(phone)
+
+
+def get_user_reports(phone, limit=None, offset=0, report_type=None):
+    """Cached db.get_user_reports"""
+    return _user_reports(phone, report_version(phone), limit, offset, report_type)
+
+
+def count_user_reports(phone):
+    """Cached db.count_user_reports"""
+    return _report_counts(phone, report_version(phone))
+
+
+def get_user_financial_data(phone, fields=None):
+    """Cached db.get_user_financial_data"""
+    return _financial_data(phone, report_version(phone), tuple(fields) if fields else None)
+
+
+def get_financial_history(phone):
+    """Cached db.get_financial_history"""
+    return _financial_history(phone, report_version(phone))
+
+
+@st.cache_data(max_entries=8, ttl=600, show_spinner=False)
+def load_report_bytes(path):
+    """Read one report file; only the few most recently requested stay cached"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def check_for_new_report(phone):
+    """
+    Whether a report arrived since this session last looked.
+
+    Returns:
+        True once per new report for this session
+    """
+    version = report_version(phone)
+    seen = st.session_state.get('seen_report_version')
+    st.session_state.seen_report_version = version
+    return seen is not None and version != seen
+
@@ -0,0 +1,81 @@
+"""
+Report events for the Streamlit app
+Waits on the webhook server's /api/events stream instead of polling
+
+The stream sends a keep-alive comment every few seconds; each one is handed
+to `on_heartbeat` so the page can touch an element, which is where Streamlit
+checks for a pending rerun. User interactions therefore still interrupt the
+wait immediately.
+"""
+
+import json
+import os
+import time
+
+import httpx
+
+from streamlit_app.utils.data import report_version
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+# Give up and let the page re-subscribe after this long without an event
+REPORT_WAIT_SECONDS = int(os.getenv("STREAMLIT_REPORT_WAIT_SECONDS", "900"))
+
+
+def iter_events(phone, since=None):
+    """
+    Yield (event, data) pairs from the backend's event stream.
+
+    Keep-alive comments yield (None, None).
+
+    Raises:
+        httpx.HTTPError: backend unreachable or the stream broke
+    """
+    params = {'phone': phone}
+    if since:
+        params['since'] = since
+
+    # Read timeout well above the backend's heartbeat catches a dead connection
+    timeout = httpx.Timeout(5.0, read=60.0)
+    with httpx.stream("GET", f"{BACKEND_URL.rstrip('/')}/api/events", params=params, timeout=timeout) as response:
+        response.raise_for_status()
+        event, data = None, []
+        for line in response.iter_lines():
+            if line.startswith(':'):
+                yield None, None
+            elif line.startswith('event:'):
+                event = line[6:].strip()
+            elif line.startswith('data:'):
+                data.append(line[5:].strip())
+            elif not line:
+                if event and data:
+                    yield event, json.loads('\n'.join(data))
+                event, data = None, []
+
+
+def wait_for_report(phone, since=None, on_heartbeat=None):
+    """
+    Block until the backend reports this user's report is ready or failed.
+
+    Args:
+        phone: User's phone number
+        since: Newest report date already shown; newer reports count as new
+        on_heartbeat: Called on every keep-alive
+
+    Returns:
+        (event, data) for `report_ready` / `report_failed`, or None after
+        REPORT_WAIT_SECONDS
+
+    Raises:
+        httpx.HTTPError: backend unreachable
+    """
+    deadline = time.monotonic() + REPORT_WAIT_SECONDS
+    for event, data in iter_events(phone, since):
+        if event in ('report_ready', 'report_failed'):
+            # Next read of the report version goes to the database
+            report_version.clear()
+            return event, data
+        if on_heartbeat is not None:
+            on_heartbeat()
+        if time.monotonic() > deadline:
+            return None
+    return None
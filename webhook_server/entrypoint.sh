@@ -8,6 +8,9 @@ chmod -R 777 /app/database /app/reports
 # Initialize database if it doesn't exist
 python -c "from database.db import init_db; init_db()" || true
 
-# Start the application
+# Start the application; WEB_CONCURRENCY > 1 runs several workers under gunicorn
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    exec gunicorn -c webhook_server/gunicorn.conf.py webhook_server.main:app
+fi
 exec uvicorn webhook_server.main:app --host 0.0.0.0 --port 8000
 
@@ -0,0 +1,22 @@
+"""
+Gunicorn configuration for multi-worker deployments
+Run with: gunicorn -c webhook_server/gunicorn.conf.py webhook_server.main:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.getenv('WEBHOOK_HOST', '0.0.0.0')}:{os.getenv('WEBHOOK_PORT', '8000')}"
+
+# One uvicorn event loop per worker process
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Report generation runs as a background task inside the worker that accepted
+# the callback; give it time to finish on graceful restarts
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "300"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
@@ -3,33 +3,53 @@ Simple FastAPI Webhook Server
 Receives callbacks from Pixpoc and processes them
 """
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
+from functools import lru_cache
+import asyncio
+import importlib
+import json
+import threading
+import time
 import sys
 import os
+from datetime import datetime
 from pathlib import Path
 from loguru import logger
-from openai import OpenAI
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from services.pixpoc_client import PixpocClient
-from services.agent_service import AgentService
-from services.report_service import ReportService
-from database.db import update_call_status, save_report, update_financial_data, get_call_by_tracking_id, get_call_by_id, save_call as db_save_call, get_user_reports, get_user_financial_data
+from database import async_db
+from database.repository import report_from_row
+from database.financial_model import financial_data_from_analysis
+from database.async_db import claim_call_for_processing, update_call_status, record_report, update_financial_data, get_call_by_tracking_id, get_call_by_id, save_call as db_save_call, get_user_reports, get_user_financial_data, get_financial_history, rollup_snapshots, cohort_summary, asset_allocation, goal_summary
+from services.events import format_sse, get_event_broker, publish_report_ready, watch_reports
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Keep-alive comment interval on /api/events streams
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Heavy modules imported in the background once the server is up, so the
+# first callback doesn't pay for them. Disable with WARMUP_IMPORTS=0.
+WARMUP_MODULES = [
+    "openai",
+    "weasyprint",
+    "crewai",
+    "finance_bot.comprehensive_planning.main",
+]
 
 app = FastAPI(title="FinanceBot Webhook Server")
 
+# Loops started at startup; the event loop only keeps weak references to tasks
+_server_tasks = set()
+
 # Add CORS middleware for frontend access
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +60,152 @@ app.add_middleware(
 )
 
 
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """Shared OpenAI client, imported on first use"""
+    from openai import OpenAI
+    from services.rate_limiter import openai_http_client
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=openai_http_client())
+
+
+@lru_cache(maxsize=1)
+def get_agent_service():
+    """Shared agent service (its crews lease pooled agents)"""
+    from services.agent_service import AgentService
+    return AgentService()
+
+
+@lru_cache(maxsize=1)
+def get_pixpoc_client():
+    """Shared Pixpoc client with pooled HTTP connections"""
+    from services.pixpoc_client import PixpocClient
+    return PixpocClient(
+        base_url=os.getenv("PIXPOC_API_BASE_URL", "https://app.pixpoc.ai"),
+        api_key=os.getenv("PIXPOC_API_KEY", "")
+    )
+
+
+@lru_cache(maxsize=1)
+def get_contact_memory():
+    """Shared contact memory updater"""
+    from services.contact_memory import ContactMemory
+    return ContactMemory(get_openai_client)
+
+
+@lru_cache(maxsize=1)
+def get_contact_metadata_syncer():
+    """Shared write-behind syncer for contact metadata"""
+    from services.contact_metadata import ContactMetadataSyncer
+    return ContactMetadataSyncer(get_pixpoc_client())
+
+
+@lru_cache(maxsize=1)
+def get_report_service():
+    """Shared report service rooted at REPORTS_PATH"""
+    from services.report_service import ReportService
+    
+    # Use absolute path for reports to ensure they're in the project root
+    reports_path = os.getenv("REPORTS_PATH", "./reports")
+    if not os.path.isabs(reports_path):
+        # Convert relative path to absolute from project root
+        reports_path = project_root / reports_path
+    
+    return ReportService(storage_path=str(reports_path))
+
+
+def warm_up_imports(modules=WARMUP_MODULES):
+    """Import heavy modules so later requests find them in sys.modules"""
+    started = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Warm-up import of {module} failed: {e}")
+    logger.info(f"Warm-up imports finished in {time.perf_counter() - started:.2f}s")
+
+
+@app.on_event("startup")
+async def schedule_warm_up():
+    """Start background warm-up imports shortly after the server starts listening"""
+    if os.getenv("WARMUP_IMPORTS", "1") == "0":
+        return
+    
+    delay = float(os.getenv("WARMUP_DELAY_SECONDS", "1"))
+    thread = threading.Thread(target=warm_up_imports, name="warmup-imports", daemon=True)
+    asyncio.get_running_loop().call_later(delay, thread.start)
+
+
+def start_server_task(coro):
+    """Run a coroutine for the life of the server; it is cancelled on shutdown"""
+    task = asyncio.create_task(coro)
+    _server_tasks.add(task)
+    task.add_done_callback(_server_tasks.discard)
+    return task
+
+
+async def rollup_snapshots_periodically(interval_hours: float):
+    """Downsample old financial snapshots every interval_hours"""
+    while True:
+        try:
+            rolled_up = await rollup_snapshots()
+            logger.info(f"Rolled up {rolled_up} financial snapshots")
+        except Exception as e:
+            logger.error(f"Snapshot rollup failed: {e}")
+        await asyncio.sleep(interval_hours * 3600)
+
+
+@app.on_event("startup")
+async def schedule_snapshot_rollup():
+    """
+    Run the snapshot rollup job in-process when SNAPSHOT_ROLLUP_INTERVAL_HOURS
+    is set; otherwise run `python -m database.rollup_snapshots` from cron.
+    """
+    interval_hours = float(os.getenv("SNAPSHOT_ROLLUP_INTERVAL_HOURS", "0"))
+    if interval_hours > 0:
+        start_server_task(rollup_snapshots_periodically(interval_hours))
+
+
+@app.on_event("startup")
+async def schedule_report_watcher():
+    """
+    Forward reports finished by other workers to this worker's /api/events
+    subscribers; REPORT_EVENTS_WATCH_SECONDS=0 turns it off (single worker).
+    """
+    interval = float(os.getenv("REPORT_EVENTS_WATCH_SECONDS", "2"))
+    if interval > 0:
+        start_server_task(watch_reports(interval))
+
+
+@app.on_event("startup")
+async def schedule_contact_metadata_sync():
+    """
+    Send queued contact metadata updates to Pixpoc in the background;
+    CONTACT_SYNC_INTERVAL_SECONDS=0 leaves it to other workers.
+    """
+    interval = float(os.getenv("CONTACT_SYNC_INTERVAL_SECONDS", "2"))
+    if interval > 0:
+        start_server_task(get_contact_metadata_syncer().run(interval))
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    """
+    Stop the server's background loops, flush queued contact metadata, then
+    release pooled Pixpoc and database connections
+    """
+    for task in list(_server_tasks):
+        task.cancel()
+    await asyncio.gather(*_server_tasks, return_exceptions=True)
+    if get_contact_metadata_syncer.cache_info().currsize:
+        try:
+            await asyncio.wait_for(get_contact_metadata_syncer().sync_due(flush=True), timeout=10)
+        except Exception as e:
+            logger.warning(f"Contact metadata flush on shutdown failed: {e}")
+    if get_pixpoc_client.cache_info().currsize:
+        await get_pixpoc_client().aclose()
+    await async_db.close()
+
+
 class AnalysisData(BaseModel):
     """Analysis data from Pixpoc"""
     status: str
@@ -63,102 +229,36 @@ class PixpocCallback(BaseModel):
     timestamp: str  # ISO timestamp
 
 
-async def generate_memory_summary(existing_memory: str, new_report: str) -> str:
-    """
-    Generate a cumulative summary combining existing memory and new report.
-    
-    Args:
-        existing_memory: Previous memory/summary from contact metadata
-        new_report: New financial report generated from latest call
-        
-    Returns:
-        Condensed summary combining both
-    """
-    try:
-        prompt = f"""You are a financial advisor assistant. Create a concise but comprehensive summary that combines the existing contact memory with the new financial report.
-
-The summary should:
-- Be clear and structured
-- Highlight key financial information (income, savings, goals, investments)
-- Note any changes or updates from the new report
-- Keep important historical context from previous interactions
-- Be professional and easy to read
-- Maximum 500 words
-
-EXISTING MEMORY:
-{existing_memory if existing_memory else "No previous interactions recorded."}
-
-NEW REPORT:
-{new_report}  
-
-Generate a comprehensive summary that captures the complete financial profile:"""
-
-        logger.info("Generating memory summary using OpenAI...")
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a financial advisor assistant that creates concise, structured summaries of client financial information."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=1000
-        )
-        
-        summary = response.choices[0].message.content.strip()
-        logger.info(f"Generated summary: {len(summary)} characters")
-        
-        return summary
-        
-    except Exception as e:
-        logger.error(f"Failed to generate memory summary: {e}")
-        # Fallback: return concatenated version with truncation
-        fallback = f"{existing_memory}\n\n--- Latest Report ---\n{new_report[:1000]}"
-        return fallback[:2000]
-
-
 async def process_completed_call(
     call_id: str, 
     contact_id: str, 
     phone_number: str,
-    analysis_data: Optional[dict] = None
+    analysis_data: Optional[dict] = None,
+    completed_at: Optional[str] = None
 ):
     """
     Background task to process completed call.
     
-    1. Pass analysis data directly to AI agent
+    1. Enrich analysis data with the call transcript
     2. Generate report using AI agent
     3. Generate PDF and save
-    4. Update contact metadata with cumulative summary
+    4. Store the call's financial figures
+    5. Update contact metadata with cumulative summary
     
     Args:
         call_id: Pixpoc call UUID
         contact_id: Pixpoc contact ID
         phone_number: User's phone number
         analysis_data: Analysis data from webhook callback
+        completed_at: Callback timestamp; the financial snapshot is taken at it
     """
     try:
         logger.info(f"Processing call: {call_id} for {phone_number}")
         
-        # Initialize services
-        agent_service = AgentService()
-        pixpoc_api_key = os.getenv("PIXPOC_API_KEY", "")
-        pixpoc_client = PixpocClient(api_key=pixpoc_api_key)
-        
-        # Use absolute path for reports to ensure they're in the project root
-        reports_path = os.getenv("REPORTS_PATH", "./reports")
-        if not os.path.isabs(reports_path):
-            # Convert relative path to absolute from project root
-            project_root = Path(__file__).parent.parent
-            reports_path = project_root / reports_path
-        
-        report_service = ReportService(storage_path=str(reports_path))
+        # Shared service instances (built once per process)
+        agent_service = get_agent_service()
+        pixpoc_client = get_pixpoc_client()
+        report_service = get_report_service()
         
         # Pass analysis data directly to agent
         if not analysis_data:
@@ -167,14 +267,27 @@ async def process_completed_call(
         
         logger.info(f"Analysis data received: {list(analysis_data.keys())}")
         
+        from services.call_enrichment import enrich_call
+        
+        # Add the transcript and call details (best effort, bounded by a timeout)
+        # while the user's stored report sections load
+        enrichment, previous_sections = await asyncio.gather(
+            enrich_call(pixpoc_client, call_id),
+            agent_service.load_report_sections(phone_number)
+        )
+        agent_input = dict(analysis_data, **enrichment)
+        
         # Use comprehensive planning (financial + tax)
         agent_type = "comprehensive_planning"
         logger.info(f"Running {agent_type} agent...")
         
         # Run agent with analysis data
         markdown_report = await agent_service.process_call_and_generate_report(
-            pixpoc_data=analysis_data,
-            agent_type=agent_type
+            pixpoc_data=agent_input,
+            agent_type=agent_type,
+            phone_number=phone_number,
+            call_id=call_id,
+            previous_sections=previous_sections
         )
         
         # Generate PDF
@@ -186,51 +299,51 @@ async def process_completed_call(
             call_id=call_id
         )
         
-        # Update database - only store report info
+        # Update database - call status, user, report row and the figures the
+        # call established (structured tables, and a snapshot at the call's
+        # time for the trend chart) in one transaction, so readers keyed on
+        # the newest report never see it without its figures
         logger.info("Updating database...")
         logger.info(f"Saving report to database - phone: {phone_number}, report_id: {report_metadata['id']}, path: {report_metadata['pdf_path']}")
-        update_call_status(call_id, "completed")
-        
-        save_report(
+        await record_report(
+            call_id=call_id,
+            status="completed",
             phone_number=phone_number,
             report_id=report_metadata['id'],
-            call_id=call_id,
             report_type=agent_type,
             filename=report_metadata['pdf_filename'],
-            file_path=report_metadata['pdf_path']
+            file_path=report_metadata['pdf_path'],
+            file_size=report_metadata.get('file_size'),
+            financial_data=financial_data_from_analysis(analysis_data),
+            taken_at=completed_at
         )
         
         logger.info(f"✅ Report saved to database for {phone_number}")
+        publish_report_ready(phone_number, report_from_row({
+            'id': report_metadata['id'],
+            'type': agent_type,
+            'filename': report_metadata['pdf_filename'],
+            'file_path': report_metadata['pdf_path'],
+            'file_size': report_metadata.get('file_size'),
+            'created_at': datetime.now().isoformat()
+        }), call_id=call_id)
         
         # Update Pixpoc contact metadata with cumulative summary
         if contact_id:
             try:
                 logger.info(f"📝 Updating contact metadata for {contact_id}...")
                 
-                # Get existing contact metadata
-                existing_metadata = {}
-                existing_memory = ""
-                try:
-                    contact_data = await pixpoc_client.get_contact_metadata(contact_id)
-                    existing_metadata = contact_data.get("metadata", {})
-                    existing_memory = existing_metadata.get("memory", "")
-                    logger.info(f"Retrieved existing memory: {len(existing_memory)} characters")
-                except Exception as e:
-                    logger.warning(f"Could not fetch existing metadata (contact might be new): {e}")
-                
-                # Generate cumulative summary
-                logger.info("Generating cumulative memory summary...")
-                new_summary = await generate_memory_summary(existing_memory, markdown_report)
-                
-                # Update contact metadata with new summary
-                await pixpoc_client.update_contact_metadata(
-                    contact_id=contact_id,
-                    metadata={
-                        "memory": new_summary,
-                    }
+                # Fold this call into the locally kept memory; Pixpoc's copy
+                # is only read for contacts with no local memory yet
+                memory = await get_contact_memory().update(
+                    phone_number, contact_id, call_id, analysis_data, markdown_report, pixpoc_client
                 )
                 
-                logger.info(f"✅ Contact metadata updated with memory summary ({len(new_summary)} chars)")
+                # Stored locally now, sent to Pixpoc by the write-behind syncer
+                from services.contact_metadata import update_metadata
+                await update_metadata(contact_id, {"memory": memory}, phone_number)
+                
+                logger.info(f"✅ Contact metadata updated with memory summary ({len(memory)} chars)")
                 
             except Exception as e:
                 logger.error(f"⚠️ Failed to update contact metadata (non-critical): {e}")
@@ -240,7 +353,8 @@ async def process_completed_call(
         
     except Exception as e:
         logger.error(f"❌ Failed to process call {call_id}: {e}")
-        update_call_status(call_id, "failed")
+        await update_call_status(call_id, "failed")
+        get_event_broker().publish(phone_number, "report_failed", {"callId": call_id})
 
 
 @app.post("/webhook/pixpoc")
@@ -290,7 +404,7 @@ async def pixpoc_webhook(payload: PixpocCallback, background_tasks: BackgroundTa
             logger.error(f"Error: {payload.error}")
         
         # Update call status
-        update_call_status(payload.callId, f"analysis_{payload.status}")
+        await update_call_status(payload.callId, f"analysis_{payload.status}")
         
         return {
             "success": True, 
@@ -303,12 +417,12 @@ async def pixpoc_webhook(payload: PixpocCallback, background_tasks: BackgroundTa
     
     # Try tracking_id first (most reliable)
     if payload.callSid:
-        call_data = get_call_by_tracking_id(payload.callSid)
+        call_data = await get_call_by_tracking_id(payload.callSid)
         logger.info(f"Lookup by callSid ({payload.callSid}): {call_data is not None}")
     
     # Fallback to call_id
     if not call_data and payload.callId:
-        call_data = get_call_by_id(payload.callId)
+        call_data = await get_call_by_id(payload.callId)
         logger.info(f"Lookup by callId ({payload.callId}): {call_data is not None}")
     
     if not call_data:
@@ -325,6 +439,18 @@ async def pixpoc_webhook(payload: PixpocCallback, background_tasks: BackgroundTa
     contact_id = call_data['contact_id']
     
     logger.info(f"✅ Call found: {actual_call_id} for {phone_number}")
+    
+    # Claim the call so duplicate deliveries (possibly to other workers) are no-ops
+    if not await claim_call_for_processing(actual_call_id):
+        logger.info(f"⏭️ Call {actual_call_id} already {call_data['status']}, skipping duplicate callback")
+        return {
+            "success": True,
+            "message": "Call already processed or in progress",
+            "duplicate": True,
+            "callId": actual_call_id,
+            "callSid": payload.callSid
+        }
+    
     logger.info(f"📊 Starting background processing...")
     
     # Process in background
@@ -333,7 +459,8 @@ async def pixpoc_webhook(payload: PixpocCallback, background_tasks: BackgroundTa
         call_id=actual_call_id,
         contact_id=contact_id,
         phone_number=phone_number,
-        analysis_data=payload.analysis.dict() if payload.analysis else None
+        analysis_data=payload.analysis.dict() if payload.analysis else None,
+        completed_at=payload.timestamp
     )
     
     return {
@@ -363,7 +490,7 @@ async def save_call(request: SaveCallRequest):
     try:
         logger.info(f"Saving call to database: {request.call_id} for {request.phone}")
         
-        db_save_call(
+        await db_save_call(
             phone_number=request.phone,
             call_id=request.call_id,
             contact_id=request.contact_id,
@@ -385,13 +512,67 @@ async def save_call(request: SaveCallRequest):
         )
 
 
+@app.post("/api/campaigns/calls")
+async def start_campaign(
+    request: Request,
+    format: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    concurrency: int = int(os.getenv("CAMPAIGN_CONCURRENCY", "10")),
+    calls_per_second: float = float(os.getenv("CAMPAIGN_CALLS_PER_SECOND", "5")),
+    dedup_hours: float = float(os.getenv("CAMPAIGN_DEDUP_HOURS", "24"))
+):
+    """
+    Dial a contact list and stream progress as NDJSON.
+    
+    Body: CSV (header with `phone`, optional `name`, extra columns become
+    contact data) or JSONL, one contact per line. The campaign runs in the
+    background, so it finishes and records every call even if the client
+    disconnects.
+    
+    Usage:
+        curl -N -X POST --data-binary @contacts.csv \
+            "http://localhost:8000/api/campaigns/calls?format=csv"
+    """
+    from services.campaign_service import CampaignService, parse_contacts
+    
+    agent_id = agent_id or os.getenv("PIXPOC_AGENT_ID")
+    if not agent_id:
+        raise HTTPException(status_code=400, detail="agent_id required (or set PIXPOC_AGENT_ID)")
+    
+    try:
+        contacts = parse_contacts((await request.body()).decode("utf-8"), format)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse contacts: {e}")
+    
+    if not contacts:
+        raise HTTPException(status_code=400, detail="No contacts with a phone number found")
+    
+    logger.info(f"📞 Starting campaign for {len(contacts)} contacts")
+    campaign = CampaignService(
+        get_pixpoc_client(),
+        agent_id=agent_id,
+        from_number_id=os.getenv("PIXPOC_FROM_NUMBER_ID"),
+        concurrency=concurrency,
+        calls_per_second=calls_per_second,
+        dedup_hours=dedup_hours
+    )
+    
+    async def progress():
+        async for event in campaign.run(contacts):
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
 @app.get("/api/reports")
-async def get_reports(phone: str):
+async def get_reports(phone: str, limit: Optional[int] = None, offset: int = 0):
     """
-    Get all reports for a user.
+    Get a user's reports, newest first.
     
     Args:
         phone: User's phone number
+        limit: Page size (default: all reports)
+        offset: Reports to skip
         
     Returns:
         List of reports with metadata
@@ -404,7 +585,7 @@ async def get_reports(phone: str):
             )
         
         logger.info(f"Fetching reports for {phone}")
-        reports = get_user_reports(phone)
+        reports = await get_user_reports(phone, limit, offset)
         
         # Return reports array directly (frontend expects array)
         return reports
@@ -417,6 +598,40 @@ async def get_reports(phone: str):
         )
 
 
+@app.get("/api/events")
+async def report_events(phone: str, since: Optional[str] = None):
+    """
+    Server-sent events for a user's reports, so clients don't have to poll.
+    
+    Events:
+        report_ready: a report was saved (data is the report, as in /api/reports, plus callId)
+        report_failed: processing a call failed (data has callId)
+    
+    Args:
+        phone: User's phone number
+        since: Newest report date the client already has; reports saved
+            after it are sent first, covering the gap before connecting
+    """
+    if not phone:
+        raise HTTPException(status_code=400, detail="Phone number required")
+    
+    async def missed_reports():
+        if not since:
+            return []
+        reports = await get_user_reports(phone, limit=10)
+        return [
+            format_sse("report_ready", report, report["id"])
+            for report in reversed(reports) if report["date"] > since
+        ]
+    
+    return StreamingResponse(
+        get_event_broker().stream(phone, SSE_HEARTBEAT_SECONDS, replay=missed_reports),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx-style proxies from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/financial-data")
 async def get_financial_data(phone: str):
     """
@@ -436,7 +651,9 @@ async def get_financial_data(phone: str):
             )
         
         logger.info(f"Fetching financial data for {phone}")
-        financial_data = get_user_financial_data(phone)
+        financial_data = await get_user_financial_data(
+            phone, fields=('income', 'savings', 'expenses', 'net_worth', 'data')
+        )
         
         # Calculate savings rate
         income = financial_data.get('income', 0)
@@ -449,6 +666,7 @@ async def get_financial_data(phone: str):
             "savings": financial_data.get('savings', 0),
             "expenses": financial_data.get('expenses', 0),
             "savingsRate": round(savings_rate, 2),
+            "netWorth": financial_data.get('net_worth', 0),
             "data": financial_data.get('data', {})
         }
         
@@ -460,6 +678,76 @@ async def get_financial_data(phone: str):
         )
 
 
+@app.get("/api/financial-history")
+async def get_financial_history_endpoint(phone: str, start: Optional[str] = None, end: Optional[str] = None):
+    """
+    Get a user's financial snapshots for trend charts.
+    
+    Args:
+        phone: User's phone number
+        start: Inclusive ISO start date (default: all history)
+        end: Exclusive ISO end date (default: now)
+        
+    Returns:
+        Snapshots oldest first; months older than the retention window are
+        one rolled-up point each
+    """
+    try:
+        if not phone:
+            raise HTTPException(
+                status_code=400,
+                detail="Phone number required"
+            )
+        
+        history = await get_financial_history(phone, start, end)
+        return {
+            "success": True,
+            "history": history
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching financial history: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching financial history: {str(e)}"
+        )
+
+
+@app.get("/api/analytics/cohorts")
+async def get_cohort_analytics(by: str = "income_band"):
+    """
+    Cohort analytics across all users, aggregated in SQL.
+    
+    Args:
+        by: Cohort key - 'income_band' or 'risk_profile'
+        
+    Returns:
+        Cohort summary plus asset allocation and goal popularity
+    """
+    try:
+        cohorts, assets, goals = await asyncio.gather(
+            cohort_summary(by), asset_allocation(), goal_summary()
+        )
+        return {
+            "success": True,
+            "by": by,
+            "cohorts": cohorts,
+            "assetAllocation": assets,
+            "goals": goals
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing cohort analytics: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error computing cohort analytics: {str(e)}"
+        )
+
+
 @app.get("/api/reports/download")
 async def download_report(path: str, filename: str = None):
     """
@@ -542,7 +830,7 @@ async def download_report(path: str, filename: str = None):
 @app.get("/health")
 async def health():
     """Health check"""
-    return {"status": "healthy", "service": "financebot-webhook"}
+    return {"status": "healthy", "service": "financebot-webhook", "pid": os.getpid()}
 
 
 @app.get("/")